@@ -0,0 +1,294 @@
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+from sqlalchemy import insert
+from starlette.responses import JSONResponse
+
+from backend import crud, models, schemas
+from backend.crud.export import EXPORT_BATCH_SIZE, export_ndjson
+from backend.crud.importer import IMPORT_CHUNK_SIZE, ImportAborted, ImportReport, import_file
+from backend.routers.serialization import dumps, encode_rows
+from backend.dependencies import Session, close_db_state, create_db_engine, db_state, init_db_state, metadata, \
+    settings
+
+
+# Maintenance commands, run as `python -m backend <command>` against the database configured through DB_URL
+def rebuild_ratings(args: argparse.Namespace) -> None:
+    with Session(db_state.engine) as db:
+        rated_artworks = crud.rebuild_artwork_ratings(db)
+
+    print(f"Rebuilt rating aggregates for {rated_artworks} artworks")
+
+
+def rebuild_search(args: argparse.Namespace) -> None:
+    with Session(db_state.engine) as db:
+        indexed_rows = crud.rebuild_search_indexes(db)
+
+    for index, rows in indexed_rows.items():
+        print(f"Rebuilt the {index} search index over {rows} rows")
+
+
+def refresh_similar(args: argparse.Namespace) -> None:
+    with Session(db_state.engine) as db:
+        refreshed_artworks = crud.refresh_artwork_similarities(db, full=args.full)
+
+    print(f"Refreshed the similar artworks of {refreshed_artworks} artworks")
+
+
+def export(args: argparse.Namespace) -> None:
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+
+    try:
+        with Session(db_state.engine) as db:
+            for chunk in export_ndjson(db, schemas.CatalogResource(args.resource),
+                                       [schemas.ExportInclude(included) for included in args.include], args.since,
+                                       compress=args.gzip, batch_size=args.batch_size):
+                output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+def import_catalog(args: argparse.Namespace) -> None:
+    last_report = 0.0
+
+    def print_error(position: int, message: str) -> None:
+        print(f"{args.path}:{position}: {message}", file=sys.stderr)
+
+    def print_progress(report: ImportReport) -> None:
+        nonlocal last_report
+
+        if report.elapsed - last_report >= 1:
+            last_report = report.elapsed
+            print(f"{report.imported} rows imported, {report.rejected} rejected "
+                  f"({report.rows_per_second:.0f} rows/s)", file=sys.stderr)
+
+    try:
+        report = import_file(db_state.engine, schemas.CatalogResource(args.resource), Path(args.path),
+                             file_format=args.format, chunk_size=args.chunk_size, workers=args.workers,
+                             drop_indexes=args.drop_indexes,
+                             checkpoint=Path(args.checkpoint) if args.checkpoint else None,
+                             max_errors=args.max_errors, on_error=print_error, on_progress=print_progress)
+    except ImportAborted as error:
+        sys.exit(str(error))
+
+    print(f"Imported {report.imported} {report.resource} ({report.rejected} rejected) in {report.elapsed:.1f}s "
+          f"({report.rows_per_second:.0f} rows/s)")
+
+
+def _benchmark_words(rng: random.Random, count: int) -> list[str]:
+    syllables = ["ka", "ri", "mo", "ten", "sa", "lor", "vi", "dan", "el", "gru", "po", "nix", "ta", "ber", "shi", "qu"]
+    words = set()
+
+    while len(words) < count:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+
+    return sorted(words)
+
+
+def benchmark_search(args: argparse.Namespace) -> None:
+    # Builds a synthetic corpus in a scratch SQLite file (through the insert triggers, like real writes) and times
+    # the search queries against it. The corpus is deterministic, so numbers are comparable between runs.
+    path = Path(args.database)
+    engine = create_db_engine(settings, f"sqlite:///{path}")
+    rng = random.Random(args.seed)
+    words = _benchmark_words(rng, args.vocabulary)
+    # Zipf-like word frequencies, a few words are very common and most are rare
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    try:
+        if not path.exists() or path.stat().st_size == 0:
+            metadata.create_all(bind=engine)
+            started = time.perf_counter()
+
+            with engine.begin() as connection:
+                connection.execute(insert(models.Category.__table__),
+                                   [{"name": f"category {word}", "description": " ".join(rng.choices(words, k=8))}
+                                    for word in words[:args.categories]])
+
+            for first in range(0, args.artworks, args.chunk_size):
+                rows = [{
+                    "title": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(1, 4))),
+                    "description": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(20, 60))),
+                    "poster_url": f"https://example.com/{row}.jpg",
+                    "release_date": date(1950 + row % 75, 1 + row % 12, 1 + row % 28),
+                    "age_rating": "PG",
+                    "star_rating": row % 50 / 10,
+                    "category_id": 1 + row % args.categories,
+                } for row in range(first, min(first + args.chunk_size, args.artworks))]
+
+                with engine.begin() as connection:
+                    connection.execute(insert(models.Artwork.__table__), rows)
+
+            elapsed = time.perf_counter() - started
+            print(f"Indexed {args.artworks} artworks in {elapsed:.1f}s ({args.artworks / elapsed:.0f} rows/s)")
+
+        queries = {
+            "common word": words[0],
+            "rare word": words[len(words) // 2],
+            "two words": f"{words[1]} {words[5]}",
+            "prefix": words[3][:3],
+        }
+
+        with Session(engine) as db:
+            for name, query in queries.items():
+                timings = []
+                hits = []
+
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    hits = crud.search(db, schemas.SearchIndex.artwork, query, limit=args.limit)
+                    timings.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                crud.search(db, schemas.SearchIndex.artwork, query, limit=args.limit,
+                            cursor=(hits[-1].score, hits[-1].id) if hits else None)
+                next_page = (time.perf_counter() - started) * 1000
+
+                print(f"{name:12} {query!r:24} median {statistics.median(timings):8.1f} ms  "
+                      f"max {max(timings):8.1f} ms  next page {next_page:8.1f} ms  ({len(hits)} hits)")
+    finally:
+        engine.dispose()
+
+
+def benchmark_serialization(args: argparse.Namespace) -> None:
+    # Renders pages of artworks, loaded like GET /artworks/ loads them, through the pydantic response model with the
+    # stdlib encoder and with orjson, and through the column fast path, in an in-memory database
+    engine = create_db_engine(settings, "sqlite://")
+    scalar_names, _ = schemas.fieldset_names("artwork")
+    fieldset = schemas.Fieldset("artwork", frozenset(scalar_names), frozenset())
+    response_model = list[fieldset.model]
+
+    try:
+        metadata.create_all(bind=engine)
+
+        with engine.begin() as connection:
+            connection.execute(insert(models.Category.__table__), [{"name": "category", "description": "benchmark"}])
+            connection.execute(insert(models.Artwork.__table__), [{
+                "title": f"artwork {row}",
+                "description": "a synthetic artwork " * 10,
+                "poster_url": f"https://example.com/{row}.jpg",
+                "release_date": date(1950 + row % 75, 1 + row % 12, 1 + row % 28),
+                "age_rating": "PG",
+                "star_rating": row % 50 / 10,
+                "category_id": 1,
+            } for row in range(max(args.page_sizes))])
+
+        with Session(engine) as db:
+            for page_size in args.page_sizes:
+                artworks = crud.get_all_artworks(db, limit=page_size, profile=fieldset)
+                renderers = {
+                    "json": lambda: JSONResponse(jsonable_encoder(parse_obj_as(response_model, artworks))).body,
+                    "orjson": lambda: dumps(parse_obj_as(response_model, artworks)),
+                    "fast path": lambda: encode_rows(response_model, artworks),
+                }
+                bodies = {}
+
+                for name, renderer in renderers.items():
+                    timings = []
+
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        bodies[name] = renderer()
+                        timings.append((time.perf_counter() - started) * 1000)
+
+                    print(f"{page_size:6} artworks  {name:10} median {statistics.median(timings):8.2f} ms  "
+                          f"max {max(timings):8.2f} ms")
+
+                if len(set(bodies.values())) > 1:
+                    print(f"{page_size:6} artworks  the renderers disagree on the output")
+    finally:
+        engine.dispose()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m backend")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_ratings_parser = subparsers.add_parser("rebuild-ratings",
+                                                   help="recompute artwork_rating from the review table")
+    rebuild_ratings_parser.set_defaults(handler=rebuild_ratings)
+
+    rebuild_search_parser = subparsers.add_parser("rebuild-search",
+                                                  help="re-read the full-text search indexes from their tables")
+    rebuild_search_parser.set_defaults(handler=rebuild_search)
+
+    refresh_similar_parser = subparsers.add_parser("refresh-similar",
+                                                   help="recompute the similar artworks of queued (or all) artworks")
+    refresh_similar_parser.add_argument("--full", action="store_true", help="recompute every artwork")
+    refresh_similar_parser.set_defaults(handler=refresh_similar)
+
+    export_parser = subparsers.add_parser("export", help="write a table as NDJSON, one row per line")
+    export_parser.add_argument("resource", choices=[resource.value for resource in schemas.CatalogResource])
+    export_parser.add_argument("--include", choices=[included.value for included in schemas.ExportInclude],
+                               action="append", default=[], help="nest these rows into every artwork")
+    export_parser.add_argument("--since", type=datetime.fromisoformat,
+                               help="only rows updated at or after this ISO timestamp")
+    export_parser.add_argument("--gzip", action="store_true")
+    export_parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    export_parser.add_argument("--output", default="-", help="file to write to, standard output by default")
+    export_parser.set_defaults(handler=export)
+
+    import_parser = subparsers.add_parser("import", help="bulk insert rows from a JSONL or CSV file")
+    import_parser.add_argument("resource", choices=[resource.value for resource in schemas.CatalogResource])
+    import_parser.add_argument("path", help="JSONL or CSV file, optionally gzip'd")
+    import_parser.add_argument("--format", choices=["jsonl", "csv"], help="by default taken from the file name")
+    import_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE,
+                               help="rows per transaction")
+    import_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                               help="validation processes, 0 validates in the importing process")
+    import_parser.add_argument("--drop-indexes", action="store_true",
+                               help="drop the table's secondary indexes during the import and rebuild them after")
+    import_parser.add_argument("--checkpoint", help="progress file, a rerun with it resumes after the last chunk")
+    import_parser.add_argument("--max-errors", type=int, default=0,
+                               help="rejected rows tolerated before the import stops")
+    import_parser.set_defaults(handler=import_catalog)
+
+    benchmark_search_parser = subparsers.add_parser("benchmark-search",
+                                                    help="time search queries on a synthetic artwork corpus")
+    benchmark_search_parser.add_argument("--database", default="search-benchmark.db",
+                                         help="scratch SQLite file, the corpus is built only if it does not exist")
+    benchmark_search_parser.add_argument("--artworks", type=int, default=1_000_000)
+    benchmark_search_parser.add_argument("--categories", type=int, default=50)
+    benchmark_search_parser.add_argument("--vocabulary", type=int, default=20_000)
+    benchmark_search_parser.add_argument("--chunk-size", type=int, default=10_000)
+    benchmark_search_parser.add_argument("--limit", type=int, default=20)
+    benchmark_search_parser.add_argument("--repeat", type=int, default=20)
+    benchmark_search_parser.add_argument("--seed", type=int, default=2023)
+    benchmark_search_parser.set_defaults(handler=benchmark_search, uses_database=False)
+
+    benchmark_serialization_parser = subparsers.add_parser("benchmark-serialization",
+                                                           help="time rendering artwork list pages")
+    benchmark_serialization_parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 1000])
+    benchmark_serialization_parser.add_argument("--repeat", type=int, default=20)
+    benchmark_serialization_parser.set_defaults(handler=benchmark_serialization, uses_database=False)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+
+    if not getattr(args, "uses_database", True):
+        args.handler(args)
+        return
+
+    init_db_state(db_state)
+
+    try:
+        args.handler(args)
+    finally:
+        close_db_state(db_state)
+
+
+if __name__ == "__main__":
+    main()
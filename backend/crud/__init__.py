@@ -1 +1,2 @@
 from .crud import *
+from . import async_crud
@@ -0,0 +1,82 @@
+from typing import Type
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import models
+from .loaders import Profile, load_options
+from .pagination import Cursor, paginate
+
+
+# Async counterparts of the read functions in crud.py used by the native async endpoints. The statements are the
+# same, they are awaited on the AsyncSession, so the event loop is free while the driver works and only the row
+# processing runs on it. Relationships must come from load_options, lazy loads are not possible after the await.
+async def _first(db: AsyncSession, statement: Select):
+    return (await db.scalars(statement.limit(1))).first()
+
+
+async def _page(db: AsyncSession, statement: Select, id_column, skip: int, limit: int, cursor: Cursor | None) -> list:
+    return list((await db.scalars(paginate(statement, id_column, skip, limit, cursor))).all())
+
+
+# CRUD functions for USER table
+# ================================================= #
+# ================================================= #
+async def get_user_by_id(db: AsyncSession, user_id: int, profile: Profile = None) -> models.User | None:
+    return await _first(db, select(models.User).options(*load_options(profile)).where(models.User.id == user_id))
+
+
+# CRUD functions for COMMENT table
+# ================================================= #
+# ================================================= #
+async def get_all_comments(db: AsyncSession, skip: int = 0, limit: int = 100,
+                           cursor: Cursor | None = None) -> list[Type[models.Comment]]:
+    return await _page(db, select(models.Comment), models.Comment.id, skip, limit, cursor)
+
+
+async def get_comments_from_user(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                 cursor: Cursor | None = None) -> list[Type[models.Comment]]:
+    statement = select(models.Comment).where(models.Comment.author_id == user_id)
+    return await _page(db, statement, models.Comment.id, skip, limit, cursor)
+
+
+async def get_comments_from_artwork(db: AsyncSession, artwork_id: int, skip: int = 0, limit: int = 100,
+                                    cursor: Cursor | None = None) -> list[Type[models.Comment]]:
+    statement = select(models.Comment).where(models.Comment.artwork_id == artwork_id)
+    return await _page(db, statement, models.Comment.id, skip, limit, cursor)
+
+
+async def get_comment_by_id(db: AsyncSession, comment_id: int) -> models.Comment | None:
+    return await _first(db, select(models.Comment).where(models.Comment.id == comment_id))
+
+
+# CRUD functions for REVIEW table
+# ================================================= #
+# ================================================= #
+async def get_all_reviews(db: AsyncSession, skip: int = 0, limit: int = 100,
+                          cursor: Cursor | None = None) -> list[Type[models.Review]]:
+    return await _page(db, select(models.Review), models.Review.id, skip, limit, cursor)
+
+
+async def get_reviews_from_user(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                cursor: Cursor | None = None) -> list[Type[models.Review]]:
+    statement = select(models.Review).where(models.Review.author_id == user_id)
+    return await _page(db, statement, models.Review.id, skip, limit, cursor)
+
+
+async def get_reviews_from_artwork(db: AsyncSession, artwork_id: int, skip: int = 0, limit: int = 100,
+                                   cursor: Cursor | None = None) -> list[Type[models.Review]]:
+    statement = select(models.Review).where(models.Review.artwork_id == artwork_id)
+    return await _page(db, statement, models.Review.id, skip, limit, cursor)
+
+
+async def get_review_by_id(db: AsyncSession, review_id: int) -> models.Review | None:
+    return await _first(db, select(models.Review).where(models.Review.id == review_id))
+
+
+# CRUD functions for ARTWORK table
+# ================================================= #
+# ================================================= #
+async def get_artwork_by_id(db: AsyncSession, artwork_id: int, profile: Profile = None) -> models.Artwork | None:
+    return await _first(db, select(models.Artwork).options(*load_options(profile))
+                        .where(models.Artwork.id == artwork_id))
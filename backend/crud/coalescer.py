@@ -0,0 +1,51 @@
+import logging
+import threading
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from .crud import add_comment_votes_batch
+
+logger = logging.getLogger(__name__)
+
+
+class CommentVoteCoalescer:
+    # Buffers like/dislike increments per comment and writes everything that arrived within one flush window
+    # as a single executemany UPDATE. Votes still buffered when the process dies are lost.
+    def __init__(self, engine: Engine, flush_seconds: float):
+        self.engine = engine
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._pending: dict[int, tuple[int, int]] = {}
+        self._timer: threading.Timer | None = None
+
+    def add(self, comment_id: int, likes: int = 0, dislikes: int = 0) -> None:
+        with self._lock:
+            pending_likes, pending_dislikes = self._pending.get(comment_id, (0, 0))
+            self._pending[comment_id] = (pending_likes + likes, pending_dislikes + dislikes)
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            votes, self._pending = self._pending, {}
+            self._timer = None
+
+        if not votes:
+            return
+
+        try:
+            with Session(self.engine) as db:
+                add_comment_votes_batch(db, votes)
+        except Exception:
+            logger.exception("Could not write the buffered votes of %d comments", len(votes))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+        self.flush()
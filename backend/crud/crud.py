@@ -1,84 +1,219 @@
+import html
 from datetime import datetime
-from typing import Type
+from collections import Counter
+from typing import Any, Iterable, Type
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import bindparam, delete, func, insert, inspect, select, text, tuple_, update
+from sqlalchemy.orm import ONETOMANY, Session
+from sqlalchemy.orm.attributes import set_committed_value
 from backend import models, schemas
+from backend.dependencies import PasswordHasherBusy, needs_rehash, password_hasher, session_time
+from .facets import facet_index
+from .leaderboards import RankedArtwork, leaderboards, record_change
+from .loaders import Profile, load_options
+from . import similarity
+from .pagination import Cursor, paginate
+
+
+def _commit_keeping_state(db: Session) -> None:
+    # Objects keep the state they already have, instead of being expired and re-selected (refresh) after commit
+    db.expire_on_commit = False
+    db.commit()
+    db.expire_on_commit = True
+
+
+def _update_returning(db: Session, model: type[models.Base], row_id: int, update_data: dict,
+                      profile: Profile = None, commit: bool = True):
+    # A single UPDATE ... RETURNING, the row is None when nothing matched
+    if not update_data:
+        return db.query(model).options(*load_options(profile)).filter(model.id == row_id).first()
+
+    statement = select(model).from_statement(
+        update(model).where(model.id == row_id).values(**update_data).returning(model)
+    ).options(*load_options(profile)).execution_options(populate_existing=True)
+    row = db.scalars(statement).first()
+
+    if commit:
+        _commit_keeping_state(db)
+
+    return row
+
+
+def _delete_returning(db: Session, model: type[models.Base], row_id: int, commit: bool = True):
+    # A single DELETE ... RETURNING, child rows go through the ON DELETE CASCADE foreign keys
+    row = db.scalars(delete(model).where(model.id == row_id).returning(model)).first()
+
+    if commit:
+        _commit_keeping_state(db)
+
+    if row is not None:
+        # The children are gone together with the row, so report them as empty instead of lazy loading them
+        for relationship in inspect(model).relationships:
+            if relationship.uselist:
+                set_committed_value(row, relationship.key, [])
+            elif relationship.direction is ONETOMANY:
+                set_committed_value(row, relationship.key, None)
+
+    return row
+
+
+def _insert_returning_ids(db: Session, model: type[models.Base], rows: list[dict], commit: bool = True) -> list[int]:
+    # Multi-row INSERT ... RETURNING batches (executemany where RETURNING is unsupported) in a single transaction
+    if not rows:
+        return []
+
+    ids = list(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows))
+
+    if commit:
+        db.commit()
+
+    return ids
+
+
+def _chunks(values: list, chunk_size: int = 500) -> Iterable[list]:
+    return (values[start:start + chunk_size] for start in range(0, len(values), chunk_size))
+
+
+def _existing_values(db: Session, column, values: Iterable[Any], chunk_size: int = 500) -> set:
+    # Chunked IN lookups keep every statement below the bound parameter limit of the database
+    values = list(set(values))
+    found = set()
+
+    for start in range(0, len(values), chunk_size):
+        found.update(db.scalars(select(column).where(column.in_(values[start:start + chunk_size]))))
+
+    return found
+
+
+def _existing_pairs(db: Session, first, second, pairs: Iterable[tuple[Any, Any]], chunk_size: int = 250) -> set:
+    pairs = list(set(pairs))
+    found = set()
+
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start:start + chunk_size]
+        # SQLite does not search an index for a row-value IN list, the IN on the first column lets it use its index
+        found.update(db.execute(
+            select(first, second).where(first.in_({pair[0] for pair in chunk}), tuple_(first, second).in_(chunk))
+        ).tuples())
+
+    return found
 
 
 # CRUD functions for USER table
 # ================================================= #
 # ================================================= #
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[Type[models.User]]:
-    return db.query(models.User).options(
-        joinedload(models.User.comments),
-        joinedload(models.User.reviews)
-    ).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Cursor | None = None,
+              profile: Profile = None) -> list[Type[models.User]]:
+    query = db.query(models.User).options(*load_options(profile))
+    return paginate(query, models.User.id, skip, limit, cursor).all()
+
+
+def get_user_by_id(db: Session, user_id: int, profile: Profile = None) -> models.User | None:
+    return db.query(models.User).options(*load_options(profile)).filter(models.User.id == user_id).first()
 
 
-def get_user_by_id(db: Session, user_id: int) -> models.User | None:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+def get_user_sessions_revoked_at(db: Session, user_id: int) -> int | None:
+    # -1 when the user's sessions were never revoked, None when there is no such user
+    row = db.execute(select(models.User.sessions_revoked_at).where(models.User.id == user_id)).first()
+
+    if row is None:
+        return None
+
+    return -1 if row.sessions_revoked_at is None else row.sessions_revoked_at
 
 
 def get_user_by_login(db: Session, user_login: str) -> models.User | None:
     return db.query(models.User).filter(models.User.login == user_login).first()
 
 
-def get_user_by_email(db: Session, user_login: str) -> models.User | None:
-    return db.query(models.User).filter(models.User.login == user_login).first()
+def get_user_by_email(db: Session, user_email: str) -> models.User | None:
+    return db.query(models.User).filter(models.User.email == user_email).first()
 
 
 def create_user(db: Session, user_schema: schemas.UserCreate) -> models.User:
-    user_model = models.User(**user_schema.dict(),
+    user_model = models.User(**user_schema.dict(exclude={"password"}),
+                             password=password_hasher.hash(user_schema.password),
                              created_at=datetime.now(),
                              comments=[],
                              reviews=[])
 
     db.add(user_model)
-    db.commit()
-    db.refresh(user_model)
+    _commit_keeping_state(db)
     return user_model
 
 
-def update_user_base(db: Session, user_id: int, user_schema_updated: schemas.UserUpdate) -> models.User:
-    query = db.query(models.User)
-    user_model = query.filter(models.User.id == user_id).one()
+def update_user_base(db: Session, user_id: int, user_schema_updated: schemas.UserUpdate,
+                     profile: Profile = None) -> models.User | None:
     update_data = user_schema_updated.dict(exclude_unset=True)
 
-    query.filter(models.User.id == user_id).update(update_data, synchronize_session=False)
+    if update_data.get("password") is not None:
+        update_data["password"] = password_hasher.hash(update_data["password"])
+        update_data["sessions_revoked_at"] = session_time()
 
-    db.commit()
-    db.refresh(user_model)
+    return _update_returning(db, models.User, user_id, update_data, profile)
 
-    return user_model
+
+def verify_user_password(db: Session, user: models.User, password: str) -> bool:
+    # A password that is still stored in plaintext (or hashed with outdated parameters) is rehashed once it has been
+    # verified. The rehash is skipped while the hasher is busy, the next login does it.
+    if not password_hasher.verify(password, user.password):
+        return False
+
+    if needs_rehash(user.password):
+        try:
+            user.password = password_hasher.hash(password)
+        except PasswordHasherBusy:
+            return True
+
+        _commit_keeping_state(db)
+
+    return True
 
 
 def delete_user(db: Session, user_id: int) -> models.User | None:
-    query = db.query(models.User).filter(models.User.id == user_id)
-    check_user = query.first()
-    db.expire_on_commit = False
+    # The user's reviews go away through ON DELETE CASCADE, so take them out of the rating aggregates first
+    review = models.Review
+    user_ratings = db.execute(
+        select(review.artwork_id, func.count(), func.sum(review.score), func.sum(review.score * review.score))
+        .where(review.author_id == user_id)
+        .group_by(review.artwork_id)
+    ).tuples()
+    _apply_rating_deltas(db, {artwork_id: (-count, -score_sum, -score_sum_squares)
+                              for artwork_id, count, score_sum, score_sum_squares in user_ratings})
 
-    db.delete(check_user)
-    db.commit()
+    for artwork_id, count in db.execute(select(models.Comment.artwork_id, func.count())
+                                        .where(models.Comment.author_id == user_id)
+                                        .group_by(models.Comment.artwork_id)):
+        record_change(db, "counts", artwork_id, 0, 0.0, -count)
 
-    db.expire_on_commit = True
+    user = _delete_returning(db, models.User, user_id, commit=False)
+    _commit_keeping_state(db)
 
-    return check_user
+    return user
+
+
+def get_existing_user_ids(db: Session, user_ids: Iterable[int]) -> set[int]:
+    return _existing_values(db, models.User.id, user_ids)
 
 
 # CRUD functions for COMMENT table
 # ================================================= #
 # ================================================= #
-def get_all_comments(db: Session, skip: int = 0, limit: int = 100) -> list[Type[models.Comment]]:
-    return db.query(models.Comment).offset(skip).limit(limit).all()
+def get_all_comments(db: Session, skip: int = 0, limit: int = 100,
+                     cursor: Cursor | None = None) -> list[Type[models.Comment]]:
+    return paginate(db.query(models.Comment), models.Comment.id, skip, limit, cursor).all()
 
 
-def get_comments_from_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[Type[models.Comment]]:
-    return db.query(models.Comment).filter(models.Comment.author_id == user_id).offset(skip).limit(limit).all()
+def get_comments_from_user(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                           cursor: Cursor | None = None) -> list[Type[models.Comment]]:
+    query = db.query(models.Comment).filter(models.Comment.author_id == user_id)
+    return paginate(query, models.Comment.id, skip, limit, cursor).all()
 
 
-def get_comments_from_artwork(db: Session, artwork_id: int, skip: int = 0, limit: int = 100) -> list[Type[
-    models.Comment]]:
-    return db.query(models.Comment).filter(models.Comment.artwork_id == artwork_id).offset(skip).limit(limit).all()
+def get_comments_from_artwork(db: Session, artwork_id: int, skip: int = 0, limit: int = 100,
+                              cursor: Cursor | None = None) -> list[Type[models.Comment]]:
+    query = db.query(models.Comment).filter(models.Comment.artwork_id == artwork_id)
+    return paginate(query, models.Comment.id, skip, limit, cursor).all()
 
 
 def get_comment_by_id(db: Session, comment_id: int) -> models.Comment | None:
@@ -86,60 +221,80 @@ def get_comment_by_id(db: Session, comment_id: int) -> models.Comment | None:
 
 
 def create_comment(db: Session, comment_schema: schemas.CommentCreate, user_id: int, artwork_id: int) -> models.Comment:
-    artwork_model = get_artwork_by_id(db, artwork_id)
-    author_model = get_user_by_id(db, user_id)
-
     comment_model = models.Comment(**comment_schema.dict(),
                                    author_id=user_id,
-                                   author=author_model,
-                                   artwork_id=artwork_id,
-                                   artwork=artwork_model)
+                                   artwork_id=artwork_id)
 
     db.add(comment_model)
-    db.commit()
-    db.refresh(comment_model)
+    record_change(db, "counts", artwork_id, 0, 0.0, 1)
+    _commit_keeping_state(db)
     return comment_model
 
 
-def update_comment_base(db: Session, comment_id: int, comment_schema_updated: schemas.CommentUpdate) -> models.Comment:
-    query = db.query(models.Comment)
-    comment_model = query.filter(models.Comment.id == comment_id).one()
+def update_comment_base(db: Session, comment_id: int,
+                        comment_schema_updated: schemas.CommentUpdate) -> models.Comment | None:
     update_data = comment_schema_updated.dict(exclude_unset=True)
+    return _update_returning(db, models.Comment, comment_id, update_data)
 
-    query.filter(models.Comment.id == comment_id).update(update_data, synchronize_session=False)
 
-    db.commit()
-    db.refresh(comment_model)
+def delete_comment(db: Session, comment_id: int) -> models.Comment | None:
+    comment = _delete_returning(db, models.Comment, comment_id, commit=False)
 
-    return comment_model
+    if comment is not None:
+        record_change(db, "counts", comment.artwork_id, 0, 0.0, -1)
+        _commit_keeping_state(db)
 
+    return comment
+
+
+def add_comment_votes(db: Session, comment_id: int, likes: int = 0, dislikes: int = 0) -> models.Comment | None:
+    # likes = likes + n is evaluated by the database, so concurrent votes can not overwrite each other
+    update_data = {"likes": models.Comment.likes + likes, "dislikes": models.Comment.dislikes + dislikes}
+    return _update_returning(db, models.Comment, comment_id, update_data)
 
-def delete_comment(db: Session, comment_id: int) -> models.Comment | None:
-    query = db.query(models.Comment).filter(models.Comment.id == comment_id)
-    check_comment = query.first()
-    db.expire_on_commit = False
 
-    db.delete(check_comment)
+def add_comment_votes_batch(db: Session, votes: dict[int, tuple[int, int]]) -> None:
+    # comment_id: (likes, dislikes) increments, applied with one executemany UPDATE and one commit
+    if not votes:
+        return
+
+    comment = models.Comment.__table__
+    db.execute(
+        update(comment).where(comment.c.id == bindparam("vote_comment_id")).values(
+            likes=comment.c.likes + bindparam("vote_likes"),
+            dislikes=comment.c.dislikes + bindparam("vote_dislikes"),
+        ),
+        [{"vote_comment_id": comment_id, "vote_likes": likes, "vote_dislikes": dislikes}
+         for comment_id, (likes, dislikes) in votes.items()]
+    )
     db.commit()
 
-    db.expire_on_commit = True
 
-    return check_comment
+def create_comments(db: Session, comment_schemas: list[schemas.CommentBulkCreate]) -> list[int]:
+    for artwork_id, count in Counter(comment_schema.artwork_id for comment_schema in comment_schemas).items():
+        record_change(db, "counts", artwork_id, 0, 0.0, count)
+
+    return _insert_returning_ids(db, models.Comment, [comment_schema.dict() for comment_schema in comment_schemas])
 
 
 # CRUD functions for REVIEW table
 # ================================================= #
 # ================================================= #
-def get_all_reviews(db: Session, skip: int = 0, limit: int = 100) -> list[Type[models.Review]]:
-    return db.query(models.Review).offset(skip).limit(limit).all()
+def get_all_reviews(db: Session, skip: int = 0, limit: int = 100,
+                    cursor: Cursor | None = None) -> list[Type[models.Review]]:
+    return paginate(db.query(models.Review), models.Review.id, skip, limit, cursor).all()
 
 
-def get_reviews_from_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[Type[models.Review]]:
-    return db.query(models.Review).filter(models.Review.author_id == user_id).offset(skip).limit(limit).all()
+def get_reviews_from_user(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                          cursor: Cursor | None = None) -> list[Type[models.Review]]:
+    query = db.query(models.Review).filter(models.Review.author_id == user_id)
+    return paginate(query, models.Review.id, skip, limit, cursor).all()
 
 
-def get_reviews_from_artwork(db: Session, artwork_id: int, skip: int = 0, limit: int = 100) -> list[Type[models.Review]]:
-    return db.query(models.Review).filter(models.Review.artwork_id == artwork_id).offset(skip).limit(limit).all()
+def get_reviews_from_artwork(db: Session, artwork_id: int, skip: int = 0, limit: int = 100,
+                             cursor: Cursor | None = None) -> list[Type[models.Review]]:
+    query = db.query(models.Review).filter(models.Review.artwork_id == artwork_id)
+    return paginate(query, models.Review.id, skip, limit, cursor).all()
 
 
 def get_review_by_id(db: Session, review_id: int) -> models.Review | None:
@@ -147,61 +302,203 @@ def get_review_by_id(db: Session, review_id: int) -> models.Review | None:
 
 
 def create_review(db: Session, review_schema: schemas.ReviewCreate, user_id: int, artwork_id: int) -> models.Review:
-    artwork_model = get_artwork_by_id(db, artwork_id)
-    author_model = get_user_by_id(db, user_id)
-
     review_model = models.Review(**review_schema.dict(),
                                  author_id=user_id,
-                                 author=author_model,
-                                 artwork_id=artwork_id,
-                                 artwork=artwork_model)
+                                 artwork_id=artwork_id)
 
     db.add(review_model)
-    db.commit()
-    db.refresh(review_model)
+    _apply_rating_deltas(db, _rating_deltas([(artwork_id, review_model.score)]))
+    _commit_keeping_state(db)
     return review_model
 
 
-def update_review_base(db: Session, review_id: int, review_schema_updated: schemas.ReviewUpdate) -> models.Review:
-    query = db.query(models.Review)
-    review_model = query.filter(models.Review.id == review_id).one()
+def update_review_base(db: Session, review_id: int,
+                       review_schema_updated: schemas.ReviewUpdate) -> models.Review | None:
     update_data = review_schema_updated.dict(exclude_unset=True)
 
-    query.filter(models.Comment.id == review_id).update(update_data, synchronize_session=False)
+    if "score" not in update_data:
+        return _update_returning(db, models.Review, review_id, update_data)
 
-    db.commit()
-    db.refresh(review_model)
+    old_score = db.scalar(select(models.Review.score).where(models.Review.id == review_id))
+    review = _update_returning(db, models.Review, review_id, update_data, commit=False)
 
-    return review_model
+    if review is not None:
+        _apply_rating_deltas(db, {review.artwork_id: (0, review.score - old_score,
+                                                      review.score * review.score - old_score * old_score)})
+        _commit_keeping_state(db)
+
+    return review
 
 
 def delete_review(db: Session, review_id: int) -> models.Review | None:
-    query = db.query(models.Comment).filter(models.Review.id == review_id)
-    check_review = query.first()
-    db.expire_on_commit = False
+    review = _delete_returning(db, models.Review, review_id, commit=False)
+
+    if review is not None:
+        _apply_rating_deltas(db, _rating_deltas([(review.artwork_id, review.score)], sign=-1))
+        _commit_keeping_state(db)
+
+    return review
 
-    db.delete(check_review)
+
+def create_reviews(db: Session, review_schemas: list[schemas.ReviewBulkCreate]) -> list[int]:
+    ids = _insert_returning_ids(db, models.Review, [review_schema.dict() for review_schema in review_schemas],
+                                commit=False)
+    _apply_rating_deltas(db, _rating_deltas((review_schema.artwork_id, review_schema.score)
+                                            for review_schema in review_schemas))
     db.commit()
 
-    db.expire_on_commit = True
+    return ids
+
+
+def get_existing_review_pairs(db: Session, pairs: Iterable[tuple[int, int]]) -> set[tuple[int, int]]:
+    # (author_id, artwork_id) pairs that already have a review
+    return _existing_pairs(db, models.Review.author_id, models.Review.artwork_id, pairs)
+
+
+# CRUD functions for ARTWORK_RATING table
+# ================================================= #
+# ================================================= #
+def _rating_deltas(scores: Iterable[tuple[int, float]], sign: int = 1) -> dict[int, tuple[int, float, float]]:
+    # (artwork_id, score) pairs -> artwork_id: (review count, score sum, sum of squared scores)
+    deltas = {}
+
+    for artwork_id, score in scores:
+        count, score_sum, score_sum_squares = deltas.get(artwork_id, (0, 0.0, 0.0))
+        deltas[artwork_id] = (count + sign, score_sum + sign * score, score_sum_squares + sign * score * score)
+
+    return deltas
+
+
+def _apply_rating_deltas(db: Session, deltas: dict[int, tuple[int, float, float]]) -> None:
+    # Runs inside the caller's transaction: creates the missing aggregate rows, then one executemany UPDATE
+    if not deltas:
+        return
+
+    rating = models.ArtworkRating.__table__
+    missing_ids = deltas.keys() - _existing_values(db, rating.c.artwork_id, deltas)
+
+    for artwork_id, (count, score_sum, _) in deltas.items():
+        record_change(db, "counts", artwork_id, count, score_sum, 0)
+
+    if missing_ids:
+        db.execute(insert(rating), [{"artwork_id": artwork_id, "review_count": 0, "score_sum": 0.0,
+                                     "score_sum_squares": 0.0} for artwork_id in missing_ids])
 
-    return check_review
+    db.execute(
+        update(rating).where(rating.c.artwork_id == bindparam("delta_artwork_id")).values(
+            review_count=rating.c.review_count + bindparam("delta_count"),
+            score_sum=rating.c.score_sum + bindparam("delta_sum"),
+            score_sum_squares=rating.c.score_sum_squares + bindparam("delta_sum_squares"),
+        ),
+        [{"delta_artwork_id": artwork_id, "delta_count": count, "delta_sum": score_sum,
+          "delta_sum_squares": score_sum_squares}
+         for artwork_id, (count, score_sum, score_sum_squares) in deltas.items()]
+    )
+
+
+def rebuild_artwork_ratings(db: Session) -> int:
+    # Recomputes every aggregate from the review table in one transaction, returns the number of rated artworks
+    rating = models.ArtworkRating.__table__
+    review = models.Review
+
+    db.execute(delete(rating))
+    db.execute(insert(rating).from_select(
+        ["artwork_id", "review_count", "score_sum", "score_sum_squares"],
+        select(review.artwork_id, func.count(), func.sum(review.score), func.sum(review.score * review.score))
+        .group_by(review.artwork_id)
+    ))
+    db.commit()
+
+    return db.scalar(select(func.count()).select_from(rating))
+
+
+# CRUD functions for ARTWORK_SIMILARITY table
+# ================================================= #
+# ================================================= #
+def get_similar_artworks(db: Session, artwork_id: int, limit: int = similarity.SIMILAR_ARTWORKS_TOP_K,
+                         profile: Profile = None) -> list[Type[models.ArtworkSimilarity]]:
+    return db.query(models.ArtworkSimilarity).options(*load_options(profile)) \
+        .filter(models.ArtworkSimilarity.artwork_id == artwork_id) \
+        .order_by(models.ArtworkSimilarity.score.desc(), models.ArtworkSimilarity.similar_artwork_id) \
+        .limit(limit).all()
+
+
+def refresh_artwork_similarities(db: Session, full: bool = False,
+                                 top_k: int = similarity.SIMILAR_ARTWORKS_TOP_K) -> int:
+    # Recomputes the top-K lists of the queued artworks and of every artwork whose score with one of them can have
+    # changed (all artworks when full), returns the number of artworks refreshed. The queue is emptied up front, so
+    # changes made while this runs are queued again for the next run.
+    queue = models.artwork_similarity_queue
+    similarities = models.ArtworkSimilarity
+    changed_ids = list(db.scalars(select(queue.c.artwork_id)))
+
+    for chunk in _chunks(changed_ids):
+        db.execute(delete(queue).where(queue.c.artwork_id.in_(chunk)))
+
+    db.commit()
+
+    if not full and not changed_ids:
+        return 0
+
+    try:
+        signals = similarity.load_signals(db)
+
+        if full:
+            artwork_ids = signals.artwork_ids
+        else:
+            artwork_ids = similarity.affected_artworks(signals, changed_ids)
+
+            # Artworks that list a changed one, their score with it may have dropped to nothing
+            for chunk in _chunks(changed_ids):
+                artwork_ids.update(db.scalars(select(similarities.artwork_id)
+                                              .where(similarities.similar_artwork_id.in_(chunk))))
+
+            artwork_ids &= signals.artwork_ids
+
+        rows = [{"artwork_id": artwork_id, "similar_artwork_id": similar_artwork_id, "score": score}
+                for artwork_id in artwork_ids
+                for similar_artwork_id, score in similarity.similar_artworks(signals, artwork_id, top_k)]
+
+        if full:
+            db.execute(delete(similarities))
+        else:
+            for chunk in _chunks(list(artwork_ids)):
+                db.execute(delete(similarities).where(similarities.artwork_id.in_(chunk)))
+
+        if rows:
+            db.execute(insert(similarities.__table__), rows)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+
+        if changed_ids:
+            db.execute(insert(queue).prefix_with("OR IGNORE", dialect="sqlite"),
+                       [{"artwork_id": artwork_id} for artwork_id in changed_ids])
+            db.commit()
+
+        raise
+
+    return len(artwork_ids)
 
 
 # CRUD functions for ARTWORK table
 # ================================================= #
 # ================================================= #
-def get_all_artworks(db: Session, skip: int = 0, limit: int = 100) -> list[Type[models.Artwork]]:
-    return db.query(models.Artwork).offset(skip).limit(limit).all()
+def get_all_artworks(db: Session, skip: int = 0, limit: int = 100, cursor: Cursor | None = None,
+                     profile: Profile = None) -> list[Type[models.Artwork]]:
+    query = db.query(models.Artwork).options(*load_options(profile))
+    return paginate(query, models.Artwork.id, skip, limit, cursor).all()
 
 
-def get_artworks_from_category(db: Session, category_id: int, skip: int = 0, limit: int = 100) -> list[Type[
-    models.Artwork]]:
-    return db.query(models.Artwork).filter(models.Artwork.category_id == category_id).offset(skip).limit(limit).all()
+def get_artworks_from_category(db: Session, category_id: int, skip: int = 0, limit: int = 100,
+                               cursor: Cursor | None = None, profile: Profile = None) -> list[Type[models.Artwork]]:
+    query = db.query(models.Artwork).options(*load_options(profile)).filter(models.Artwork.category_id == category_id)
+    return paginate(query, models.Artwork.id, skip, limit, cursor).all()
 
 
-def get_artwork_by_id(db: Session, artwork_id: int) -> models.Artwork | None:
-    return db.query(models.Artwork).filter(models.Artwork.id == artwork_id).first()
+def get_artwork_by_id(db: Session, artwork_id: int, profile: Profile = None) -> models.Artwork | None:
+    return db.query(models.Artwork).options(*load_options(profile)).filter(models.Artwork.id == artwork_id).first()
 
 
 def create_artwork(db: Session, category_id: int, artwork_schema: schemas.ArtworkCreate) -> models.Artwork:
@@ -215,26 +512,32 @@ def create_artwork(db: Session, category_id: int, artwork_schema: schemas.Artwor
         category_id=category_id,
         comments=[],
         reviews=[],
-        tags=[]
+        tags=[],
+        rating=None
     )
 
     db.add(artwork_model)
-    db.commit()
-    db.refresh(artwork_model)
+    db.flush()
+    record_change(db, "artwork", artwork_model.id, category_id, artwork_model.star_rating)
+    _commit_keeping_state(db)
+    facet_index.add_artworks([(artwork_model.id, category_id)])
 
     return artwork_model
 
-def update_artwork_base(db: Session, artwork_id: int, artwork_schema_updated: schemas.ArtworkUpdate) -> models.Artwork:
-    query = db.query(models.Artwork)
-    artwork_model = query.filter(models.Artwork.id == artwork_id).one()
+def update_artwork_base(db: Session, artwork_id: int, artwork_schema_updated: schemas.ArtworkUpdate,
+                        profile: Profile = None) -> models.Artwork | None:
     update_data = artwork_schema_updated.dict(exclude_unset=True)
 
-    query.filter(models.Artwork.id == artwork_id).update(update_data, synchronize_session=False)
+    if "star_rating" not in update_data:
+        return _update_returning(db, models.Artwork, artwork_id, update_data, profile)
 
-    db.commit()
-    db.refresh(artwork_model)
+    artwork = _update_returning(db, models.Artwork, artwork_id, update_data, profile, commit=False)
 
-    return artwork_model
+    if artwork is not None:
+        record_change(db, "artwork", artwork.id, artwork.category_id, artwork.star_rating)
+        _commit_keeping_state(db)
+
+    return artwork
 
 
 def artwork_add_tag(db: Session, artwork_id: int, tag_id: int) -> models.Artwork:
@@ -242,8 +545,8 @@ def artwork_add_tag(db: Session, artwork_id: int, tag_id: int) -> models.Artwork
     tag_model = db.query(models.Tag).filter(models.Tag.id == tag_id).one()
     artwork_model.tags.append(tag_model)
 
-    db.commit()
-    db.refresh(artwork_model)
+    _commit_keeping_state(db)
+    facet_index.add_tags([(artwork_id, tag_id)])
 
     return artwork_model
 
@@ -253,43 +556,141 @@ def artwork_remove_tag(db: Session, artwork_id: int, tag_id: int) -> models.Artw
     tag_model = db.query(models.Tag).filter(models.Tag.id == tag_id).one()
     artwork_model.tags.remove(tag_model)
 
-    db.commit()
-    db.refresh(artwork_model)
+    _commit_keeping_state(db)
+    facet_index.remove_tags([(artwork_id, tag_id)])
 
     return artwork_model
 
 
+def _artwork_tag_statuses(db: Session, pairs: list[tuple[int, int]]) -> tuple[dict, set]:
+    # Pairs with a missing artwork or tag get their final status here, the valid ones are returned separately
+    artwork_ids = _existing_values(db, models.Artwork.id, (artwork_id for artwork_id, _ in pairs))
+    tag_ids = _existing_values(db, models.Tag.id, (tag_id for _, tag_id in pairs))
+    statuses = {}
+    valid_pairs = set()
+
+    for artwork_id, tag_id in pairs:
+        if artwork_id not in artwork_ids:
+            statuses[artwork_id, tag_id] = schemas.ArtworkTagStatus.artwork_not_found
+        elif tag_id not in tag_ids:
+            statuses[artwork_id, tag_id] = schemas.ArtworkTagStatus.tag_not_found
+        else:
+            valid_pairs.add((artwork_id, tag_id))
+
+    return statuses, valid_pairs
+
+
+def artwork_add_tags(db: Session, pairs: list[tuple[int, int]]) -> list[schemas.ArtworkTagResult]:
+    statuses, valid_pairs = _artwork_tag_statuses(db, pairs)
+    association = models.artwork_tag_association
+    attached_pairs = _existing_pairs(db, association.c.artwork_id, association.c.tag_id, valid_pairs)
+    new_pairs = valid_pairs - attached_pairs
+
+    if new_pairs:
+        db.execute(insert(association).prefix_with("OR IGNORE", dialect="sqlite"),
+                   [{"artwork_id": artwork_id, "tag_id": tag_id} for artwork_id, tag_id in new_pairs])
+        db.commit()
+        facet_index.add_tags(new_pairs)
+
+    statuses.update(dict.fromkeys(attached_pairs, schemas.ArtworkTagStatus.already_attached))
+    statuses.update(dict.fromkeys(new_pairs, schemas.ArtworkTagStatus.attached))
+
+    return [schemas.ArtworkTagResult(artwork_id=artwork_id, tag_id=tag_id, status=statuses[artwork_id, tag_id])
+            for artwork_id, tag_id in pairs]
+
+
+def artwork_remove_tags(db: Session, pairs: list[tuple[int, int]],
+                        chunk_size: int = 250) -> list[schemas.ArtworkTagResult]:
+    statuses, valid_pairs = _artwork_tag_statuses(db, pairs)
+    association = models.artwork_tag_association
+    attached_pairs = list(_existing_pairs(db, association.c.artwork_id, association.c.tag_id, valid_pairs))
+
+    for start in range(0, len(attached_pairs), chunk_size):
+        db.execute(delete(association).where(
+            tuple_(association.c.artwork_id, association.c.tag_id).in_(attached_pairs[start:start + chunk_size])
+        ))
+
+    if attached_pairs:
+        db.commit()
+        facet_index.remove_tags(attached_pairs)
+
+    statuses.update(dict.fromkeys(valid_pairs, schemas.ArtworkTagStatus.not_attached))
+    statuses.update(dict.fromkeys(attached_pairs, schemas.ArtworkTagStatus.detached))
+
+    return [schemas.ArtworkTagResult(artwork_id=artwork_id, tag_id=tag_id, status=statuses[artwork_id, tag_id])
+            for artwork_id, tag_id in pairs]
+
+
 def delete_artwork(db: Session, artwork_id: int) -> models.Artwork | None:
-    query = db.query(models.Artwork).filter(models.Artwork.id == artwork_id)
-    check_artwork = query.first()
-    db.expire_on_commit = False
+    artwork = _delete_returning(db, models.Artwork, artwork_id, commit=False)
+
+    if artwork is not None:
+        record_change(db, "artwork_removed", artwork_id)
+        _commit_keeping_state(db)
+        facet_index.remove_artworks([artwork_id])
+
+    return artwork
+
+
+def create_artworks(db: Session, artwork_schemas: list[schemas.ArtworkBulkCreate]) -> list[int]:
+    ids = _insert_returning_ids(db, models.Artwork, [artwork_schema.dict() for artwork_schema in artwork_schemas],
+                                commit=False)
+
+    for artwork_id, artwork_schema in zip(ids, artwork_schemas):
+        record_change(db, "artwork", artwork_id, artwork_schema.category_id, artwork_schema.star_rating)
 
-    db.delete(check_artwork)
     db.commit()
+    facet_index.add_artworks(zip(ids, (artwork_schema.category_id for artwork_schema in artwork_schemas)))
+
+    return ids
 
-    db.expire_on_commit = True
 
-    return check_artwork
+def get_top_artworks(db: Session, metric: schemas.LeaderboardMetric, category_id: int | None = None,
+                     limit: int = 10) -> list[RankedArtwork]:
+    # Ranked from the in-memory boards, the database is only asked for the artworks themselves
+    best = leaderboards.top(db, metric, category_id, limit)
+    artworks = {artwork.id: artwork for artwork in
+                db.query(models.Artwork).filter(models.Artwork.id.in_([artwork_id for artwork_id, _ in best]))}
+
+    return [RankedArtwork(artwork_id, score, artworks[artwork_id])
+            for artwork_id, score in best if artwork_id in artworks]
+
+
+def get_artwork_facets(db: Session, tag_ids: Iterable[int] = (), exclude_tag_ids: Iterable[int] = (),
+                       category_ids: Iterable[int] = (), limit: int = 100,
+                       cursor: Cursor | None = None) -> schemas.ArtworkFacets:
+    return facet_index.query(db, tag_ids, exclude_tag_ids, category_ids,
+                             after=-1 if cursor is None else cursor[1], limit=limit)
+
+
+def get_existing_artwork_ids(db: Session, artwork_ids: Iterable[int]) -> set[int]:
+    return _existing_values(db, models.Artwork.id, artwork_ids)
 
 
 # CRUD functions for TAG table
 # ================================================= #
 # ================================================= #
-def get_tags(db: Session, skip: int = 0, limit: int = 100) -> list[Type[models.Tag]]:
-    return db.query(models.Tag).options(joinedload(models.Tag.artworks)).offset(skip).limit(limit).all()
+def get_tags(db: Session, skip: int = 0, limit: int = 100, cursor: Cursor | None = None,
+             profile: Profile = None) -> list[Type[models.Tag]]:
+    query = db.query(models.Tag).options(*load_options(profile))
+    return paginate(query, models.Tag.id, skip, limit, cursor).all()
 
 
-def get_tags_from_artwork(db: Session, artwork_id: int, skip: int = 0, limit: int = 100) -> list[Type[models.Tag]]:
-    artwork_model = get_artwork_by_id(db, artwork_id)
-    return db.query(models.Tag).filter(models.Tag.artworks.contains(artwork_model)).offset(skip).limit(limit).all()
+def get_tags_from_artwork(db: Session, artwork_id: int, skip: int = 0, limit: int = 100,
+                          cursor: Cursor | None = None, profile: Profile = None) -> list[Type[models.Tag]]:
+    query = db.query(models.Tag).options(*load_options(profile)) \
+        .join(models.artwork_tag_association, models.artwork_tag_association.c.tag_id == models.Tag.id) \
+        .filter(models.artwork_tag_association.c.artwork_id == artwork_id)
+    # Ordered by the association's tag_id (equal to Tag.id), so the rows come sorted from its primary key
+    return paginate(query, models.artwork_tag_association.c.tag_id, skip, limit, cursor).all()
 
 
-def get_tag_by_id(db: Session, tag_id: int) -> models.Tag | None:
-    return db.query(models.Tag).options(joinedload(models.Tag.artworks)).filter(models.Tag.id == tag_id).first()
+def get_tag_by_id(db: Session, tag_id: int, profile: Profile = None) -> models.Tag | None:
+    return db.query(models.Tag).options(*load_options(profile)).filter(models.Tag.id == tag_id).first()
 
 
-def get_tag_by_name(db: Session, tag_name: str) -> models.Tag | None:
-    return db.query(models.Tag).options(joinedload(models.Tag.artworks)).filter(models.Tag.name == tag_name).first()
+def get_tag_by_name(db: Session, tag_name: str, profile: Profile = None) -> models.Tag | None:
+    return db.query(models.Tag).options(*load_options(profile)).filter(models.Tag.name == tag_name).first()
 
 
 def create_tag(db: Session, tag_schema: schemas.TagCreate) -> models.Tag:
@@ -300,53 +701,51 @@ def create_tag(db: Session, tag_schema: schemas.TagCreate) -> models.Tag:
     )
 
     db.add(tag_model)
-    db.commit()
-    db.refresh(tag_model)
+    _commit_keeping_state(db)
 
     return tag_model
 
 
-def update_tag_base(db: Session, tag_id: int, tag_schema_updated: schemas.TagUpdate) -> models.Tag:
-    query = db.query(models.Tag)
-    tag_model = query.filter(models.Tag.id == tag_id).one()
+def update_tag_base(db: Session, tag_id: int, tag_schema_updated: schemas.TagUpdate,
+                    profile: Profile = None) -> models.Tag | None:
     update_data = tag_schema_updated.dict(exclude_unset=True)
+    return _update_returning(db, models.Tag, tag_id, update_data, profile)
 
-    query.filter(models.Tag.id == tag_id).update(update_data, synchronize_session=False)
 
-    db.commit()
-    db.refresh(tag_model)
+def delete_tag(db: Session, tag_id: int) -> models.Tag | None:
+    tag = _delete_returning(db, models.Tag, tag_id)
 
-    return tag_model
+    if tag is not None:
+        facet_index.remove_tag(tag_id)
 
+    return tag
 
-def delete_tag(db: Session, tag_id: int) -> models.Tag | None:
-    query = db.query(models.Tag).filter(models.Tag.id == tag_id)
-    check_tag = query.first()
-    db.expire_on_commit = False
 
-    db.delete(check_tag)
-    db.commit()
+def create_tags(db: Session, tag_schemas: list[schemas.TagCreate]) -> list[int]:
+    return _insert_returning_ids(db, models.Tag, [tag_schema.dict() for tag_schema in tag_schemas])
 
-    db.expire_on_commit = True
 
-    return check_tag
+def get_existing_tag_names(db: Session, tag_names: Iterable[str]) -> set[str]:
+    return _existing_values(db, models.Tag.name, tag_names)
 
 
 # CRUD functions for CATEGORY table
 # ================================================= #
 # ================================================= #
-def get_categories(db: Session, skip: int = 0, limit: int = 100) -> list[Type[models.Category]]:
-    return db.query(models.Category).options(joinedload(models.Category.artworks)).offset(skip).limit(limit).all()
+def get_categories(db: Session, skip: int = 0, limit: int = 100, cursor: Cursor | None = None,
+                   profile: Profile = None) -> list[Type[models.Category]]:
+    query = db.query(models.Category).options(*load_options(profile))
+    return paginate(query, models.Category.id, skip, limit, cursor).all()
 
 
-def get_category_by_id(db: Session, category_id: int) -> models.Category | None:
+def get_category_by_id(db: Session, category_id: int, profile: Profile = None) -> models.Category | None:
     return db.query(models.Category) \
-        .options(joinedload(models.Category.artworks)).filter(models.Category.id == category_id).first()
+        .options(*load_options(profile)).filter(models.Category.id == category_id).first()
 
 
-def get_category_by_name(db: Session, category_name: str) -> models.Category | None:
+def get_category_by_name(db: Session, category_name: str, profile: Profile = None) -> models.Category | None:
     return db.query(models.Category) \
-        .options(joinedload(models.Category.artworks)).filter(models.Category.name == category_name).first()
+        .options(*load_options(profile)).filter(models.Category.name == category_name).first()
 
 
 def create_category(db: Session, category_schema: schemas.CategoryCreate) -> models.Category:
@@ -357,34 +756,105 @@ def create_category(db: Session, category_schema: schemas.CategoryCreate) -> mod
     )
 
     db.add(category_model)
-    db.commit()
-    db.refresh(category_model)
+    _commit_keeping_state(db)
 
     return category_model
 
 
-def update_category_base(db: Session, category_id: int,
-                         category_schema_updated: schemas.CategoryUpdate) -> models.Category | None:
-    query = db.query(models.Category)
-    category_model = query.filter(models.Category.id == category_id).first()
+def update_category_base(db: Session, category_id: int, category_schema_updated: schemas.CategoryUpdate,
+                         profile: Profile = None) -> models.Category | None:
     update_data = category_schema_updated.dict(exclude_unset=True)
+    return _update_returning(db, models.Category, category_id, update_data, profile)
 
-    query.filter(models.Category.id == category_id).update(update_data, synchronize_session=False)
 
-    db.commit()
-    db.refresh(category_model)
+def delete_category(db: Session, category_id: int) -> models.Category | None:
+    category = _delete_returning(db, models.Category, category_id, commit=False)
 
-    return category_model
+    if category is not None:
+        record_change(db, "category_removed", category_id)
+        _commit_keeping_state(db)
+        facet_index.remove_category(category_id)
 
+    return category
 
-def delete_category(db: Session, category_id: int) -> models.Category | None:
-    query = db.query(models.Category).filter(models.Category.id == category_id)
-    check_category = query.first()
-    db.expire_on_commit = False
 
-    db.delete(check_category)
-    db.commit()
+def create_categories(db: Session, category_schemas: list[schemas.CategoryCreate]) -> list[int]:
+    return _insert_returning_ids(db, models.Category,
+                                 [category_schema.dict() for category_schema in category_schemas])
 
-    db.expire_on_commit = True
 
-    return check_category
+def get_existing_category_ids(db: Session, category_ids: Iterable[int]) -> set[int]:
+    return _existing_values(db, models.Category.id, category_ids)
+
+
+def get_existing_category_names(db: Session, category_names: Iterable[str]) -> set[str]:
+    return _existing_values(db, models.Category.name, category_names)
+
+
+# SEARCH over the FTS5 indexes
+# ================================================= #
+# ================================================= #
+def _match_query(search_text: str) -> str | None:
+    # Every word becomes a quoted phrase, so FTS5 operators in user input are matched literally, and the last one a
+    # prefix, so results show up while the last word is still being typed
+    words = [word.replace('"', '""') for word in search_text.split()]
+
+    if not words:
+        return None
+
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def _highlight_html(highlight: str) -> str:
+    # The stored text is user input, it is escaped before the markers become tags
+    return html.escape(highlight).replace(models.HIGHLIGHT_START, models.HIGHLIGHT_OPEN) \
+        .replace(models.HIGHLIGHT_END, models.HIGHLIGHT_CLOSE)
+
+
+def search(db: Session, index: schemas.SearchIndex, search_text: str, skip: int = 0, limit: int = 100,
+           cursor: Cursor | None = None) -> list[schemas.SearchHit]:
+    match_query = _match_query(search_text)
+
+    if match_query is None or limit <= 0:
+        return []
+
+    search_index = models.SEARCH_INDEXES[index.value]
+    fts_table = search_index.fts_table
+    score = f"bm25({fts_table}, {', '.join(str(weight) for weight in search_index.weights)})"
+    # The first column (title/name) is short and highlighted whole, the others are cut to a snippet around the match
+    highlights = [f"highlight({fts_table}, 0, '{models.HIGHLIGHT_START}', '{models.HIGHLIGHT_END}')"] + [
+        f"snippet({fts_table}, {column}, '{models.HIGHLIGHT_START}', '{models.HIGHLIGHT_END}', '…', 24)"
+        for column in range(1, len(search_index.columns))
+    ]
+    parameters = {"match_query": match_query, "limit": limit, "skip": skip}
+
+    if cursor is None:
+        seek = ""
+    else:
+        seek = f"AND ({score} > :score OR ({score} = :score AND rowid > :row_id))"
+        parameters.update(score=cursor[0], row_id=cursor[1], skip=0)
+
+    rows = db.execute(text(
+        f"SELECT rowid, {score} AS score, {', '.join(highlights)} FROM {fts_table} "
+        f"WHERE {fts_table} MATCH :match_query {seek} ORDER BY score, rowid LIMIT :limit OFFSET :skip"
+    ), parameters)
+
+    return [
+        schemas.SearchHit(id=row_id, score=row_score, highlights={
+            column: _highlight_html(highlight) for column, highlight in zip(search_index.columns, row_highlights)
+            if highlight is not None and models.HIGHLIGHT_START in highlight
+        })
+        for row_id, row_score, *row_highlights in rows
+    ]
+
+
+def rebuild_search_indexes(db: Session) -> dict[str, int]:
+    # Re-reads every index from its content table and merges the b-trees, returns the number of rows per index
+    for search_index in models.SEARCH_INDEXES.values():
+        db.execute(text(models.fts_command(search_index, "rebuild")))
+        db.execute(text(models.fts_command(search_index, "optimize")))
+
+    db.commit()
+
+    return {name: db.scalar(select(func.count()).select_from(text(search_index.content_table)))
+            for name, search_index in models.SEARCH_INDEXES.items()}
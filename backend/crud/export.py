@@ -0,0 +1,110 @@
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import orjson
+from sqlalchemy import Table, exists, or_, select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_TABLES: dict[schemas.CatalogResource, Table] = {
+    schemas.CatalogResource.artworks: models.Artwork.__table__,
+    schemas.CatalogResource.categories: models.Category.__table__,
+    schemas.CatalogResource.tags: models.Tag.__table__,
+    schemas.CatalogResource.users: models.User.__table__,
+    schemas.CatalogResource.comments: models.Comment.__table__,
+    schemas.CatalogResource.reviews: models.Review.__table__,
+}
+
+EXCLUDED_COLUMNS = {
+    schemas.CatalogResource.users: {"password"},
+}
+
+
+def _children(db: Session, include: set[schemas.ExportInclude],
+              artwork_ids: list[int]) -> dict[schemas.ExportInclude, dict[int, list[dict]]]:
+    children = {}
+
+    if schemas.ExportInclude.tags in include:
+        association = models.artwork_tag_association
+        tags = children[schemas.ExportInclude.tags] = {}
+
+        for row in db.execute(select(association.c.artwork_id, models.Tag.__table__)
+                              .join(models.Tag.__table__, models.Tag.id == association.c.tag_id)
+                              .where(association.c.artwork_id.in_(artwork_ids))
+                              .order_by(association.c.artwork_id, models.Tag.id)).mappings():
+            row = dict(row)
+            tags.setdefault(row.pop("artwork_id"), []).append(row)
+
+    for included, table in ((schemas.ExportInclude.reviews, models.Review.__table__),
+                            (schemas.ExportInclude.comments, models.Comment.__table__)):
+        if included in include:
+            rows = children[included] = {}
+
+            for row in db.execute(select(table).where(table.c.artwork_id.in_(artwork_ids))
+                                  .order_by(table.c.artwork_id, table.c.id)).mappings():
+                rows.setdefault(row["artwork_id"], []).append(dict(row))
+
+    return children
+
+
+def export_batches(db: Session, resource: schemas.CatalogResource, include: Iterable[schemas.ExportInclude] = (),
+                   since: datetime | None = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list[dict]]:
+    # Plain rows in id order, read batch_size at a time through a server-side cursor (no ORM identity map), with the
+    # included children of a batch of artworks fetched by one query each. With `since`, only rows updated since then,
+    # and for artworks also those with an included review or comment updated since then.
+    table = EXPORT_TABLES[resource]
+    include = set(include)
+
+    if include and resource is not schemas.CatalogResource.artworks:
+        raise ValueError(f"Only artworks can include {', '.join(sorted(included.value for included in include))}")
+
+    excluded = EXCLUDED_COLUMNS.get(resource, set())
+    statement = select(*(column for column in table.c if column.name not in excluded)).order_by(table.c.id)
+
+    if since is not None:
+        changed = [table.c.updated_at >= since]
+
+        for included, child_table in ((schemas.ExportInclude.reviews, models.Review.__table__),
+                                      (schemas.ExportInclude.comments, models.Comment.__table__)):
+            if included in include:
+                changed.append(exists().where(child_table.c.artwork_id == table.c.id,
+                                              child_table.c.updated_at >= since))
+
+        statement = statement.where(or_(*changed))
+
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+
+    for partition in result.mappings().partitions():
+        rows = [dict(row) for row in partition]
+
+        if include:
+            children = _children(db, include, [row["id"] for row in rows])
+
+            for row in rows:
+                for included, by_artwork in children.items():
+                    row[included.value] = by_artwork.get(row["id"], [])
+
+        yield rows
+
+
+def export_ndjson(db: Session, resource: schemas.CatalogResource, include: Iterable[schemas.ExportInclude] = (),
+                  since: datetime | None = None, compress: bool = False,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    # One JSON object per line, a chunk per batch; gzip'd as a single stream when compress is set
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+
+    for rows in export_batches(db, resource, include, since, batch_size):
+        chunk = b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+
+        if chunk:
+            yield chunk
+
+    if compressor is not None:
+        yield compressor.flush()
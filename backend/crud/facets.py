@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.dependencies import settings
+
+# Bitmaps are split into chunks of 2^16 ids, so a tag only pays for the id ranges it has artworks in
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+class Bitmap:
+    # Set of non-negative ints as {id >> CHUNK_BITS: int whose set bits are the low bits of the ids}. Set operations
+    # and counts run chunk by chunk on Python ints, which does them at C speed.
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks: dict[int, int] | None = None):
+        self.chunks = {} if chunks is None else chunks
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> "Bitmap":
+        chunks: dict[int, int] = {}
+
+        for row_id in ids:
+            key = row_id >> CHUNK_BITS
+            chunks[key] = chunks.get(key, 0) | 1 << (row_id & CHUNK_MASK)
+
+        return cls(chunks)
+
+    def add(self, row_id: int) -> None:
+        key = row_id >> CHUNK_BITS
+        self.chunks[key] = self.chunks.get(key, 0) | 1 << (row_id & CHUNK_MASK)
+
+    def discard(self, row_id: int) -> None:
+        key = row_id >> CHUNK_BITS
+        chunk = self.chunks.get(key, 0) & ~(1 << (row_id & CHUNK_MASK))
+
+        if chunk:
+            self.chunks[key] = chunk
+        else:
+            self.chunks.pop(key, None)
+
+    def __len__(self) -> int:
+        return sum(chunk.bit_count() for chunk in self.chunks.values())
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        small, large = sorted((self.chunks, other.chunks), key=len)
+        return Bitmap({key: both for key, chunk in small.items() if (both := chunk & large.get(key, 0))})
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        chunks = dict(self.chunks)
+
+        for key, chunk in other.chunks.items():
+            chunks[key] = chunks.get(key, 0) | chunk
+
+        return Bitmap(chunks)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        return Bitmap({key: rest for key, chunk in self.chunks.items()
+                       if (rest := chunk & ~other.chunks.get(key, 0))})
+
+    def intersection_count(self, other: "Bitmap") -> int:
+        # Called once per tag for every facet query, hence the plain loop
+        small, large = (self.chunks, other.chunks) if len(self.chunks) <= len(other.chunks) \
+            else (other.chunks, self.chunks)
+        count = 0
+
+        for key, chunk in small.items():
+            other_chunk = large.get(key)
+
+            if other_chunk is not None:
+                count += (chunk & other_chunk).bit_count()
+
+        return count
+
+    def ids(self, after: int = -1) -> Iterator[int]:
+        # Ascending ids greater than `after`
+        first_key = max(after + 1, 0) >> CHUNK_BITS
+
+        for key in sorted(key for key in self.chunks if key >= first_key):
+            chunk = self.chunks[key]
+            base = key << CHUNK_BITS
+
+            if after >= base:
+                chunk &= ~((1 << (after - base + 1)) - 1)
+
+            while chunk:
+                lowest = chunk & -chunk
+                yield base + lowest.bit_length() - 1
+                chunk ^= lowest
+
+
+class FacetIndex:
+    # In-memory tag -> artworks and category -> artworks bitmaps. Loaded from the database on first use and every
+    # refresh_seconds after that (0 never reloads), the CRUD functions that change tags or artworks update it in
+    # between. A hook that runs before the first load is dropped, the load reads its committed result anyway.
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at: float | None = None
+        self._artworks = Bitmap()
+        self._tags: dict[int, Bitmap] = {}
+        self._categories: dict[int, Bitmap] = {}
+
+    def load(self, db: Session) -> None:
+        categories = defaultdict(list)
+        tags = defaultdict(list)
+        association = models.artwork_tag_association
+
+        for artwork_id, category_id in db.execute(select(models.Artwork.id, models.Artwork.category_id)):
+            categories[category_id].append(artwork_id)
+
+        for artwork_id, tag_id in db.execute(select(association.c.artwork_id, association.c.tag_id)):
+            tags[tag_id].append(artwork_id)
+
+        category_bitmaps = {category_id: Bitmap.from_ids(ids) for category_id, ids in categories.items()}
+        artworks = Bitmap()
+
+        for bitmap in category_bitmaps.values():
+            artworks = artworks | bitmap
+
+        with self._lock:
+            self._artworks = artworks
+            self._categories = category_bitmaps
+            self._tags = {tag_id: Bitmap.from_ids(ids) for tag_id, ids in tags.items()}
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+
+        if loaded_at is None or 0 < self.refresh_seconds < time.monotonic() - loaded_at:
+            self.load(db)
+
+    def add_artworks(self, artworks: Iterable[tuple[int, int]]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            for artwork_id, category_id in artworks:
+                self._artworks.add(artwork_id)
+                self._categories.setdefault(category_id, Bitmap()).add(artwork_id)
+
+    def remove_artworks(self, artwork_ids: Iterable[int]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            self._remove(Bitmap.from_ids(artwork_ids))
+
+    def add_tags(self, pairs: Iterable[tuple[int, int]]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            for artwork_id, tag_id in pairs:
+                self._tags.setdefault(tag_id, Bitmap()).add(artwork_id)
+
+    def remove_tags(self, pairs: Iterable[tuple[int, int]]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            for artwork_id, tag_id in pairs:
+                if tag_id in self._tags:
+                    self._tags[tag_id].discard(artwork_id)
+
+    def remove_tag(self, tag_id: int) -> None:
+        with self._lock:
+            self._tags.pop(tag_id, None)
+
+    def remove_category(self, category_id: int) -> None:
+        # The category's artworks went with it through ON DELETE CASCADE
+        with self._lock:
+            removed = self._categories.pop(category_id, None)
+
+            if removed is not None:
+                self._remove(removed)
+
+    def _remove(self, removed: Bitmap) -> None:
+        self._artworks = self._artworks - removed
+
+        for bitmaps in (self._categories, self._tags):
+            for key, bitmap in bitmaps.items():
+                if bitmap.intersection_count(removed):
+                    bitmaps[key] = bitmap - removed
+
+    def query(self, db: Session, tag_ids: Iterable[int] = (), exclude_tag_ids: Iterable[int] = (),
+              category_ids: Iterable[int] = (), after: int = -1, limit: int = 100) -> schemas.ArtworkFacets:
+        # Artworks with all of tag_ids, none of exclude_tag_ids and any of category_ids (all when empty), ascending
+        # by id after `after`, plus the number of them every other tag and every category would leave
+        self._ensure_loaded(db)
+        tag_ids, exclude_tag_ids, category_ids = set(tag_ids), set(exclude_tag_ids), set(category_ids)
+
+        with self._lock:
+            tagged = self._artworks
+
+            for tag_id in sorted(tag_ids, key=lambda tag: len(self._tags.get(tag, Bitmap()).chunks)):
+                tagged = tagged & self._tags.get(tag_id, Bitmap())
+
+            for tag_id in exclude_tag_ids:
+                tagged = tagged - self._tags.get(tag_id, Bitmap())
+
+            result = tagged
+
+            if category_ids:
+                in_categories = Bitmap()
+
+                for category_id in category_ids:
+                    in_categories = in_categories | self._categories.get(category_id, Bitmap())
+
+                result = tagged & in_categories
+
+            tag_counts = {tag_id: count for tag_id, bitmap in self._tags.items()
+                          if tag_id not in tag_ids and tag_id not in exclude_tag_ids
+                          and (count := result.intersection_count(bitmap))}
+            # Category counts leave out the category filter itself, so they show what picking another one would give
+            category_counts = {category_id: count for category_id, bitmap in self._categories.items()
+                               if (count := tagged.intersection_count(bitmap))}
+            artwork_ids = []
+
+            for artwork_id in result.ids(after):
+                if len(artwork_ids) == limit:
+                    break
+
+                artwork_ids.append(artwork_id)
+
+            return schemas.ArtworkFacets(total=len(result), artwork_ids=artwork_ids, tags=tag_counts,
+                                         categories=category_counts)
+
+
+facet_index = FacetIndex(settings.facet_refresh_seconds)
@@ -0,0 +1,498 @@
+import csv
+import gzip
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Column, Engine, Table, insert, select, text
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.dependencies import hash_password
+from backend.models import SEARCH_INDEXES, FullTextIndex, fts_command
+from .crud import _existing_pairs, _existing_values, rebuild_artwork_ratings
+
+IMPORT_CHUNK_SIZE = 5000
+# CSV files list the tags of an artwork in one cell, separated by this
+CSV_TAG_SEPARATOR = ";"
+# Marks a name shared by several rows, references to it cannot be resolved
+AMBIGUOUS = -1
+
+IMPORT_TABLES: dict[schemas.CatalogResource, Table] = {
+    schemas.CatalogResource.artworks: models.Artwork.__table__,
+    schemas.CatalogResource.categories: models.Category.__table__,
+    schemas.CatalogResource.tags: models.Tag.__table__,
+    schemas.CatalogResource.users: models.User.__table__,
+    schemas.CatalogResource.comments: models.Comment.__table__,
+    schemas.CatalogResource.reviews: models.Review.__table__,
+}
+
+IMPORT_SCHEMAS: dict[schemas.CatalogResource, type[BaseModel]] = {
+    schemas.CatalogResource.artworks: schemas.ArtworkCreate,
+    schemas.CatalogResource.categories: schemas.CategoryCreate,
+    schemas.CatalogResource.tags: schemas.TagCreate,
+    schemas.CatalogResource.users: schemas.UserCreate,
+    schemas.CatalogResource.comments: schemas.CommentCreate,
+    schemas.CatalogResource.reviews: schemas.ReviewCreate,
+}
+
+
+@dataclass(frozen=True)
+class Reference:
+    # A foreign key column that rows either set directly or through the unique name of the referenced row
+    column: str
+    name_field: str
+    table: Table
+    name_column: Column
+
+
+CATEGORY_REFERENCE = Reference("category_id", "category", models.Category.__table__, models.Category.name)
+USER_REFERENCE = Reference("author_id", "author", models.User.__table__, models.User.login)
+ARTWORK_REFERENCE = Reference("artwork_id", "artwork", models.Artwork.__table__, models.Artwork.title)
+TAG_REFERENCE = Reference("tag_id", "tags", models.Tag.__table__, models.Tag.name)
+
+REFERENCES: dict[schemas.CatalogResource, tuple[Reference, ...]] = {
+    schemas.CatalogResource.artworks: (CATEGORY_REFERENCE,),
+    schemas.CatalogResource.comments: (USER_REFERENCE, ARTWORK_REFERENCE),
+    schemas.CatalogResource.reviews: (USER_REFERENCE, ARTWORK_REFERENCE),
+}
+
+
+@dataclass(frozen=True)
+class UniqueKey:
+    # Columns the API keeps unique; imported rows may not repeat a value of the table or of an earlier row
+    fields: tuple[str, ...]
+    columns: tuple[Column, ...]
+
+
+UNIQUE_KEYS: dict[schemas.CatalogResource, tuple[UniqueKey, ...]] = {
+    schemas.CatalogResource.categories: (UniqueKey(("name",), (models.Category.name,)),),
+    schemas.CatalogResource.tags: (UniqueKey(("name",), (models.Tag.name,)),),
+    schemas.CatalogResource.users: (UniqueKey(("login",), (models.User.login,)),
+                                    UniqueKey(("email",), (models.User.email,))),
+    schemas.CatalogResource.reviews: (UniqueKey(("author_id", "artwork_id"),
+                                                (models.Review.author_id, models.Review.artwork_id)),),
+}
+
+
+@dataclass
+class ValidatedRow:
+    position: int
+    values: dict
+    # Foreign key column -> name of the referenced row, for columns the input did not set directly
+    names: dict[str, str]
+    tag_names: list[str]
+    tag_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class ImportReport:
+    resource: str
+    path: str
+    # Records read from the file (including those skipped on a resume), rows inserted and rows rejected
+    records: int = 0
+    imported: int = 0
+    rejected: int = 0
+    completed: bool = False
+    # This run only: the rows a previous run had imported and the time taken
+    resumed_imported: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return (self.imported - self.resumed_imported) / self.elapsed if self.elapsed else 0.0
+
+
+class ImportAborted(Exception):
+    pass
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                         for detail in error.errors())
+
+    return str(error)
+
+
+def _tag_names(value: Any) -> list[str]:
+    # A list of names or of tag objects (as written by the export), or a CSV cell
+    if value is None or value == "":
+        return []
+
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(CSV_TAG_SEPARATOR) if name.strip()]
+
+    if not isinstance(value, list):
+        raise ValueError("tags: expected a list of tag names")
+
+    return [str(item["name"] if isinstance(item, dict) else item) for item in value]
+
+
+def validate_records(resource: schemas.CatalogResource,
+                     records: list[tuple[int, Any]]) -> tuple[list[ValidatedRow], list[tuple[int, str]]]:
+    # Runs in the worker processes: parses JSONL lines, checks every record against the Create schema, hashes user
+    # passwords and picks up its references. Returns the valid rows and (position, message) for the others.
+    schema = IMPORT_SCHEMAS[resource]
+    valid = []
+    errors = []
+
+    for position, record in records:
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+
+            # Empty CSV cells are missing values
+            record = {key: value for key, value in record.items() if value != ""}
+            values = {key: str(value) if isinstance(value, str) else value
+                      for key, value in schema.parse_obj(record).dict().items()}
+            names = {}
+
+            if resource is schemas.CatalogResource.users:
+                values["password"] = hash_password(values["password"])
+
+            for reference in REFERENCES.get(resource, ()):
+                if reference.column in record:
+                    values[reference.column] = int(record[reference.column])
+                elif reference.name_field in record:
+                    names[reference.column] = str(record[reference.name_field])
+                else:
+                    raise ValueError(f"{reference.column} or {reference.name_field} is required")
+
+            tag_names = _tag_names(record.get("tags")) if resource is schemas.CatalogResource.artworks else []
+            valid.append(ValidatedRow(position, values, names, tag_names))
+        except (ValueError, TypeError, KeyError) as error:
+            errors.append((position, _error_message(error)))
+
+    return valid, errors
+
+
+class ReferenceResolver:
+    # name -> id maps of the referenced tables, filled with one chunked IN query per chunk for the names it brings
+    # up first. Direct ids are checked against the table for every chunk.
+    def __init__(self):
+        self._ids: dict[str, dict[str, int]] = {}
+
+    def _load_names(self, db: Session, reference: Reference, names: set[str]) -> dict[str, int]:
+        known = self._ids.setdefault(reference.table.name, {})
+        missing = list(names - known.keys())
+
+        for start in range(0, len(missing), 500):
+            for name, row_id in db.execute(select(reference.name_column, reference.table.c.id)
+                                           .where(reference.name_column.in_(missing[start:start + 500]))):
+                known[name] = AMBIGUOUS if name in known and known[name] != row_id else row_id
+
+        return known
+
+    def resolve(self, db: Session, resource: schemas.CatalogResource,
+                rows: list[ValidatedRow]) -> tuple[list[ValidatedRow], list[tuple[int, str]]]:
+        references = REFERENCES.get(resource, ())
+        resolved = rows
+        errors = []
+
+        if resource is schemas.CatalogResource.artworks:
+            references += (TAG_REFERENCE,)
+
+        for reference in references:
+            if reference is TAG_REFERENCE:
+                names = {name for row in resolved for name in row.tag_names}
+            else:
+                names = {row.names[reference.column] for row in resolved if reference.column in row.names}
+
+            known = self._load_names(db, reference, names) if names else {}
+            existing = _existing_values(db, reference.table.c.id, (row.values[reference.column] for row in resolved
+                                                                   if reference.column in row.values))
+            kept = []
+
+            for row in resolved:
+                if reference is TAG_REFERENCE:
+                    row_names = row.tag_names
+                elif reference.column in row.names:
+                    row_names = [row.names[reference.column]]
+                else:
+                    row_names = []
+
+                unresolved = [name for name in row_names if known.get(name, AMBIGUOUS) == AMBIGUOUS]
+
+                if unresolved:
+                    problem = "ambiguous" if all(name in known for name in unresolved) else "unknown"
+                    errors.append((row.position, f"{reference.name_field}: {problem} {', '.join(unresolved)}"))
+                    continue
+
+                if reference is TAG_REFERENCE:
+                    row.tag_ids = [known[name] for name in row_names]
+                elif row_names:
+                    row.values[reference.column] = known[row_names[0]]
+                elif row.values[reference.column] not in existing:
+                    errors.append((row.position, f"{reference.column}: no row {row.values[reference.column]}"))
+                    continue
+
+                kept.append(row)
+
+            resolved = kept
+
+        return resolved, errors
+
+
+def reject_duplicates(db: Session, resource: schemas.CatalogResource,
+                      rows: list[ValidatedRow]) -> tuple[list[ValidatedRow], list[tuple[int, str]]]:
+    # Runs after the references are resolved, so reviews given by author and artwork name are checked by id
+    kept = rows
+    errors = []
+
+    for key in UNIQUE_KEYS.get(resource, ()):
+        keys = [tuple(row.values.get(name) for name in key.fields) for row in kept]
+        checked = [row_key for row_key in keys if None not in row_key]
+
+        if len(key.columns) == 1:
+            existing = {(value,) for value in _existing_values(db, key.columns[0], (value for value, in checked))}
+        else:
+            existing = _existing_pairs(db, *key.columns, checked)
+
+        first_positions = {}
+        unique_rows = []
+
+        for row, row_key in zip(kept, keys):
+            label = f"{', '.join(key.fields)}: {', '.join(map(str, row_key))}"
+
+            if None in row_key:
+                unique_rows.append(row)
+            elif row_key in existing:
+                errors.append((row.position, f"{label} already exists"))
+            elif row_key in first_positions:
+                errors.append((row.position, f"{label} repeats line {first_positions[row_key]}"))
+            else:
+                first_positions[row_key] = row.position
+                unique_rows.append(row)
+
+        kept = unique_rows
+
+    return kept, errors
+
+
+def _read_records(path: Path, file_format: str) -> Iterator[tuple[int, Any]]:
+    # (line number, JSONL line or CSV row); .gz files are decompressed on the fly
+    opener = gzip.open if path.suffix == ".gz" else open
+
+    with opener(path, "rt", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, line
+
+
+def _record_chunks(records: Iterator[tuple[int, Any]], chunk_size: int) -> Iterator[list[tuple[int, Any]]]:
+    chunk = []
+
+    for record in records:
+        chunk.append(record)
+
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def file_format_of(path: Path) -> str:
+    suffixes = [suffix for suffix in path.suffixes if suffix != ".gz"]
+    return "csv" if suffixes and suffixes[-1] == ".csv" else "jsonl"
+
+
+def _insert_rows(db: Session, resource: schemas.CatalogResource, rows: list[ValidatedRow]) -> None:
+    table = IMPORT_TABLES[resource]
+    values = [row.values for row in rows]
+
+    if resource is schemas.CatalogResource.users:
+        created_at = datetime.now()
+        values = [dict(row_values, created_at=created_at) for row_values in values]
+
+    if resource is not schemas.CatalogResource.artworks or not any(row.tag_names for row in rows):
+        db.execute(insert(table), values)
+        return
+
+    ids = db.scalars(insert(table).returning(table.c.id, sort_by_parameter_order=True), values)
+    tag_rows = [{"artwork_id": artwork_id, "tag_id": tag_id}
+                for artwork_id, row in zip(ids, rows) for tag_id in dict.fromkeys(row.tag_ids)]
+
+    if tag_rows:
+        db.execute(insert(models.artwork_tag_association), tag_rows)
+
+
+def _bulk_tables(resource: schemas.CatalogResource) -> list[Table]:
+    tables = [IMPORT_TABLES[resource]]
+
+    if resource is schemas.CatalogResource.artworks:
+        tables.append(models.artwork_tag_association)
+
+    return tables
+
+
+def _search_index_of(table: Table) -> FullTextIndex | None:
+    return next((search_index for search_index in SEARCH_INDEXES.values() if search_index.content_table == table.name),
+                None)
+
+
+def _drop_indexes(engine: Engine, resource: schemas.CatalogResource) -> None:
+    # Secondary indexes and, on SQLite, the full-text insert trigger of the table are rebuilt in one pass at the end
+    # instead of being updated row by row
+    with engine.begin() as connection:
+        for table in _bulk_tables(resource):
+            for index in table.indexes:
+                index.drop(bind=connection, checkfirst=True)
+
+            search_index = _search_index_of(table)
+
+            if search_index is not None and connection.dialect.name == "sqlite":
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {search_index.fts_table}_after_insert"))
+
+
+def _restore_indexes(engine: Engine, resource: schemas.CatalogResource) -> None:
+    with engine.begin() as connection:
+        for table in _bulk_tables(resource):
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+            search_index = _search_index_of(table)
+
+            if search_index is not None and connection.dialect.name == "sqlite":
+                for statement in search_index.ddl():
+                    connection.execute(text(statement))
+
+                connection.execute(text(fts_command(search_index, "rebuild")))
+
+
+def _load_checkpoint(checkpoint: Path | None, report: ImportReport) -> None:
+    if checkpoint is None or not checkpoint.exists():
+        return
+
+    saved = json.loads(checkpoint.read_text())
+
+    if saved["resource"] != report.resource or saved["path"] != report.path:
+        raise ImportAborted(f"{checkpoint} belongs to the import of {saved['resource']} from {saved['path']}")
+
+    report.records, report.imported, report.rejected = saved["records"], saved["imported"], saved["rejected"]
+    report.resumed_imported = report.imported
+    report.completed = saved["completed"]
+
+
+def _save_checkpoint(checkpoint: Path | None, report: ImportReport) -> None:
+    # Written after each committed chunk; replacing the file keeps it whole if the process dies while writing it
+    if checkpoint is None:
+        return
+
+    temporary = checkpoint.with_name(checkpoint.name + ".tmp")
+    temporary.write_text(json.dumps({key: value for key, value in asdict(report).items()
+                                     if key not in ("resumed_imported", "elapsed")}))
+    os.replace(temporary, checkpoint)
+
+
+def import_file(engine: Engine, resource: schemas.CatalogResource, path: Path, file_format: str | None = None,
+                chunk_size: int = IMPORT_CHUNK_SIZE, workers: int = 0, drop_indexes: bool = False,
+                checkpoint: Path | None = None, max_errors: int = 0,
+                on_error: Callable[[int, str], None] | None = None,
+                on_progress: Callable[[ImportReport], None] | None = None) -> ImportReport:
+    # Reads the file in chunks of chunk_size records, validates them in `workers` processes (in this one for 0) and
+    # inserts every chunk in its own transaction, followed by the checkpoint. A rerun with the same checkpoint skips
+    # the records it already covers. More than max_errors rejected rows abort the import before their chunk.
+    report = ImportReport(resource=resource.value, path=str(path.resolve()))
+    _load_checkpoint(checkpoint, report)
+
+    if report.completed:
+        return report
+
+    file_format = file_format or file_format_of(path)
+    resume_from = report.records
+    resolver = ReferenceResolver()
+    executor = ProcessPoolExecutor(workers) if workers > 0 else None
+    pending: deque[tuple[int, Future]] = deque()
+    started = time.perf_counter()
+
+    def validate(chunk: list[tuple[int, Any]]) -> Future:
+        if executor is not None:
+            return executor.submit(validate_records, resource, chunk)
+
+        validated = Future()
+        validated.set_result(validate_records(resource, chunk))
+
+        return validated
+
+    def insert_chunk(records: int, validated: Future) -> None:
+        rows, errors = validated.result()
+
+        with Session(engine) as db, db.begin():
+            rows, unresolved = resolver.resolve(db, resource, rows)
+            rows, duplicates = reject_duplicates(db, resource, rows)
+            errors = sorted(errors + unresolved + duplicates)
+
+            for position, message in errors:
+                if on_error is not None:
+                    on_error(position, message)
+
+            if report.rejected + len(errors) > max_errors:
+                raise ImportAborted(f"More than {max_errors} rejected rows, "
+                                    f"stopped at the chunk with line {errors[0][0]}")
+
+            if rows:
+                _insert_rows(db, resource, rows)
+
+        report.records += records
+        report.imported += len(rows)
+        report.rejected += len(errors)
+        report.elapsed = time.perf_counter() - started
+        _save_checkpoint(checkpoint, report)
+
+        if on_progress is not None:
+            on_progress(report)
+
+    if drop_indexes:
+        _drop_indexes(engine, resource)
+
+    try:
+        records = _read_records(path, file_format)
+
+        for _ in range(resume_from):
+            next(records, None)
+
+        for chunk in _record_chunks(records, chunk_size):
+            pending.append((len(chunk), validate(chunk)))
+
+            # Bounded look-ahead, the pool validates the next chunks while this process inserts
+            while len(pending) > 2 * workers:
+                insert_chunk(*pending.popleft())
+
+        while pending:
+            insert_chunk(*pending.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+        if drop_indexes:
+            _restore_indexes(engine, resource)
+
+    if resource is schemas.CatalogResource.reviews:
+        # One pass over the review table instead of updating the aggregates chunk by chunk
+        with Session(engine) as db:
+            rebuild_artwork_ratings(db)
+
+    report.completed = True
+    report.elapsed = time.perf_counter() - started
+    _save_checkpoint(checkpoint, report)
+
+    return report
@@ -0,0 +1,46 @@
+import logging
+import threading
+from typing import Any, Callable
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    # Runs job(db) in a daemon thread every interval_seconds, with a fresh Session each time. A failed run is logged
+    # and the next one happens on schedule.
+    def __init__(self, name: str, engine: Engine, interval_seconds: float, job: Callable[[Session], Any]):
+        self.name = name
+        self.engine = engine
+        self.interval_seconds = interval_seconds
+        self.job = job
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> None:
+        try:
+            with Session(self.engine) as db:
+                self.job(db)
+        except Exception:
+            logger.exception("Background job %s failed", self.name)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
+
+    def close(self) -> None:
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,256 @@
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.dependencies import settings
+
+# Changes made in a session are kept here until its transaction commits, a rollback drops them
+PENDING_CHANGES = "leaderboard_changes"
+
+
+@dataclass
+class ArtworkStats:
+    category_id: int
+    star_rating: float
+    review_count: int = 0
+    score_sum: float = 0.0
+    comment_count: int = 0
+
+
+@dataclass(frozen=True)
+class RankedArtwork:
+    # A leaderboard entry that still holds the artwork row, so the response validators can version it
+    artwork_id: int
+    score: float
+    artwork: models.Artwork
+
+
+class BoundedTop:
+    # The `capacity` best artworks by (score, -id) of one category and metric, in a min-heap with lazy deletion.
+    # The entries are always the exact top len(entries). When a member drops below the rest it has to leave, as
+    # an artwork outside might now be better, so the board shrinks and is rebuilt once it holds fewer than asked for.
+    def __init__(self, capacity: int, scores: Iterable[tuple[int, float]]):
+        self.capacity = capacity
+        best = heapq.nlargest(capacity + 1, scores, key=lambda item: (item[1], -item[0]))
+        # Every scored artwork of the category fits, so anything that shows up can be placed exactly
+        self.exhaustive = len(best) <= capacity
+        self.entries = dict(best[:capacity])
+        self._heap = [(score, -artwork_id) for artwork_id, score in self.entries.items()]
+        heapq.heapify(self._heap)
+
+    def _lowest(self) -> tuple[float, int] | None:
+        while self._heap:
+            score, negative_id = self._heap[0]
+
+            if self.entries.get(-negative_id) == score:
+                return self._heap[0]
+
+            heapq.heappop(self._heap)
+
+        return None
+
+    def _push(self, artwork_id: int, score: float) -> None:
+        self.entries[artwork_id] = score
+        heapq.heappush(self._heap, (score, -artwork_id))
+
+        if len(self._heap) > 2 * self.capacity:
+            self._heap = [(score, -artwork_id) for artwork_id, score in self.entries.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, artwork_id: int, score: float | None) -> None:
+        if score is None:
+            self.entries.pop(artwork_id, None)
+            return
+
+        key = (score, -artwork_id)
+
+        if artwork_id in self.entries:
+            del self.entries[artwork_id]
+            lowest = self._lowest()
+
+            if self.exhaustive or lowest is None or key >= lowest:
+                self._push(artwork_id, score)
+
+            return
+
+        lowest = self._lowest()
+
+        if self.exhaustive or (lowest is not None and key > lowest):
+            self._push(artwork_id, score)
+
+            if len(self.entries) > self.capacity:
+                self._lowest()
+                score, negative_id = heapq.heappop(self._heap)
+                del self.entries[-negative_id]
+                self.exhaustive = False
+
+    def top(self, limit: int) -> list[tuple[int, float]] | None:
+        # None when the board lost too many members to answer and has to be rebuilt
+        if len(self.entries) < limit and not self.exhaustive:
+            return None
+
+        return heapq.nlargest(limit, self.entries.items(), key=lambda item: (item[1], -item[0]))
+
+
+class Leaderboards:
+    # Per-artwork counters in memory and a BoundedTop per (category or None for all, metric), built on first read.
+    # Loaded from the database on first use and every refresh_seconds after that, in between the CRUD functions
+    # feed their committed changes in. The Bayesian prior mean is the mean of all review scores at load time.
+    def __init__(self, size: int, prior_reviews: float, refresh_seconds: float):
+        self.size = size
+        self.capacity = size + size // 2
+        self.prior_reviews = prior_reviews
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._loaded_at: float | None = None
+        self._stats: dict[int, ArtworkStats] = {}
+        self._categories: dict[int, set[int]] = {}
+        self._boards: dict[tuple[int | None, schemas.LeaderboardMetric], BoundedTop] = {}
+        self._prior_mean = 0.0
+
+    def load(self, db: Session) -> None:
+        rating = models.ArtworkRating
+        stats = {
+            artwork_id: ArtworkStats(category_id, star_rating, review_count or 0, score_sum or 0.0)
+            for artwork_id, category_id, star_rating, review_count, score_sum in db.execute(
+                select(models.Artwork.id, models.Artwork.category_id, models.Artwork.star_rating,
+                       rating.review_count, rating.score_sum)
+                .outerjoin(rating, rating.artwork_id == models.Artwork.id)
+            )
+        }
+
+        for artwork_id, comment_count in db.execute(select(models.Comment.artwork_id, func.count())
+                                                    .group_by(models.Comment.artwork_id)):
+            if artwork_id in stats:
+                stats[artwork_id].comment_count = comment_count
+
+        categories = {}
+
+        for artwork_id, artwork_stats in stats.items():
+            categories.setdefault(artwork_stats.category_id, set()).add(artwork_id)
+
+        review_count = sum(artwork_stats.review_count for artwork_stats in stats.values())
+        score_sum = sum(artwork_stats.score_sum for artwork_stats in stats.values())
+
+        with self._lock:
+            self._stats = stats
+            self._categories = categories
+            self._boards = {}
+            self._prior_mean = score_sum / review_count if review_count else 0.0
+            self._loaded_at = time.monotonic()
+
+    def _score(self, artwork_stats: ArtworkStats, metric: schemas.LeaderboardMetric) -> float | None:
+        if metric is schemas.LeaderboardMetric.star_rating:
+            return artwork_stats.star_rating
+
+        if metric is schemas.LeaderboardMetric.comment_count:
+            return artwork_stats.comment_count or None
+
+        if not artwork_stats.review_count:
+            return None
+
+        if metric is schemas.LeaderboardMetric.review_count:
+            return artwork_stats.review_count
+
+        if metric is schemas.LeaderboardMetric.average:
+            return artwork_stats.score_sum / artwork_stats.review_count
+
+        # Bayesian average: the mean after adding prior_reviews reviews with the overall mean score, so an artwork
+        # needs several good reviews to beat one with many
+        return (self.prior_reviews * self._prior_mean + artwork_stats.score_sum) \
+            / (self.prior_reviews + artwork_stats.review_count)
+
+    def _refresh_boards(self, artwork_id: int, category_ids: Iterable[int | None]) -> None:
+        artwork_stats = self._stats.get(artwork_id)
+
+        for category_id in category_ids:
+            for metric in schemas.LeaderboardMetric:
+                board = self._boards.get((category_id, metric))
+
+                if board is not None:
+                    board.update(artwork_id, None if artwork_stats is None else self._score(artwork_stats, metric))
+
+    def apply(self, changes: list[tuple]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            for change, *values in changes:
+                if change == "artwork":
+                    artwork_id, category_id, star_rating = values
+                    artwork_stats = self._stats.setdefault(artwork_id, ArtworkStats(category_id, star_rating))
+                    artwork_stats.star_rating = star_rating
+                    self._categories.setdefault(category_id, set()).add(artwork_id)
+                    self._refresh_boards(artwork_id, (None, category_id))
+                elif change == "artwork_removed":
+                    self._remove(values[0])
+                elif change == "category_removed":
+                    for artwork_id in list(self._categories.pop(values[0], ())):
+                        self._remove(artwork_id)
+                else:
+                    artwork_id, review_count, score_sum, comment_count = values
+                    artwork_stats = self._stats.get(artwork_id)
+
+                    if artwork_stats is not None:
+                        artwork_stats.review_count += review_count
+                        artwork_stats.score_sum += score_sum
+                        artwork_stats.comment_count += comment_count
+                        self._refresh_boards(artwork_id, (None, artwork_stats.category_id))
+
+    def _remove(self, artwork_id: int) -> None:
+        artwork_stats = self._stats.pop(artwork_id, None)
+
+        if artwork_stats is not None:
+            self._categories.get(artwork_stats.category_id, set()).discard(artwork_id)
+            self._refresh_boards(artwork_id, (None, artwork_stats.category_id))
+
+    def top(self, db: Session, metric: schemas.LeaderboardMetric, category_id: int | None = None,
+            limit: int = 10) -> list[tuple[int, float]]:
+        loaded_at = self._loaded_at
+
+        if loaded_at is None or 0 < self.refresh_seconds < time.monotonic() - loaded_at:
+            self.load(db)
+
+        limit = min(limit, self.size)
+
+        with self._lock:
+            board = self._boards.get((category_id, metric))
+            best = None if board is None else board.top(limit)
+
+            if best is None:
+                artwork_ids = self._stats if category_id is None else self._categories.get(category_id, ())
+                board = BoundedTop(self.capacity, (
+                    (artwork_id, score) for artwork_id in artwork_ids
+                    if (score := self._score(self._stats[artwork_id], metric)) is not None
+                ))
+                self._boards[category_id, metric] = board
+                best = board.top(limit)
+
+            return best
+
+
+leaderboards = Leaderboards(settings.leaderboard_size, settings.leaderboard_prior_reviews,
+                            settings.leaderboard_refresh_seconds)
+
+
+def record_change(db: Session, *change) -> None:
+    db.info.setdefault(PENDING_CHANGES, []).append(change)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_committed_changes(db: Session) -> None:
+    changes = db.info.pop(PENDING_CHANGES, None)
+
+    if changes:
+        leaderboards.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_rolled_back_changes(db: Session) -> None:
+    db.info.pop(PENDING_CHANGES, None)
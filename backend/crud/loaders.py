@@ -0,0 +1,68 @@
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from backend import models, schemas
+
+# Named eager-loading profiles, one per response model that nests relationships. Collections use selectinload
+# (one extra SELECT ... WHERE id IN (...) per collection for the whole page, scalar parents would use joinedload),
+# so the number of queries per request does not depend on the page size.
+LOADER_PROFILES: dict[str, tuple[LoaderOption, ...]] = {
+    # schemas.Artwork
+    "artwork": (
+        selectinload(models.Artwork.comments),
+        selectinload(models.Artwork.reviews),
+        selectinload(models.Artwork.tags),
+        joinedload(models.Artwork.rating),
+    ),
+    # schemas.User
+    "user": (
+        selectinload(models.User.comments),
+        selectinload(models.User.reviews),
+    ),
+    # schemas.Tag
+    "tag": (
+        selectinload(models.Tag.artworks),
+    ),
+    # schemas.Category
+    "category": (
+        selectinload(models.Category.artworks),
+    ),
+    # schemas.SimilarArtwork
+    "similar_artwork": (
+        joinedload(models.ArtworkSimilarity.similar_artwork),
+    ),
+}
+
+# A named profile, the fieldset of a sparse response or None
+Profile = str | schemas.Fieldset | None
+
+FIELDSET_MODELS: dict[str, type[models.Base]] = {
+    "artwork": models.Artwork,
+    "category": models.Category,
+    "tag": models.Tag,
+    "user": models.User,
+}
+
+
+def fieldset_options(fieldset: schemas.Fieldset) -> tuple[LoaderOption, ...]:
+    # Only the chosen columns and relationships are fetched. updated_at is loaded regardless, the ETag is made from it.
+    model = FIELDSET_MODELS[fieldset.resource]
+    columns = [getattr(model, name) for name in sorted(fieldset.fields | {"updated_at"}) if name in model.__table__.c]
+    options = [load_only(*columns)]
+
+    for name in sorted(fieldset.include):
+        relationship = getattr(model, name)
+        options.append(selectinload(relationship) if relationship.property.uselist else joinedload(relationship))
+
+    return tuple(options)
+
+
+def load_options(profile: Profile) -> tuple[LoaderOption, ...]:
+    # No profile means no eager loading, e.g. for existence checks that never touch relationships
+    if profile is None:
+        return ()
+
+    if isinstance(profile, schemas.Fieldset):
+        return fieldset_options(profile)
+
+    return LOADER_PROFILES[profile]
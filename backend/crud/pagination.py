@@ -0,0 +1,59 @@
+import base64
+import binascii
+import json
+from typing import Any, Sequence
+
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+# Keyset position of the last row of a page: (sort key, id)
+Cursor = tuple[Any, int]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = json.dumps(list(cursor), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, row_id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Malformed cursor")
+
+    if not isinstance(row_id, int):
+        raise ValueError("Malformed cursor")
+
+    return sort_value, row_id
+
+
+def paginate(query: Query | Select, id_column: InstrumentedAttribute, skip: int, limit: int,
+             cursor: Cursor | None = None, sort_column: InstrumentedAttribute | None = None) -> Query | Select:
+    # With a cursor the page starts right after the (sort key, id) it encodes, so the database seeks through
+    # the index instead of counting off `skip` rows; skip is only used by clients that send no cursor
+    sort_column = id_column if sort_column is None else sort_column
+
+    order_by = (id_column,) if sort_column is id_column else (sort_column, id_column)
+
+    if cursor is None:
+        return query.order_by(*order_by).offset(skip).limit(limit)
+
+    sort_value, row_id = cursor
+
+    if sort_column is id_column:
+        query = query.filter(id_column > row_id)
+    else:
+        query = query.filter(or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id)))
+
+    return query.order_by(*order_by).limit(limit)
+
+
+def next_cursor(items: Sequence, limit: int, sort_attribute: str = "id") -> Cursor | None:
+    # A short page is the last one
+    if limit <= 0 or len(items) < limit:
+        return None
+
+    last_item = items[-1]
+
+    return getattr(last_item, sort_attribute), last_item.id
@@ -0,0 +1,120 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import models
+
+SIMILAR_ARTWORKS_TOP_K = 20
+TAG_WEIGHT = 0.5
+REVIEW_WEIGHT = 0.5
+# Tags on more artworks and users with more reviews than this say little about any pair and would make candidate
+# generation quadratic, they are left out of it
+MAX_TAG_ARTWORKS = 1000
+MAX_USER_REVIEWS = 1000
+
+
+@dataclass
+class SimilaritySignals:
+    # Sparse artwork x tag and artwork x user (review score minus the user's mean score) matrices, stored both
+    # row- and column-wise
+    artwork_ids: set[int] = field(default_factory=set)
+    tags_by_artwork: dict[int, set[int]] = field(default_factory=lambda: defaultdict(set))
+    artworks_by_tag: dict[int, list[int]] = field(default_factory=lambda: defaultdict(list))
+    reviews_by_artwork: dict[int, dict[int, float]] = field(default_factory=lambda: defaultdict(dict))
+    reviews_by_user: dict[int, dict[int, float]] = field(default_factory=lambda: defaultdict(dict))
+    review_norms: dict[int, float] = field(default_factory=dict)
+
+
+def load_signals(db: Session) -> SimilaritySignals:
+    signals = SimilaritySignals(artwork_ids=set(db.scalars(select(models.Artwork.id))))
+    association = models.artwork_tag_association
+
+    for artwork_id, tag_id in db.execute(select(association.c.artwork_id, association.c.tag_id)):
+        signals.tags_by_artwork[artwork_id].add(tag_id)
+        signals.artworks_by_tag[tag_id].append(artwork_id)
+
+    scores_by_user = defaultdict(dict)
+
+    for author_id, artwork_id, score in db.execute(select(models.Review.author_id, models.Review.artwork_id,
+                                                          models.Review.score)):
+        scores_by_user[author_id][artwork_id] = score
+
+    # Centering on the user's mean (adjusted cosine) removes the difference between strict and generous reviewers
+    for author_id, scores in scores_by_user.items():
+        mean = sum(scores.values()) / len(scores)
+
+        for artwork_id, score in scores.items():
+            if score != mean:
+                signals.reviews_by_user[author_id][artwork_id] = score - mean
+                signals.reviews_by_artwork[artwork_id][author_id] = score - mean
+
+    signals.review_norms = {artwork_id: math.sqrt(sum(value * value for value in reviews.values()))
+                            for artwork_id, reviews in signals.reviews_by_artwork.items()}
+
+    return signals
+
+
+def _common_tag_counts(signals: SimilaritySignals, artwork_id: int) -> Counter:
+    counts = Counter()
+
+    for tag_id in signals.tags_by_artwork.get(artwork_id, ()):
+        artwork_ids = signals.artworks_by_tag[tag_id]
+
+        if len(artwork_ids) <= MAX_TAG_ARTWORKS:
+            counts.update(artwork_ids)
+
+    return counts
+
+
+def _review_dot_products(signals: SimilaritySignals, artwork_id: int) -> Counter:
+    dot_products = Counter()
+
+    for author_id, value in signals.reviews_by_artwork.get(artwork_id, {}).items():
+        reviews = signals.reviews_by_user[author_id]
+
+        if len(reviews) <= MAX_USER_REVIEWS:
+            for other_id, other_value in reviews.items():
+                dot_products[other_id] += value * other_value
+
+    return dot_products
+
+
+def similar_artworks(signals: SimilaritySignals, artwork_id: int,
+                     top_k: int = SIMILAR_ARTWORKS_TOP_K) -> list[tuple[int, float]]:
+    # TAG_WEIGHT * Jaccard(tag sets) + REVIEW_WEIGHT * max(0, adjusted cosine of the review vectors), the top_k
+    # other artworks with a positive score
+    scores = defaultdict(float)
+    tag_count = len(signals.tags_by_artwork.get(artwork_id, ()))
+
+    for other_id, common in _common_tag_counts(signals, artwork_id).items():
+        union = tag_count + len(signals.tags_by_artwork[other_id]) - common
+        scores[other_id] += TAG_WEIGHT * common / union
+
+    norm = signals.review_norms.get(artwork_id)
+
+    if norm:
+        for other_id, dot_product in _review_dot_products(signals, artwork_id).items():
+            if dot_product > 0:
+                scores[other_id] += REVIEW_WEIGHT * dot_product / (norm * signals.review_norms[other_id])
+
+    scores.pop(artwork_id, None)
+
+    return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def affected_artworks(signals: SimilaritySignals, changed_ids: Iterable[int]) -> set[int]:
+    # A change to an artwork changes its score with every artwork it shares a tag or a reviewer with, those
+    # artworks' top-K lists have to be recomputed too
+    affected = set()
+
+    for artwork_id in changed_ids:
+        affected.add(artwork_id)
+        affected.update(_common_tag_counts(signals, artwork_id))
+        affected.update(_review_dot_products(signals, artwork_id))
+
+    return affected & signals.artwork_ids
@@ -4,7 +4,17 @@
 # __all__ = ["Session", "close_connection", "get_db", "mapper_registry", "engine", "metadata"]
 
 
-from .dependencies import (Session, close_db_state, db_state, get_db, mapper_registry,
-                           metadata)
+from .dependencies import (AsyncSession, Session, close_async_db_state, close_db_state, create_async_db_engine,
+                           create_db_engine, create_db_state, db_state, get_async_db, get_async_read_db, get_db,
+                           get_read_db, init_db_state, mapper_registry, metadata, password_hasher,
+                           refresh_sqlite_replicas, response_cache, session_tokens, table_versions)
+from .passwords import PasswordHasher, PasswordHasherBusy, hash_password, needs_rehash, verify_password
+from .sessions import SessionClaims, SessionTokens, session_time
+from .settings import Settings, load_settings, settings
 
-__all__ = ["Session", "close_db_state", "db_state", "get_db", "mapper_registry", "metadata"]
+__all__ = ["AsyncSession", "Session", "close_async_db_state", "close_db_state", "create_async_db_engine",
+           "create_db_engine", "create_db_state", "db_state", "get_async_db", "get_async_read_db", "get_db",
+           "get_read_db", "init_db_state", "mapper_registry", "metadata", "password_hasher",
+           "refresh_sqlite_replicas", "response_cache", "session_tokens", "table_versions", "PasswordHasher",
+           "PasswordHasherBusy", "hash_password", "needs_rehash", "verify_password", "SessionClaims", "SessionTokens",
+           "session_time", "Settings", "load_settings", "settings"]
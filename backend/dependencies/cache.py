@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable
+
+from sqlalchemy import Engine, MetaData, event
+
+WRITTEN_TABLES = "written_tables"
+COMMITTED_TABLES = "committed_tables"
+
+
+class TableVersions:
+    # Per-table write counters. bump_all() moves the epoch, which is part of every snapshot, for changes that do not
+    # go through a tracked engine (e.g. a replica refresh)
+    def __init__(self):
+        self._versions: dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def bump(self, tables: Iterable[str]) -> None:
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+
+    def snapshot(self, tables: Iterable[str]) -> tuple[int, ...]:
+        return self._epoch, *(self._versions.get(table, 0) for table in tables)
+
+
+def _dependent_tables(metadata: MetaData) -> dict[str, frozenset[str]]:
+    # A write to a table can reach every table that references it through ON DELETE CASCADE foreign keys
+    referencing: dict[str, set[str]] = {table.name: set() for table in metadata.sorted_tables}
+
+    for table in metadata.sorted_tables:
+        for foreign_key in table.foreign_keys:
+            referencing[foreign_key.column.table.name].add(table.name)
+
+    dependents = {}
+
+    for name in referencing:
+        found, pending = {name}, [name]
+
+        while pending:
+            for child in referencing[pending.pop()] - found:
+                found.add(child)
+                pending.append(child)
+
+        dependents[name] = frozenset(found)
+
+    return dependents
+
+
+def track_table_writes(engine: Engine, versions: TableVersions, metadata: MetaData) -> None:
+    # The tables written in a transaction are remembered on the connection and bumped when the connection goes back
+    # to the pool. That happens after the commit, so a reader can never cache pre-commit rows under the new versions.
+    dependents: dict[str, frozenset[str]] = {}
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def remember_written_table(conn, cursor, statement, parameters, context, executemany):
+        if not (context.isinsert or context.isupdate or context.isdelete):
+            return
+
+        if not dependents:
+            dependents.update(_dependent_tables(metadata))
+
+        table_name = context.compiled.compile_state.dml_table.name
+        conn.info.setdefault(WRITTEN_TABLES, set()).update(dependents.get(table_name, (table_name,)))
+
+    @event.listens_for(engine, "commit")
+    def keep_committed_tables(conn):
+        conn.info.setdefault(COMMITTED_TABLES, set()).update(conn.info.pop(WRITTEN_TABLES, ()))
+
+    @event.listens_for(engine, "rollback")
+    def forget_written_tables(conn):
+        conn.info.pop(WRITTEN_TABLES, None)
+
+    @event.listens_for(engine, "checkin")
+    def bump_committed_tables(dbapi_connection, connection_record):
+        connection_record.info.pop(WRITTEN_TABLES, None)
+        committed_tables = connection_record.info.pop(COMMITTED_TABLES, None)
+
+        if committed_tables:
+            versions.bump(committed_tables)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    versions: tuple[int, ...]
+    expires_at: float
+
+
+class ResponseCache:
+    # Bounded LRU with a TTL. Entries are stamped with the versions of the tables they were built from and are
+    # dropped on lookup once any of them moved, the TTL only bounds writes made by other processes.
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable, versions: tuple[int, ...]) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.versions != versions or entry.expires_at <= time.monotonic():
+                if entry.versions != versions:
+                    self.invalidations += 1
+                else:
+                    self.expirations += 1
+
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, versions: tuple[int, ...]) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = CacheEntry(value, versions, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
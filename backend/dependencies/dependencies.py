@@ -1,40 +1,350 @@
+import logging
+import secrets
+import threading
+import time
 from dataclasses import dataclass
-from typing import Iterable, Callable
+from itertools import cycle
+from typing import AsyncIterator, Iterable, Callable
 
-from sqlalchemy import create_engine, MetaData, Engine, Connection
+from sqlalchemy import create_engine, event, inspect, make_url, MetaData, Engine, URL
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session, registry
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .cache import ResponseCache, TableVersions, track_table_writes
+from .passwords import PasswordHasher
+from .sessions import SessionTokens
+from .settings import Settings, settings
+
+logger = logging.getLogger(__name__)
 
 metadata = MetaData()
 mapper_registry = registry(metadata=metadata)
 
-DB_URL = "sqlite:///my.db"
+table_versions = TableVersions()
+response_cache = ResponseCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_max_pending)
+
+
+def session_secret(app_settings: Settings) -> bytes:
+    if app_settings.session_secret:
+        return app_settings.session_secret.encode()
+
+    if app_settings.web_concurrency > 1:
+        raise ValueError(f"SESSION_SECRET is required with {app_settings.web_concurrency} worker processes, "
+                         f"each would sign session tokens with its own random key")
+
+    logger.warning("SESSION_SECRET is not set, session tokens are only valid in this process until it restarts")
+
+    return secrets.token_bytes(32)
+
+
+session_tokens = SessionTokens(session_secret(settings), settings.session_ttl_seconds, settings.session_cache_entries,
+                               settings.session_recheck_seconds)
+
+SQLITE_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
 
 @dataclass
 class DbState:
     engine: Engine
-    connection: Connection
-    get_db: Callable[[], Iterable[Session]]
+    get_db: Callable[..., Iterable[Session]]
+    read_engines: list[Engine]
+    get_read_db: Callable[..., Iterable[Session]]
+    async_engine: AsyncEngine | None
+    get_async_db: Callable[..., AsyncIterator[AsyncSession]]
+    async_read_engines: list[AsyncEngine]
+    get_async_read_db: Callable[..., AsyncIterator[AsyncSession]]
+    replica_refresh_stop: threading.Event | None = None
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def _sqlite_pragmas(db_settings: Settings) -> list[str]:
+    journal_mode = db_settings.sqlite_journal_mode.upper()
+    synchronous = db_settings.sqlite_synchronous.upper()
+
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLite journal mode: {db_settings.sqlite_journal_mode}")
+
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Unsupported SQLite synchronous mode: {db_settings.sqlite_synchronous}")
+
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA mmap_size={int(db_settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(db_settings.sqlite_cache_size)}",
+        f"PRAGMA busy_timeout={int(db_settings.sqlite_busy_timeout)}",
+        # Deletes rely on the ON DELETE CASCADE foreign keys, which SQLite only enforces when asked to
+        "PRAGMA foreign_keys=ON",
+    ]
+
+
+def _engine_options(url: URL, db_settings: Settings, is_async: bool = False) -> dict:
+    engine_kwargs = {
+        "pool_pre_ping": db_settings.pool_pre_ping,
+        "pool_recycle": db_settings.pool_recycle,
+    }
+    is_sqlite = url.get_backend_name() == "sqlite"
+
+    if is_sqlite:
+        engine_kwargs["connect_args"] = {"check_same_thread": False}
+
+    if is_sqlite and _is_sqlite_memory(url):
+        # Every new connection to ":memory:" is a separate empty database, so share a single one
+        engine_kwargs["poolclass"] = StaticPool
+    else:
+        # Set explicitly, some dialects (e.g. aiosqlite) default to NullPool and would not pool at all
+        engine_kwargs["poolclass"] = AsyncAdaptedQueuePool if is_async else QueuePool
+        engine_kwargs["pool_size"] = db_settings.pool_size
+        engine_kwargs["max_overflow"] = db_settings.max_overflow
+        engine_kwargs["pool_timeout"] = db_settings.pool_timeout
 
+    return engine_kwargs
 
-def create_db_state() -> DbState:
-    engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
-    connection = engine.connect()
+
+def _install_sqlite_pragmas(engine: Engine, db_settings: Settings) -> None:
+    pragmas = _sqlite_pragmas(db_settings)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+
+        for pragma in pragmas:
+            cursor.execute(pragma)
+
+        cursor.close()
+
+
+def async_db_url(db_url: str) -> URL:
+    url = make_url(db_url)
+    async_driver = ASYNC_DRIVERS.get(url.drivername)
+
+    return url if async_driver is None else url.set(drivername=async_driver)
+
+
+def create_db_engine(db_settings: Settings, db_url: str | None = None) -> Engine:
+    url = make_url(db_url or db_settings.db_url)
+    engine = create_engine(url, **_engine_options(url, db_settings))
+
+    if url.get_backend_name() == "sqlite":
+        _install_sqlite_pragmas(engine, db_settings)
+
+    return engine
+
+
+def create_async_db_engine(db_settings: Settings, db_url: str | None = None) -> AsyncEngine:
+    if db_url is None and db_settings.db_async_url:
+        url = make_url(db_settings.db_async_url)
+    else:
+        url = async_db_url(db_url or db_settings.db_url)
+
+    engine = create_async_engine(url, **_engine_options(url, db_settings, is_async=True))
+
+    if url.get_backend_name() == "sqlite":
+        _install_sqlite_pragmas(engine.sync_engine, db_settings)
+
+    return engine
+
+
+def _sticks_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, "")) > time.time()
+    except ValueError:
+        return False
+
+
+def _stick_to_primary(request: Request, response: Response, sticky_seconds: int) -> None:
+    # Read-your-writes: after a write the client reads from the primary until the replicas have caught up
+    if request.method not in READ_METHODS and sticky_seconds > 0:
+        response.set_cookie(PRIMARY_STICKY_COOKIE, str(time.time() + sticky_seconds),
+                            max_age=sticky_seconds, httponly=True)
+
+
+def create_db_state(db_settings: Settings = settings) -> DbState:
+    engine = create_db_engine(db_settings)
+    track_table_writes(engine, table_versions, metadata)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-    def get_db() -> Iterable[Session]:
+    read_engines = [create_db_engine(db_settings, read_url) for read_url in db_settings.db_read_urls]
+    read_sessions = cycle([sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+                           for read_engine in read_engines]) if read_engines else None
+
+    def get_db(request: Request, response: Response) -> Iterable[Session]:
+        if read_sessions is not None:
+            _stick_to_primary(request, response, db_settings.db_sticky_seconds)
+
         with SessionLocal() as db:
             yield db
 
-    return DbState(engine=engine, connection=connection, get_db=get_db)
+    def get_read_db(request: Request) -> Iterable[Session]:
+        session_factory = SessionLocal
+
+        if read_sessions is not None and not _sticks_to_primary(request):
+            session_factory = next(read_sessions)
+
+        with session_factory() as db:
+            yield db
+
+    # The async engines need an async driver (aiosqlite), so they are only built when the async stack is enabled
+    async_engine = create_async_db_engine(db_settings) if db_settings.db_async else None
+
+    if async_engine is not None:
+        track_table_writes(async_engine.sync_engine, table_versions, metadata)
+
+    AsyncSessionLocal = async_sessionmaker(autoflush=False, bind=async_engine) if async_engine else None
+
+    async_read_engines = [create_async_db_engine(db_settings, read_url) for read_url in db_settings.db_read_urls] \
+        if db_settings.db_async else []
+    async_read_sessions = cycle([async_sessionmaker(autoflush=False, bind=read_engine)
+                                 for read_engine in async_read_engines]) if async_read_engines else None
+
+    def _async_session_factory(session_factory: async_sessionmaker | None) -> async_sessionmaker:
+        if session_factory is None:
+            raise RuntimeError("Async database stack is disabled, set DB_ASYNC=1 to enable it")
+
+        return session_factory
+
+    async def get_async_db(request: Request, response: Response) -> AsyncIterator[AsyncSession]:
+        if async_read_sessions is not None:
+            _stick_to_primary(request, response, db_settings.db_sticky_seconds)
+
+        async with _async_session_factory(AsyncSessionLocal)() as db:
+            yield db
+
+    async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+        session_factory = AsyncSessionLocal
+
+        if async_read_sessions is not None and not _sticks_to_primary(request):
+            session_factory = next(async_read_sessions)
+
+        async with _async_session_factory(session_factory)() as db:
+            yield db
+
+    return DbState(engine=engine, get_db=get_db, read_engines=read_engines, get_read_db=get_read_db,
+                   async_engine=async_engine, get_async_db=get_async_db,
+                   async_read_engines=async_read_engines, get_async_read_db=get_async_read_db)
+
+
+def refresh_sqlite_replicas(db_state: DbState) -> None:
+    # Local stand-in for replication: copy the primary SQLite file over each SQLite replica file
+    if db_state.engine.url.get_backend_name() != "sqlite" or _is_sqlite_memory(db_state.engine.url):
+        return
+
+    for read_engine in db_state.read_engines:
+        if read_engine.url.get_backend_name() != "sqlite" or _is_sqlite_memory(read_engine.url):
+            continue
+
+        source = db_state.engine.raw_connection()
+        target = read_engine.raw_connection()
+
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            target.close()
+            source.close()
+
+    # Cached responses may have been read from the replicas before they caught up
+    table_versions.bump_all()
+
+
+def _start_replica_refresh(db_state: DbState, interval: int) -> None:
+    stop_event = threading.Event()
+
+    def refresh_periodically() -> None:
+        while not stop_event.wait(interval):
+            try:
+                refresh_sqlite_replicas(db_state)
+            except Exception:
+                logger.exception("Refreshing SQLite replicas failed")
+
+    threading.Thread(target=refresh_periodically, name="sqlite-replica-refresh", daemon=True).start()
+    db_state.replica_refresh_stop = stop_event
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    # create_all only builds indexes together with new tables, databases created earlier need them added
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def create_missing_columns(engine: Engine) -> None:
+    # create_all does not alter existing tables either. Only nullable columns can be added to tables that already
+    # have rows, the existing rows get NULL
+    existing_tables = inspect(engine).get_table_names()
+    preparer = engine.dialect.identifier_preparer
+
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                if not column.nullable:
+                    logger.warning("Cannot add NOT NULL column %s.%s to an existing table", table.name, column.name)
+                    continue
+
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                )
+
+
+def init_db_state(db_state: DbState, db_settings: Settings = settings) -> None:
+    metadata.create_all(bind=db_state.engine)
+    create_missing_columns(db_state.engine)
+    create_missing_indexes(db_state.engine)
+
+    if db_state.read_engines:
+        refresh_sqlite_replicas(db_state)
+
+        if db_settings.db_replica_refresh_seconds > 0:
+            _start_replica_refresh(db_state, db_settings.db_replica_refresh_seconds)
 
 
 def close_db_state(db_state: DbState) -> None:
-    db_state.connection.close()
+    if db_state.replica_refresh_stop is not None:
+        db_state.replica_refresh_stop.set()
+
+    for read_engine in db_state.read_engines:
+        read_engine.dispose()
+
+    db_state.engine.dispose()
+
+
+async def close_async_db_state(db_state: DbState) -> None:
+    for read_engine in db_state.async_read_engines:
+        await read_engine.dispose()
+
+    if db_state.async_engine is not None:
+        await db_state.async_engine.dispose()
 
 
 db_state = create_db_state()
 get_db = db_state.get_db
+get_read_db = db_state.get_read_db
+get_async_db = db_state.get_async_db
+get_async_read_db = db_state.get_async_read_db
 
 # engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
 # connection = engine.connect()
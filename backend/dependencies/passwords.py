@@ -0,0 +1,134 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+# scrypt cost of new hashes, 16 MiB and ~50 ms per hash. Rows hashed with other parameters (or still holding the
+# plaintext password) are rehashed at their next login.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_SALT_BYTES = 16
+SCRYPT_KEY_BYTES = 32
+
+HASH_SCHEME = "scrypt"
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int, key_bytes: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=key_bytes)
+
+
+def parse_password_hash(stored: str) -> tuple[int, int, int, bytes, bytes] | None:
+    # (n, r, p, salt, key) of a "scrypt$n$r$p$salt$key" hash, None for a legacy plaintext password
+    parts = stored.split("$")
+
+    if len(parts) != 6 or parts[0] != HASH_SCHEME:
+        return None
+
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), base64.b64decode(parts[4]), base64.b64decode(parts[5])
+    except (ValueError, binascii.Error):
+        return None
+
+
+def hash_password(password: str) -> str:
+    salt = os.urandom(SCRYPT_SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P, SCRYPT_KEY_BYTES)
+
+    return "$".join((HASH_SCHEME, str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P),
+                     base64.b64encode(salt).decode(), base64.b64encode(key).decode()))
+
+
+def verify_password(password: str, stored: str) -> bool:
+    parsed = parse_password_hash(stored)
+
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), stored.encode())
+
+    n, r, p, salt, key = parsed
+
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p, len(key)), key)
+
+
+def needs_rehash(stored: str) -> bool:
+    parsed = parse_password_hash(stored)
+
+    return parsed is None or parsed[:3] != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+class PasswordHasher:
+    # Hashes and verifies passwords in a pool of `workers` processes (in the calling thread with 0 workers), so scrypt
+    # never holds the GIL the request threads share. Every call waiting on the pool holds a request thread, so at
+    # most max_pending calls are let in at a time and the rest fail with PasswordHasherBusy straight away: a login
+    # storm gets 503s instead of taking every thread the catalog endpoints need.
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"{self.pending} password operations are already waiting")
+
+            self.pending += 1
+
+            if self.workers > 0 and self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+
+            executor = self._executor
+
+        started = time.perf_counter()
+
+        try:
+            return function(*args) if executor is None else executor.submit(function, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - started
+
+    def hash(self, password: str) -> str:
+        return self._run(hash_password, password)
+
+    def verify(self, password: str, stored: str) -> bool:
+        # A legacy plaintext comparison is cheap, it does not need a worker
+        if parse_password_hash(stored) is None:
+            return verify_password(password, stored)
+
+        return self._run(verify_password, password, stored)
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                # Calls waiting for a free worker
+                "queued": max(self.pending - max(self.workers, 1), 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "average_ms": self.busy_seconds / self.completed * 1000 if self.completed else 0.0,
+            }
@@ -0,0 +1,133 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class SessionClaims:
+    user_id: int
+    token_id: str
+    # Microseconds since the epoch
+    issued_at: int
+    expires_at: int
+
+
+def session_time() -> int:
+    # The clock of the claims and of the stored revocation times, microseconds since the epoch
+    return time.time_ns() // 1000
+
+
+class SessionTokens:
+    # Signed session tokens "user_id.issued_at.expires_at.token_id.signature" (HMAC-SHA256 over the rest), so
+    # checking one needs no database. Tokens verified recently are kept in an LRU and skip the HMAC. Revocation is
+    # in memory: a set of revoked token ids and, per user, a time before which all their tokens are revoked. Both
+    # are looked up in O(1) on every check and forget entries once the tokens they cover have expired.
+    # The per-user time is also stored with the user, verify() reads it through revoked_before when it first sees a
+    # token and again every recheck_seconds, so other processes pick it up. Revoked token ids stay in this process.
+    def __init__(self, secret: bytes, ttl_seconds: int, max_entries: int, recheck_seconds: int = 30):
+        self.secret = secret
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.recheck_seconds = recheck_seconds
+        self._lock = threading.Lock()
+        # token -> (claims, time.monotonic() of the last revocation lookup)
+        self._verified: OrderedDict[str, tuple[SessionClaims, float]] = OrderedDict()
+        self._revoked_tokens: dict[str, int] = {}
+        self._revoked_users: dict[int, int] = {}
+        self._prune_at = 1024
+
+    def _signature(self, payload: str) -> str:
+        digest = hmac.new(self.secret, payload.encode(), hashlib.sha256).digest()
+
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def issue(self, user_id: int) -> tuple[str, SessionClaims]:
+        issued_at = session_time()
+        claims = SessionClaims(user_id, secrets.token_urlsafe(12), issued_at, issued_at + self.ttl_seconds * 1_000_000)
+        payload = f"{claims.user_id}.{claims.issued_at}.{claims.expires_at}.{claims.token_id}"
+
+        return f"{payload}.{self._signature(payload)}", claims
+
+    def _decode(self, token: str) -> SessionClaims | None:
+        payload, _, signature = token.rpartition(".")
+        parts = payload.split(".")
+
+        if len(parts) != 4 or not hmac.compare_digest(signature, self._signature(payload)):
+            return None
+
+        try:
+            return SessionClaims(int(parts[0]), parts[3], int(parts[1]), int(parts[2]))
+        except ValueError:
+            return None
+
+    def verify(self, token: str,
+               revoked_before: Callable[[int], int | None] | None = None) -> SessionClaims | None:
+        # The claims of a valid, unexpired and unrevoked token, None otherwise. revoked_before(user_id) returns the
+        # stored revocation time of the user (-1 for none) or None when the user does not exist.
+        with self._lock:
+            claims, checked_at = self._verified.get(token, (None, None))
+
+            if claims is not None:
+                self._verified.move_to_end(token)
+
+        cached = claims is not None
+
+        if not cached:
+            claims = self._decode(token)
+
+            if claims is None:
+                return None
+
+        if revoked_before is not None and (not cached or time.monotonic() - checked_at >= self.recheck_seconds):
+            revoked_at = revoked_before(claims.user_id)
+
+            if revoked_at is None:
+                return None
+
+            if revoked_at > self._revoked_users.get(claims.user_id, -1):
+                self.revoke_user(claims.user_id, revoked_at)
+
+            checked_at, cached = time.monotonic(), False
+
+        if not cached:
+            with self._lock:
+                self._verified[token] = (claims, checked_at or 0.0)
+                self._verified.move_to_end(token)
+
+                while len(self._verified) > self.max_entries:
+                    self._verified.popitem(last=False)
+
+        if claims.expires_at <= session_time() or claims.token_id in self._revoked_tokens \
+                or claims.issued_at <= self._revoked_users.get(claims.user_id, -1):
+            return None
+
+        return claims
+
+    def _prune(self) -> None:
+        # Amortized: runs when the lists have doubled since the last pruning
+        if len(self._revoked_tokens) + len(self._revoked_users) < self._prune_at:
+            return
+
+        now = session_time()
+        self._revoked_tokens = {token_id: expires_at for token_id, expires_at in self._revoked_tokens.items()
+                                if expires_at > now}
+        self._revoked_users = {user_id: revoked_at for user_id, revoked_at in self._revoked_users.items()
+                               if revoked_at + self.ttl_seconds * 1_000_000 > now}
+        self._prune_at = max(1024, 2 * (len(self._revoked_tokens) + len(self._revoked_users)))
+
+    def revoke(self, claims: SessionClaims) -> None:
+        with self._lock:
+            self._revoked_tokens[claims.token_id] = claims.expires_at
+            self._prune()
+
+    def revoke_user(self, user_id: int, revoked_at: int | None = None) -> None:
+        # Every token of the user issued up to revoked_at (now by default), e.g. after a password change
+        with self._lock:
+            self._revoked_users[user_id] = max(revoked_at or session_time(), self._revoked_users.get(user_id, -1))
+            self._prune()
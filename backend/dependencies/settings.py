@@ -0,0 +1,145 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return default if value is None or value == "" else int(value)
+
+
+def _env_list(name: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    value = os.environ.get(name)
+
+    if value is None:
+        return default
+
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+
+    if value is None or value == "":
+        return default
+
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    db_url: str = "sqlite:///my.db"
+
+    # Async stack (AsyncEngine + async routers); the async URL defaults to the aiosqlite form of db_url
+    db_async: bool = False
+    db_async_url: str = ""
+
+    # Read replicas: GET handlers use these, clients stick to the primary for db_sticky_seconds after a write.
+    # SQLite replica files can be refreshed from the primary every db_replica_refresh_seconds (0 disables it)
+    db_read_urls: tuple[str, ...] = ()
+    db_sticky_seconds: int = 5
+    db_replica_refresh_seconds: int = 0
+
+    # Connection pool (ignored for in-memory SQLite, which needs a single shared connection)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+
+    # SQLite tuning, applied through PRAGMAs on every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 268435456
+    sqlite_cache_size: int = -65536
+    sqlite_busy_timeout: int = 5000
+
+    # Response cache for read endpoints, 0 entries or a 0 TTL disables it
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 30
+
+    # Like/dislike votes are buffered per comment for this many milliseconds and written in one batch (0 disables it)
+    comment_vote_flush_ms: int = 0
+
+    # The in-memory tag/category facet index is reloaded from the database this often (0 loads it only once).
+    # Each worker process keeps its own index, tags written through another worker show up at its next reload
+    facet_refresh_seconds: int = 300
+
+    # Top-N boards per category: how many artworks each one serves, the weight of the Bayesian prior (in reviews)
+    # and how often the counters behind them are reloaded from the database (0 loads them only once)
+    leaderboard_size: int = 100
+    leaderboard_prior_reviews: int = 10
+    leaderboard_refresh_seconds: int = 300
+
+    # Queued "similar artworks" lists are recomputed in the background this often (0 leaves it to the CLI)
+    similarity_refresh_seconds: int = 0
+
+    # Password hashing runs in this many worker processes (0 hashes on the request thread), calls beyond
+    # password_hash_max_pending waiting on them are answered with 503
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 8
+
+    # Key the session tokens are signed with, a random one per process when empty (tokens then do not survive a
+    # restart and are only valid in the process that issued them, so it is required with web_concurrency > 1),
+    # how long they are valid and how many recently verified ones are remembered. A password change or deletion
+    # revokes the user's tokens in every process within session_recheck_seconds, a logout only revokes the one token
+    # in the process that handled it.
+    session_secret: str = ""
+    session_ttl_seconds: int = 86400
+    session_cache_entries: int = 10000
+    session_recheck_seconds: int = 30
+
+    # Worker processes the server runs (WEB_CONCURRENCY, read by uvicorn and gunicorn)
+    web_concurrency: int = 1
+
+    # The HTML pages read their data in process through the crud layer. Set to the base URL of a separately running
+    # API (e.g. http://127.0.0.1:8000) to fetch it over HTTP instead, waiting at most the timeout per call
+    frontend_backend_url: str = ""
+    frontend_backend_timeout_seconds: int = 10
+
+
+def load_settings() -> Settings:
+    defaults = Settings()
+
+    return Settings(
+        db_url=_env_str("DB_URL", defaults.db_url),
+        db_async=_env_bool("DB_ASYNC", defaults.db_async),
+        db_async_url=_env_str("DB_ASYNC_URL", defaults.db_async_url),
+        db_read_urls=_env_list("DB_READ_URLS", defaults.db_read_urls),
+        db_sticky_seconds=_env_int("DB_STICKY_SECONDS", defaults.db_sticky_seconds),
+        db_replica_refresh_seconds=_env_int("DB_REPLICA_REFRESH_SECONDS", defaults.db_replica_refresh_seconds),
+        pool_size=_env_int("DB_POOL_SIZE", defaults.pool_size),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", defaults.max_overflow),
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", defaults.pool_timeout),
+        pool_recycle=_env_int("DB_POOL_RECYCLE", defaults.pool_recycle),
+        pool_pre_ping=_env_bool("DB_POOL_PRE_PING", defaults.pool_pre_ping),
+        sqlite_journal_mode=_env_str("SQLITE_JOURNAL_MODE", defaults.sqlite_journal_mode),
+        sqlite_synchronous=_env_str("SQLITE_SYNCHRONOUS", defaults.sqlite_synchronous),
+        sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size),
+        sqlite_cache_size=_env_int("SQLITE_CACHE_SIZE", defaults.sqlite_cache_size),
+        sqlite_busy_timeout=_env_int("SQLITE_BUSY_TIMEOUT", defaults.sqlite_busy_timeout),
+        cache_max_entries=_env_int("CACHE_MAX_ENTRIES", defaults.cache_max_entries),
+        cache_ttl_seconds=_env_int("CACHE_TTL_SECONDS", defaults.cache_ttl_seconds),
+        comment_vote_flush_ms=_env_int("COMMENT_VOTE_FLUSH_MS", defaults.comment_vote_flush_ms),
+        facet_refresh_seconds=_env_int("FACET_REFRESH_SECONDS", defaults.facet_refresh_seconds),
+        leaderboard_size=_env_int("LEADERBOARD_SIZE", defaults.leaderboard_size),
+        leaderboard_prior_reviews=_env_int("LEADERBOARD_PRIOR_REVIEWS", defaults.leaderboard_prior_reviews),
+        leaderboard_refresh_seconds=_env_int("LEADERBOARD_REFRESH_SECONDS", defaults.leaderboard_refresh_seconds),
+        similarity_refresh_seconds=_env_int("SIMILARITY_REFRESH_SECONDS", defaults.similarity_refresh_seconds),
+        password_hash_workers=_env_int("PASSWORD_HASH_WORKERS", defaults.password_hash_workers),
+        password_hash_max_pending=_env_int("PASSWORD_HASH_MAX_PENDING", defaults.password_hash_max_pending),
+        session_secret=_env_str("SESSION_SECRET", defaults.session_secret),
+        session_ttl_seconds=_env_int("SESSION_TTL_SECONDS", defaults.session_ttl_seconds),
+        session_cache_entries=_env_int("SESSION_CACHE_ENTRIES", defaults.session_cache_entries),
+        session_recheck_seconds=_env_int("SESSION_RECHECK_SECONDS", defaults.session_recheck_seconds),
+        web_concurrency=_env_int("WEB_CONCURRENCY", defaults.web_concurrency),
+        frontend_backend_url=_env_str("FRONTEND_BACKEND_URL", defaults.frontend_backend_url),
+        frontend_backend_timeout_seconds=_env_int("FRONTEND_BACKEND_TIMEOUT_SECONDS",
+                                                  defaults.frontend_backend_timeout_seconds),
+    )
+
+
+settings = load_settings()
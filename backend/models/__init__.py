@@ -1,3 +1,9 @@
-from .models import (Category, Artwork, User, Tag, Comment, Review)
+from .models import (Base, Category, Artwork, ArtworkRating, ArtworkSimilarity, User, Tag, Comment, Review,
+                     artwork_similarity_queue, artwork_tag_association)
+from .search import (HIGHLIGHT_CLOSE, HIGHLIGHT_END, HIGHLIGHT_OPEN, HIGHLIGHT_START, SEARCH_INDEXES, FullTextIndex,
+                     fts_command)
+from . import similarity
 
-__all__ = ["Category", "Artwork", "User", "Tag", "Comment", "Review"]
+__all__ = ["Base", "Category", "Artwork", "ArtworkRating", "ArtworkSimilarity", "User", "Tag", "Comment", "Review",
+           "artwork_similarity_queue", "artwork_tag_association", "HIGHLIGHT_CLOSE", "HIGHLIGHT_END",
+           "HIGHLIGHT_OPEN", "HIGHLIGHT_START", "SEARCH_INDEXES", "FullTextIndex", "fts_command"]
@@ -1,10 +1,15 @@
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 
-from sqlalchemy import Column, String, ForeignKey, Table
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from backend.dependencies import metadata, mapper_registry
 
 
+def utc_now() -> datetime:
+    # Naive UTC, the form SQLite hands datetimes back in
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 @mapper_registry.as_declarative_base()
 class Base:
     pass
@@ -15,13 +20,15 @@ artwork_tag_association = Table(
     metadata,
     Column("artwork_id", ForeignKey("artwork.id", ondelete="CASCADE"), primary_key=True),
     Column("tag_id", ForeignKey("tag.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key covers lookups by artwork_id, this one covers the reverse tag -> artworks direction
+    Index("ix_artwork_tag_tag_id", "tag_id"),
 )
 
 
 class Category(Base):
     __tablename__ = "category"
 
-    name: Mapped[str] = mapped_column(nullable=False)
+    name: Mapped[str] = mapped_column(nullable=False, index=True)
     description: Mapped[str] = mapped_column(nullable=False)
 
     artworks: Mapped[list["Artwork"]] = relationship(
@@ -29,9 +36,14 @@ class Category(Base):
         cascade="save-update, delete, delete-orphan"
     )
 
+    # Set on insert and on every UPDATE (ORM or Core), drives ETag and Last-Modified. Nullable because rows written
+    # before the column existed have no value
+    updated_at: Mapped[datetime | None] = mapped_column(default=utc_now, onupdate=utc_now)
+
     id: Mapped[int | None] = mapped_column(
         primary_key=True,
-        autoincrement=True
+        autoincrement=True,
+        nullable=False
     )
 
 
@@ -46,7 +58,7 @@ class Artwork(Base):
     age_rating: Mapped[str] = mapped_column(String(3), nullable=False)
     star_rating: Mapped[float] = mapped_column(nullable=False)
 
-    category_id: Mapped[int] = mapped_column(ForeignKey("category.id", ondelete="CASCADE"))
+    category_id: Mapped[int] = mapped_column(ForeignKey("category.id", ondelete="CASCADE"), index=True)
     category: Mapped[Category] = relationship(back_populates="artworks", passive_deletes=True)
 
     comments: Mapped[list["Comment"]] = relationship(
@@ -64,19 +76,77 @@ class Artwork(Base):
         back_populates="artworks"
     )
 
+    rating: Mapped["ArtworkRating | None"] = relationship(
+        back_populates="artwork",
+        cascade="save-update, delete, delete-orphan"
+    )
+
+    updated_at: Mapped[datetime | None] = mapped_column(default=utc_now, onupdate=utc_now)
+
     id: Mapped[int | None] = mapped_column(
         primary_key=True,
-        autoincrement=True
+        autoincrement=True,
+        nullable=False
+    )
+
+
+class ArtworkSimilarity(Base):
+    # Top-K most similar artworks per artwork, written by the similarity refresh job
+    __tablename__ = "artwork_similarity"
+
+    artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"), primary_key=True)
+    similar_artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"), primary_key=True)
+    similar_artwork: Mapped[Artwork] = relationship(foreign_keys=[similar_artwork_id], passive_deletes=True)
+
+    score: Mapped[float] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        Index("ix_artwork_similarity_artwork_id_score", "artwork_id", "score"),
     )
 
 
+# Artworks whose tags or reviews changed since the last similarity refresh. No foreign key, deleted artworks stay
+# queued so that the artworks that listed them get refreshed
+artwork_similarity_queue = Table(
+    "artwork_similarity_queue",
+    metadata,
+    Column("artwork_id", Integer, primary_key=True, autoincrement=False),
+)
+
+
+class ArtworkRating(Base):
+    # Review aggregates per artwork, kept in step with the review table by the review CRUD functions
+    __tablename__ = "artwork_rating"
+
+    artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"), primary_key=True)
+    artwork: Mapped[Artwork] = relationship(back_populates="rating", passive_deletes=True)
+
+    review_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    score_sum_squares: Mapped[float] = mapped_column(nullable=False, default=0.0)
+
+    @property
+    def average(self) -> float | None:
+        return self.score_sum / self.review_count if self.review_count else None
+
+    @property
+    def standard_deviation(self) -> float | None:
+        if not self.review_count:
+            return None
+
+        variance = self.score_sum_squares / self.review_count - self.average ** 2
+        return max(variance, 0.0) ** 0.5
+
+
 class User(Base):
     __tablename__ = "user"
 
-    login: Mapped[str] = mapped_column(nullable=False)
+    login: Mapped[str] = mapped_column(nullable=False, index=True)
     password: Mapped[str] = mapped_column(nullable=False)
-    email: Mapped[str] = mapped_column(nullable=False)
+    email: Mapped[str] = mapped_column(nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(nullable=False)
+    # Session tokens of the user issued up to this time (microseconds since the epoch) are revoked
+    sessions_revoked_at: Mapped[int | None] = mapped_column(BigInteger)
 
     comments: Mapped[list["Comment"]] = relationship(
         back_populates="author",
@@ -88,9 +158,12 @@ class User(Base):
         cascade="save-update, delete, delete-orphan"
     )
 
+    updated_at: Mapped[datetime | None] = mapped_column(default=utc_now, onupdate=utc_now)
+
     id: Mapped[int | None] = mapped_column(
         primary_key=True,
-        autoincrement=True
+        autoincrement=True,
+        nullable=False
     )
 
 
@@ -101,21 +174,24 @@ class Comment(Base):
     likes: Mapped[int] = mapped_column(nullable=False)
     dislikes: Mapped[int] = mapped_column(nullable=False)
 
-    author_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    author_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
     author: Mapped[User] = relationship(
         back_populates="comments",
         passive_deletes=True
     )
 
-    artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"))
+    artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"), index=True)
     artwork: Mapped[Artwork] = relationship(
         back_populates="comments",
         passive_deletes=True
     )
 
+    updated_at: Mapped[datetime | None] = mapped_column(default=utc_now, onupdate=utc_now)
+
     id: Mapped[int | None] = mapped_column(
         primary_key=True,
-        autoincrement=True
+        autoincrement=True,
+        nullable=False
     )
 
 
@@ -125,28 +201,31 @@ class Review(Base):
     text: Mapped[str] = mapped_column(nullable=False)
     score: Mapped[float] = mapped_column(nullable=False)
 
-    author_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    author_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), index=True)
     author: Mapped[User] = relationship(
         back_populates="reviews",
         passive_deletes=True
     )
 
-    artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"))
+    artwork_id: Mapped[int] = mapped_column(ForeignKey("artwork.id", ondelete="CASCADE"), index=True)
     artwork: Mapped[Artwork] = relationship(
         back_populates="reviews",
         passive_deletes=True
     )
 
+    updated_at: Mapped[datetime | None] = mapped_column(default=utc_now, onupdate=utc_now)
+
     id: Mapped[int | None] = mapped_column(
         primary_key=True,
-        autoincrement=True
+        autoincrement=True,
+        nullable=False
     )
 
 
 class Tag(Base):
     __tablename__ = "tag"
 
-    name: Mapped[str] = mapped_column(nullable=False)
+    name: Mapped[str] = mapped_column(nullable=False, index=True)
     description: Mapped[str] = mapped_column(nullable=False)
 
     artworks: Mapped[list[Artwork]] = relationship(
@@ -154,7 +233,10 @@ class Tag(Base):
         back_populates="tags"
     )
 
+    updated_at: Mapped[datetime | None] = mapped_column(default=utc_now, onupdate=utc_now)
+
     id: Mapped[int | None] = mapped_column(
         primary_key=True,
-        autoincrement=True
+        autoincrement=True,
+        nullable=False
     )
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, event, text
+
+from backend.dependencies import metadata
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+# Private-use characters FTS5 wraps the matches in, swapped for the tags once the text has been HTML-escaped
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_END = "\ue001"
+
+
+@dataclass(frozen=True)
+class FullTextIndex:
+    # External-content FTS5 table over columns of a content table, kept in sync by triggers. The weights scale
+    # the bm25() contribution of each column, so title/name matches rank above description matches.
+    fts_table: str
+    content_table: str
+    columns: tuple[str, ...]
+    weights: tuple[float, ...]
+
+    def ddl(self) -> list[str]:
+        columns = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{column}" for column in self.columns)
+        old_values = ", ".join(f"old.{column}" for column in self.columns)
+        insert_new = f"INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.id, {new_values});"
+        delete_old = f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) " \
+                     f"VALUES ('delete', old.id, {old_values});"
+
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5({columns}, "
+            f"content='{self.content_table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_after_insert AFTER INSERT ON {self.content_table} "
+            f"BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_after_delete AFTER DELETE ON {self.content_table} "
+            f"BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_after_update AFTER UPDATE OF {columns} "
+            f"ON {self.content_table} BEGIN {delete_old} {insert_new} END",
+        ]
+
+
+SEARCH_INDEXES = {
+    "artwork": FullTextIndex("artwork_fts", "artwork", ("title", "description"), (10.0, 1.0)),
+    "tag": FullTextIndex("tag_fts", "tag", ("name", "description"), (10.0, 1.0)),
+    "category": FullTextIndex("category_fts", "category", ("name", "description"), (10.0, 1.0)),
+}
+
+
+def fts_command(search_index: FullTextIndex, command: str) -> str:
+    return f"INSERT INTO {search_index.fts_table}({search_index.fts_table}) VALUES ('{command}')"
+
+
+@event.listens_for(metadata, "after_create")
+def create_search_indexes(target, connection: Connection, **kw) -> None:
+    # Runs after every create_all, so databases created before the search indexes existed get them too
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing_tables = set(connection.scalars(text("SELECT name FROM sqlite_master WHERE type = 'table'")))
+
+    for search_index in SEARCH_INDEXES.values():
+        for statement in search_index.ddl():
+            connection.execute(text(statement))
+
+        if search_index.fts_table not in existing_tables:
+            # Rows that were there before the index and its triggers
+            connection.execute(text(fts_command(search_index, "rebuild")))
@@ -0,0 +1,42 @@
+from sqlalchemy import Connection, event, text
+
+from backend.dependencies import metadata
+from .models import artwork_similarity_queue
+
+# (trigger name, when, table, artwork ids to queue as VALUES or SELECT)
+SIMILARITY_TRIGGERS = [
+    ("artwork_similarity_after_artwork_insert", "AFTER INSERT", "artwork", "VALUES (new.id)"),
+    # Before the delete, while the lists that contain the artwork still exist (they go with it through the foreign key)
+    ("artwork_similarity_before_artwork_delete", "BEFORE DELETE", "artwork",
+     "SELECT artwork_id FROM artwork_similarity WHERE similar_artwork_id = old.id"),
+    ("artwork_similarity_after_tag_insert", "AFTER INSERT", "artwork_tag", "VALUES (new.artwork_id)"),
+    ("artwork_similarity_after_tag_delete", "AFTER DELETE", "artwork_tag", "VALUES (old.artwork_id)"),
+    # A review moves its author's mean score and with it the centered score of every review of that author, all the
+    # artworks the author reviewed are queued
+    ("artwork_similarity_after_review_insert", "AFTER INSERT", "review",
+     "SELECT artwork_id FROM review WHERE author_id = new.author_id"),
+    ("artwork_similarity_after_review_delete", "AFTER DELETE", "review",
+     "SELECT artwork_id FROM review WHERE author_id = old.author_id UNION SELECT old.artwork_id"),
+    ("artwork_similarity_after_review_update", "AFTER UPDATE OF score, author_id, artwork_id", "review",
+     "SELECT artwork_id FROM review WHERE author_id IN (old.author_id, new.author_id) UNION SELECT old.artwork_id"),
+]
+
+
+@event.listens_for(metadata, "after_create")
+def create_similarity_triggers(target, connection: Connection, **kw) -> None:
+    # Every change to the signals of an artwork queues it for the next incremental similarity refresh. Other
+    # databases have no triggers and rely on full refreshes.
+    if connection.dialect.name != "sqlite":
+        return
+
+    queue = artwork_similarity_queue.name
+
+    # Recreated on every start, so databases created with an older definition pick up the current one
+    for name, when, table, artwork_ids in SIMILARITY_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        connection.execute(text(f"CREATE TRIGGER {name} {when} ON {table} "
+                                f"BEGIN INSERT OR IGNORE INTO {queue}(artwork_id) {artwork_ids}; END"))
+
+    if not connection.scalar(text("SELECT count(*) FROM artwork_similarity")):
+        # Nothing computed yet (new table or new database), the first refresh covers every artwork
+        connection.execute(text(f"INSERT OR IGNORE INTO {queue}(artwork_id) SELECT id FROM artwork"))
@@ -1,22 +1,89 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 
 from backend import crud
 from backend import schemas
-from backend.dependencies import get_db
+from backend.crud.jobs import PeriodicJob
+from backend.crud.pagination import Cursor
+from backend.crud.similarity import SIMILAR_ARTWORKS_TOP_K
+from backend.dependencies import AsyncSession, db_state, get_async_read_db, get_db, get_read_db, settings
+from backend.routers.async_routers import async_endpoint
+from backend.routers.cache import cached
+from backend.routers.conditional import conditional
+from backend.routers.fieldsets import fieldset_parameters
+from backend.routers.pagination import get_cursor, set_next_cursor, set_next_page
 
-router = APIRouter()
+similarity_refresh = PeriodicJob("artwork-similarity-refresh", db_state.engine, settings.similarity_refresh_seconds,
+                                 crud.refresh_artwork_similarities) if settings.similarity_refresh_seconds > 0 else None
 
+router = APIRouter(on_startup=[similarity_refresh.start] if similarity_refresh is not None else [],
+                   on_shutdown=[similarity_refresh.close] if similarity_refresh is not None else [])
 
-@router.get("/", response_model=list[schemas.Artwork])
-def get_artworks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_all_artworks(db, skip=skip, limit=limit)
+# Tables the cached artwork responses are built from
+ARTWORK_TABLES = ("artwork", "comment", "review", "artwork_tag", "tag", "artwork_rating")
+LEADERBOARD_TABLES = ("artwork", "comment", "review", "artwork_rating")
+
+
+@router.post("/bulk", response_model=schemas.BulkCreateResult, status_code=status.HTTP_201_CREATED)
+def create_artworks(artworks: list[schemas.ArtworkBulkCreate], db: Session = Depends(get_db)):
+    category_ids = {artwork.category_id for artwork in artworks}
+    missing_category_ids = category_ids - crud.get_existing_category_ids(db, category_ids)
+
+    if missing_category_ids:
+        raise HTTPException(status_code=404, detail=f"Categories not found: {sorted(missing_category_ids)}")
+
+    return schemas.BulkCreateResult(ids=crud.create_artworks(db, artworks))
+
+
+@router.post("/tags/attach", response_model=list[schemas.ArtworkTagResult])
+def add_tags_to_artworks(pairs: list[schemas.ArtworkTagPair], db: Session = Depends(get_db)):
+    return crud.artwork_add_tags(db, [(pair.artwork_id, pair.tag_id) for pair in pairs])
+
+
+@router.post("/tags/detach", response_model=list[schemas.ArtworkTagResult])
+def remove_tags_from_artworks(pairs: list[schemas.ArtworkTagPair], db: Session = Depends(get_db)):
+    return crud.artwork_remove_tags(db, [(pair.artwork_id, pair.tag_id) for pair in pairs])
+
+
+@router.get("/", response_model=list[schemas.ArtworkSummary])
+@cached(list[schemas.ArtworkSummary], tables=ARTWORK_TABLES)
+def get_artworks(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                 cursor: Cursor | None = Depends(get_cursor),
+                 fieldset: schemas.Fieldset = Depends(fieldset_parameters("artwork", include_by_default=False)),
+                 db: Session = Depends(get_read_db)):
+    artworks = crud.get_all_artworks(db, skip=skip, limit=limit, cursor=cursor, profile=fieldset)
+    set_next_page(request, response, artworks, limit)
+
+    return artworks
+
+
+@router.get("/top", response_model=list[schemas.LeaderboardEntry])
+@cached(list[schemas.LeaderboardEntry], tables=LEADERBOARD_TABLES)
+def get_top_artworks(metric: schemas.LeaderboardMetric = schemas.LeaderboardMetric.bayesian_average,
+                     limit: int = Query(10, ge=1, le=settings.leaderboard_size), db: Session = Depends(get_read_db)):
+    return crud.get_top_artworks(db, metric, limit=limit)
+
+
+@router.get("/facets", response_model=schemas.ArtworkFacets)
+def get_artwork_facets(request: Request, response: Response, tag: list[int] = Query([]),
+                       exclude_tag: list[int] = Query([]), category: list[int] = Query([]), limit: int = 100,
+                       cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
+    # ?tag=1&tag=2&exclude_tag=3&category=4: artworks with tags 1 and 2, without tag 3, in category 4
+    facets = crud.get_artwork_facets(db, tag, exclude_tag, category, limit=limit, cursor=cursor)
+
+    if limit > 0 and len(facets.artwork_ids) == limit:
+        set_next_cursor(request, response, (facets.artwork_ids[-1], facets.artwork_ids[-1]))
+
+    return facets
 
 
 @router.get("/{artwork_id}", response_model=schemas.Artwork)
-def get_artwork(artwork_id: int, db: Session = Depends(get_db)):
-    artwork = crud.get_artwork_by_id(db, artwork_id)
+@cached(schemas.Artwork, tables=ARTWORK_TABLES)
+def get_artwork(artwork_id: int,
+                fieldset: schemas.Fieldset = Depends(fieldset_parameters("artwork", include_by_default=True)),
+                db: Session = Depends(get_read_db)):
+    artwork = crud.get_artwork_by_id(db, artwork_id, profile=fieldset)
 
     if artwork is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
@@ -26,42 +93,121 @@ def get_artwork(artwork_id: int, db: Session = Depends(get_db)):
 
 @router.put("/{artwork_id}", response_model=schemas.Artwork)
 def update_artwork(artwork_id: int, artwork_schema_updated: schemas.ArtworkUpdate, db: Session = Depends(get_db)):
-    if crud.get_artwork_by_id(db, artwork_id) is None:
+    artwork = crud.update_artwork_base(db, artwork_id, artwork_schema_updated, profile="artwork")
+
+    if artwork is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    return crud.update_artwork_base(db, artwork_id, artwork_schema_updated)
+    return artwork
 
 
 @router.delete("/{artwork_id}", response_model=schemas.Artwork)
 def delete_artwork(artwork_id: int, db: Session = Depends(get_db)):
-    if crud.get_artwork_by_id(db, artwork_id) is None:
+    artwork = crud.delete_artwork(db, artwork_id)
+
+    if artwork is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    return crud.delete_artwork(db, artwork_id)
+    return artwork
 
 
 @router.get("/{artwork_id}/comments/", response_model=list[schemas.Comment])
-def get_comments_from_artwork(artwork_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@conditional(list[schemas.Comment])
+def get_comments_from_artwork(request: Request, response: Response, artwork_id: int, skip: int = 0, limit: int = 100,
+                              cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
     if crud.get_artwork_by_id(db, artwork_id) is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    return crud.get_comments_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit)
+    comments = crud.get_comments_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, comments, limit)
+
+    return comments
+
+
+@async_endpoint(get_comments_from_artwork)
+@conditional(list[schemas.Comment])
+async def get_comments_from_artwork_async(request: Request, response: Response, artwork_id: int, skip: int = 0,
+                                          limit: int = 100, cursor: Cursor | None = Depends(get_cursor),
+                                          db: AsyncSession = Depends(get_async_read_db)):
+    if await crud.async_crud.get_artwork_by_id(db, artwork_id) is None:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+
+    comments = await crud.async_crud.get_comments_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit,
+                                                              cursor=cursor)
+    set_next_page(request, response, comments, limit)
+
+    return comments
 
 
 @router.get("/{artwork_id}/reviews/", response_model=list[schemas.Review])
-def get_reviews_from_artwork(artwork_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@conditional(list[schemas.Review])
+def get_reviews_from_artwork(request: Request, response: Response, artwork_id: int, skip: int = 0, limit: int = 100,
+                             cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
     if crud.get_artwork_by_id(db, artwork_id) is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    return crud.get_reviews_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit)
+    reviews = crud.get_reviews_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, reviews, limit)
+
+    return reviews
+
+
+@async_endpoint(get_reviews_from_artwork)
+@conditional(list[schemas.Review])
+async def get_reviews_from_artwork_async(request: Request, response: Response, artwork_id: int, skip: int = 0,
+                                         limit: int = 100, cursor: Cursor | None = Depends(get_cursor),
+                                         db: AsyncSession = Depends(get_async_read_db)):
+    if await crud.async_crud.get_artwork_by_id(db, artwork_id) is None:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+
+    reviews = await crud.async_crud.get_reviews_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit,
+                                                            cursor=cursor)
+    set_next_page(request, response, reviews, limit)
+
+    return reviews
+
+
+@router.get("/{artwork_id}/similar", response_model=list[schemas.SimilarArtwork])
+@conditional(list[schemas.SimilarArtwork])
+def get_similar_artworks(artwork_id: int, limit: int = Query(SIMILAR_ARTWORKS_TOP_K, le=SIMILAR_ARTWORKS_TOP_K),
+                         db: Session = Depends(get_read_db)):
+    # Precomputed by refresh_artwork_similarities, an artwork without any similar ones costs one more query
+    similar_artworks = crud.get_similar_artworks(db, artwork_id, limit=limit, profile="similar_artwork")
+
+    if not similar_artworks and crud.get_artwork_by_id(db, artwork_id) is None:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+
+    return similar_artworks
 
 
 @router.get("/{artwork_id}/tags/", response_model=list[schemas.Tag])
-def get_tags_from_artwork(artwork_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@conditional(list[schemas.Tag])
+def get_tags_from_artwork(request: Request, response: Response, artwork_id: int, skip: int = 0, limit: int = 100,
+                          cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
+    if crud.get_artwork_by_id(db, artwork_id) is None:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+
+    tags = crud.get_tags_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit, cursor=cursor,
+                                      profile="tag")
+    set_next_page(request, response, tags, limit)
+
+    return tags
+
+
+@router.post("/{artwork_id}/tags/attach", response_model=list[schemas.ArtworkTagResult])
+def add_tags_to_artwork(artwork_id: int, tag_ids: list[int], db: Session = Depends(get_db)):
+    if crud.get_artwork_by_id(db, artwork_id) is None:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+
+    return crud.artwork_add_tags(db, [(artwork_id, tag_id) for tag_id in tag_ids])
+
+
+@router.post("/{artwork_id}/tags/detach", response_model=list[schemas.ArtworkTagResult])
+def remove_tags_from_artwork(artwork_id: int, tag_ids: list[int], db: Session = Depends(get_db)):
     if crud.get_artwork_by_id(db, artwork_id) is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    return crud.get_tags_from_artwork(db, artwork_id=artwork_id, skip=skip, limit=limit)
+    return crud.artwork_remove_tags(db, [(artwork_id, tag_id) for tag_id in tag_ids])
 
 
 @router.post("/{artwork_id}/tags/{tag_id}", response_model=schemas.Artwork)
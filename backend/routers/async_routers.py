@@ -0,0 +1,123 @@
+import inspect
+from typing import Any, Callable
+
+from fastapi import Depends, params
+from fastapi.routing import APIRoute, APIRouter
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from backend.dependencies import AsyncSession, get_async_db, get_async_read_db, get_db, get_read_db, settings
+
+# Sync session dependency -> async session dependency that replaces it in async routes
+ASYNC_DEPENDENCIES: dict[Callable, Callable] = {
+    get_db: get_async_db,
+    get_read_db: get_async_read_db,
+}
+
+# Sync endpoint -> native async endpoint that replaces it in async routes, see async_endpoint
+ASYNC_ENDPOINTS: dict[Callable, Callable] = {}
+
+
+def async_endpoint(sync_endpoint: Callable) -> Callable[[Callable], Callable]:
+    # Registers an async def endpoint that awaits the async crud functions in place of sync_endpoint. It takes the same
+    # parameters, with an AsyncSession from get_async_db/get_async_read_db instead of the Session.
+    def decorator(endpoint: Callable) -> Callable:
+        ASYNC_ENDPOINTS[sync_endpoint] = endpoint
+        return endpoint
+
+    return decorator
+
+
+def _session_parameter(signature: inspect.Signature) -> str | None:
+    for name, parameter in signature.parameters.items():
+        if isinstance(parameter.default, params.Depends) and parameter.default.dependency in ASYNC_DEPENDENCIES:
+            return name
+
+    return None
+
+
+def _validate_response(route: APIRoute, content: Any) -> Any:
+    # Convert ORM objects while the session is still usable, lazy loads are not possible after run_sync returns
+    if route.response_field is None or isinstance(content, Response):
+        return content
+
+    value, errors = route.response_field.validate(content, {}, loc=("response",))
+
+    if errors:
+        raise ValidationError([errors], route.response_field.type_)
+
+    return value
+
+
+# Endpoints without a native async version run whole, response validation included, on the AsyncSession's
+# underlying Session through run_sync. That is a greenlet on the event loop thread: only the driver's I/O is
+# awaited, the query building, ORM loading and validation in between block the loop like a sync call would.
+def _to_async_endpoint(route: APIRoute) -> Callable:
+    endpoint = route.endpoint
+
+    if endpoint in ASYNC_ENDPOINTS:
+        return ASYNC_ENDPOINTS[endpoint]
+
+    signature = inspect.signature(endpoint)
+    session_name = _session_parameter(signature)
+
+    if session_name is None:
+        return endpoint
+
+    session_parameter = signature.parameters[session_name]
+    async_parameter = session_parameter.replace(
+        annotation=AsyncSession,
+        default=Depends(ASYNC_DEPENDENCIES[session_parameter.default.dependency])
+    )
+
+    async def async_endpoint(**kwargs):
+        async_db: AsyncSession = kwargs.pop(session_name)
+
+        def call(db: Session) -> Any:
+            return _validate_response(route, endpoint(**kwargs, **{session_name: db}))
+
+        return await async_db.run_sync(call)
+
+    async_endpoint.__name__ = endpoint.__name__
+    async_endpoint.__doc__ = endpoint.__doc__
+    async_endpoint.__signature__ = signature.replace(parameters=[
+        async_parameter if name == session_name else parameter
+        for name, parameter in signature.parameters.items()
+    ])
+
+    return async_endpoint
+
+
+def to_async_router(router: APIRouter) -> APIRouter:
+    async_router = APIRouter(on_startup=router.on_startup, on_shutdown=router.on_shutdown)
+
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+
+        async_router.add_api_route(
+            route.path,
+            _to_async_endpoint(route),
+            methods=route.methods,
+            name=route.name,
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            operation_id=route.operation_id,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+        )
+
+    return async_router
+
+
+def select_router(router: APIRouter) -> APIRouter:
+    return to_async_router(router) if settings.db_async else router
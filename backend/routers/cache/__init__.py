@@ -0,0 +1,3 @@
+from .cache import cached, router
+
+__all__ = ["cached", "router"]
@@ -0,0 +1,79 @@
+import inspect
+from functools import wraps
+from typing import Any, Callable
+
+from fastapi.routing import APIRouter
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.dependencies import response_cache, table_versions
+from backend.routers.conditional import (BODY_HEADERS, etag_matches, fieldset_response_model, find_fieldset,
+                                         not_modified, render, validator_headers, with_request_parameter)
+
+router = APIRouter()
+
+# Parameters that are injected per request and do not identify the cached value
+UNCACHED_ANNOTATIONS = (Request, Response, Session)
+
+
+def cached(response_model: Any, tables: tuple[str, ...]) -> Callable[[Callable], Callable]:
+    # Caches the serialized response of a GET endpoint, keyed by the endpoint and its arguments, and stamped with the
+    # versions of the tables the response is built from. Headers the endpoint sets (e.g. pagination) and the
+    # ETag/Last-Modified validators are kept with the body, so If-None-Match on a hit needs no database work.
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        key_parameters = [name for name, parameter in signature.parameters.items()
+                          if parameter.annotation not in UNCACHED_ANNOTATIONS]
+        response_parameter = next((name for name, parameter in signature.parameters.items()
+                                   if parameter.annotation is Response), None)
+        session_parameter = next(name for name, parameter in signature.parameters.items()
+                                 if parameter.annotation is Session)
+
+        def build_entry(kwargs: dict) -> tuple[bytes, dict[str, str]]:
+            content = endpoint(**kwargs)
+            fieldset = find_fieldset(kwargs)
+            headers = validator_headers(content, fieldset)
+
+            if response_parameter is not None:
+                headers.update((name, value) for name, value in kwargs[response_parameter].headers.items()
+                               if name not in BODY_HEADERS)
+
+            return render(fieldset_response_model(response_model, fieldset), content), headers
+
+        @wraps(endpoint)
+        def cached_endpoint(**kwargs):
+            request = kwargs[request_parameter] if request_parameter in signature.parameters \
+                else kwargs.pop(request_parameter)
+
+            if not response_cache.enabled:
+                entry = build_entry(kwargs)
+            else:
+                # Primary and replica reads are cached apart, so sticky clients keep reading their own writes
+                key = (endpoint.__module__, endpoint.__qualname__, kwargs[session_parameter].get_bind().url,
+                       *(kwargs[name] for name in key_parameters))
+                # Taken before reading, so rows committed during the read only ever invalidate the new entry
+                versions = table_versions.snapshot(tables)
+                entry = response_cache.get(key, versions)
+
+                if entry is None:
+                    entry = build_entry(kwargs)
+                    response_cache.set(key, entry, versions)
+
+            body, headers = entry
+
+            if etag_matches(request, headers["ETag"]):
+                return not_modified(headers)
+
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        request_parameter = with_request_parameter(endpoint, cached_endpoint)
+
+        return cached_endpoint
+
+    return decorator
+
+
+@router.get("/stats")
+def get_cache_stats():
+    return response_cache.stats()
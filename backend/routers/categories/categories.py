@@ -1,13 +1,21 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 
 from backend import crud
 from backend import schemas
-from backend.dependencies import get_db
+from backend.crud.pagination import Cursor
+from backend.dependencies import get_db, get_read_db, settings
+from backend.routers.cache import cached
+from backend.routers.fieldsets import fieldset_parameters
+from backend.routers.pagination import get_cursor, set_next_page
 
 router = APIRouter()
 
+# Tables the cached category responses are built from
+CATEGORY_TABLES = ("category", "artwork")
+LEADERBOARD_TABLES = ("category", "artwork", "comment", "review", "artwork_rating")
+
 
 @router.post("/", response_model=schemas.Category, status_code=status.HTTP_201_CREATED)
 def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_db)):
@@ -19,14 +27,40 @@ def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_
     return crud.create_category(db, category)
 
 
-@router.get("/", response_model=list[schemas.Category])
-def get_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_categories(db, skip=skip, limit=limit)
+@router.post("/bulk", response_model=schemas.BulkCreateResult, status_code=status.HTTP_201_CREATED)
+def create_categories(categories: list[schemas.CategoryCreate], db: Session = Depends(get_db)):
+    names = [category.name for category in categories]
+
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=409, detail="Categories with duplicate names in the request")
+
+    existing_names = crud.get_existing_category_names(db, names)
+
+    if existing_names:
+        raise HTTPException(status_code=409,
+                            detail=f"Categories with such names already exist: {sorted(existing_names)}")
+
+    return schemas.BulkCreateResult(ids=crud.create_categories(db, categories))
+
+
+@router.get("/", response_model=list[schemas.CategorySummary])
+@cached(list[schemas.CategorySummary], tables=CATEGORY_TABLES)
+def get_categories(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                   cursor: Cursor | None = Depends(get_cursor),
+                   fieldset: schemas.Fieldset = Depends(fieldset_parameters("category", include_by_default=False)),
+                   db: Session = Depends(get_read_db)):
+    categories = crud.get_categories(db, skip=skip, limit=limit, cursor=cursor, profile=fieldset)
+    set_next_page(request, response, categories, limit)
+
+    return categories
 
 
 @router.get("/{category_id}", response_model=schemas.Category)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = crud.get_category_by_id(db, category_id)
+@cached(schemas.Category, tables=CATEGORY_TABLES)
+def get_category(category_id: int,
+                 fieldset: schemas.Fieldset = Depends(fieldset_parameters("category", include_by_default=True)),
+                 db: Session = Depends(get_read_db)):
+    category = crud.get_category_by_id(db, category_id, profile=fieldset)
 
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
@@ -34,31 +68,42 @@ def get_category(category_id: int, db: Session = Depends(get_db)):
     return category
 
 
-@router.put("/{category_id}", response_model=schemas.Category)
-def update_category(category_id: int, category_schema_updated: schemas.CategoryUpdate, db: Session = Depends(get_db)):
-    check_category = crud.get_category_by_id(db, category_id)
+@router.get("/{category_id}/top", response_model=list[schemas.LeaderboardEntry])
+@cached(list[schemas.LeaderboardEntry], tables=LEADERBOARD_TABLES)
+def get_top_artworks(category_id: int,
+                     metric: schemas.LeaderboardMetric = schemas.LeaderboardMetric.bayesian_average,
+                     limit: int = Query(10, ge=1, le=settings.leaderboard_size), db: Session = Depends(get_read_db)):
+    top_artworks = crud.get_top_artworks(db, metric, category_id=category_id, limit=limit)
 
-    if check_category is None:
+    if not top_artworks and crud.get_category_by_id(db, category_id) is None:
         raise HTTPException(status_code=404, detail="Category not found")
 
+    return top_artworks
+
+
+@router.put("/{category_id}", response_model=schemas.Category)
+def update_category(category_id: int, category_schema_updated: schemas.CategoryUpdate, db: Session = Depends(get_db)):
     check_category = crud.get_category_by_name(db, category_schema_updated.name)
 
     if check_category:
         raise HTTPException(status_code=409, detail="Category with such name already exists")
 
-    return crud.update_category_base(db, category_id, category_schema_updated)
+    category = crud.update_category_base(db, category_id, category_schema_updated, profile="category")
+
+    if category is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    return category
 
 
 @router.delete("/{category_id}", response_model=schemas.Category)
 def delete_category(category_id: int, db: Session = Depends(get_db)):
-    check_category = crud.get_category_by_id(db, category_id)
+    category = crud.delete_category(db, category_id)
 
-    if check_category is None:
+    if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    check_category = crud.delete_category(db, category_id)
-
-    return check_category
+    return category
 
 
 @router.post("/{category_id}/artworks", response_model=schemas.Artwork, status_code=status.HTTP_201_CREATED)
@@ -1,21 +1,63 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 
 from backend import crud
 from backend import schemas
-from backend.dependencies import get_db
+from backend.crud.coalescer import CommentVoteCoalescer
+from backend.crud.pagination import Cursor
+from backend.dependencies import AsyncSession, db_state, get_async_read_db, get_db, get_read_db, settings
+from backend.routers.async_routers import async_endpoint
+from backend.routers.conditional import conditional
+from backend.routers.pagination import get_cursor, set_next_page
 
-router = APIRouter()
+comment_votes = CommentVoteCoalescer(db_state.engine, settings.comment_vote_flush_ms / 1000) \
+    if settings.comment_vote_flush_ms > 0 else None
+
+router = APIRouter(on_shutdown=[comment_votes.close] if comment_votes is not None else [])
+
+
+@router.post("/bulk", response_model=schemas.BulkCreateResult, status_code=status.HTTP_201_CREATED)
+def create_comments(comments: list[schemas.CommentBulkCreate], db: Session = Depends(get_db)):
+    user_ids = {comment.author_id for comment in comments}
+    missing_user_ids = user_ids - crud.get_existing_user_ids(db, user_ids)
+
+    if missing_user_ids:
+        raise HTTPException(status_code=404, detail=f"Users not found: {sorted(missing_user_ids)}")
+
+    artwork_ids = {comment.artwork_id for comment in comments}
+    missing_artwork_ids = artwork_ids - crud.get_existing_artwork_ids(db, artwork_ids)
+
+    if missing_artwork_ids:
+        raise HTTPException(status_code=404, detail=f"Artworks not found: {sorted(missing_artwork_ids)}")
+
+    return schemas.BulkCreateResult(ids=crud.create_comments(db, comments))
 
 
 @router.get("/", response_model=list[schemas.Comment])
-def get_all_comments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_all_comments(db, skip=skip, limit=limit)
+@conditional(list[schemas.Comment])
+def get_all_comments(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                     cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
+    comments = crud.get_all_comments(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, comments, limit)
+
+    return comments
+
+
+@async_endpoint(get_all_comments)
+@conditional(list[schemas.Comment])
+async def get_all_comments_async(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                                 cursor: Cursor | None = Depends(get_cursor),
+                                 db: AsyncSession = Depends(get_async_read_db)):
+    comments = await crud.async_crud.get_all_comments(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, comments, limit)
+
+    return comments
 
 
 @router.get("/{comment_id}", response_model=schemas.Comment)
-def get_comment(comment_id: int, db: Session = Depends(get_db)):
+@conditional(schemas.Comment)
+def get_comment(comment_id: int, db: Session = Depends(get_read_db)):
     comment = crud.get_comment_by_id(db, comment_id)
 
     if comment is None:
@@ -24,23 +66,61 @@ def get_comment(comment_id: int, db: Session = Depends(get_db)):
     return comment
 
 
+@async_endpoint(get_comment)
+@conditional(schemas.Comment)
+async def get_comment_async(comment_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    comment = await crud.async_crud.get_comment_by_id(db, comment_id)
+
+    if comment is None:
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    return comment
+
+
 @router.put("/{comment_id}", response_model=schemas.Comment)
 def update_comment(comment_id: int, comment_schema_updated: schemas.CommentUpdate, db: Session = Depends(get_db)):
-    check_comment = crud.get_comment_by_id(db, comment_id)
+    comment = crud.update_comment_base(db, comment_id, comment_schema_updated)
 
-    if check_comment is None:
+    if comment is None:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    return crud.update_comment_base(db, comment_id, comment_schema_updated)
+    return comment
 
 
 @router.delete("/{comment_id}", response_model=schemas.Comment)
 def delete_comment(comment_id: int, db: Session = Depends(get_db)):
-    check_comment = crud.get_comment_by_id(db, comment_id)
+    comment = crud.delete_comment(db, comment_id)
+
+    if comment is None:
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    return comment
 
-    if check_comment is None:
+
+def _vote_comment(comment_id: int, db: Session, likes: int = 0, dislikes: int = 0):
+    if comment_votes is None:
+        comment = crud.add_comment_votes(db, comment_id, likes=likes, dislikes=dislikes)
+
+        if comment is None:
+            raise HTTPException(status_code=404, detail="Comment not found")
+
+        return comment
+
+    if crud.get_comment_by_id(db, comment_id) is None:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    check_comment = crud.delete_comment(db, comment_id)
+    comment_votes.add(comment_id, likes=likes, dislikes=dislikes)
+
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.post("/{comment_id}/like", response_model=schemas.Comment,
+             responses={202: {"description": "Vote buffered, written with the next coalesced batch"}})
+def like_comment(comment_id: int, db: Session = Depends(get_db)):
+    return _vote_comment(comment_id, db, likes=1)
+
 
-    return check_comment
+@router.post("/{comment_id}/dislike", response_model=schemas.Comment,
+             responses={202: {"description": "Vote buffered, written with the next coalesced batch"}})
+def dislike_comment(comment_id: int, db: Session = Depends(get_db)):
+    return _vote_comment(comment_id, db, dislikes=1)
@@ -0,0 +1,178 @@
+import hashlib
+import inspect
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from functools import wraps
+from typing import Any, Callable, get_origin
+
+from pydantic import parse_obj_as
+from sqlalchemy import inspect as inspect_orm
+from sqlalchemy.orm import InstanceState
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.crud.leaderboards import RankedArtwork
+from backend.routers.serialization import dumps, encode_rows
+from backend.schemas import Fieldset
+
+# Headers that describe the body itself and are left out of 304 responses
+BODY_HEADERS = ("content-length", "content-type")
+
+
+def _collect_row_versions(content: Any, versions: list, seen: set, depth: int) -> None:
+    if isinstance(content, (list, tuple)):
+        for item in content:
+            _collect_row_versions(item, versions, seen, depth)
+        return
+
+    if isinstance(content, RankedArtwork):
+        # A ranking is not a row: the positions and scores version it, the artwork row adds its own version
+        versions.append(("leaderboard", content.artwork_id, content.score))
+        _collect_row_versions(content.artwork, versions, seen, depth)
+        return
+
+    state = inspect_orm(content, raiseerr=False)
+
+    if not isinstance(state, InstanceState) or state.key in seen:
+        return
+
+    seen.add(state.key)
+    mapper = state.mapper
+
+    if "updated_at" in mapper.columns:
+        versions.append((mapper.local_table.name, state.identity, state.dict.get("updated_at")))
+    else:
+        # Rows without a timestamp (e.g. rating aggregates) are versioned by their values
+        versions.append((mapper.local_table.name, state.identity,
+                         tuple(state.dict.get(attribute.key) for attribute in mapper.column_attrs)))
+
+    if depth == 0:
+        return
+
+    # Only relationships that were loaded can be part of the response, membership changes show up as added/removed rows
+    for relationship in mapper.relationships:
+        if relationship.key not in state.unloaded and state.dict.get(relationship.key) is not None:
+            _collect_row_versions(state.dict[relationship.key], versions, seen, depth - 1)
+
+
+def row_validators(content: Any, fieldset: Fieldset | None = None) -> tuple[str, datetime | None]:
+    # Strong ETag and Last-Modified from the (table, primary key, updated_at) of every row in the response,
+    # without serializing it. Sparse responses of the same rows differ, so their fieldset is part of the ETag.
+    versions = [] if fieldset is None else [(fieldset.resource, sorted(fieldset.fields), sorted(fieldset.include))]
+    _collect_row_versions(content, versions, set(), depth=2)
+
+    digest = hashlib.blake2b(repr(versions).encode(), digest_size=16).hexdigest()
+    timestamps = [version for _, _, version in versions if isinstance(version, datetime)]
+
+    return f'"{digest}"', max(timestamps, default=None)
+
+
+def validator_headers(content: Any, fieldset: Fieldset | None = None) -> dict[str, str]:
+    etag, last_modified = row_validators(content, fieldset)
+    headers = {"ETag": etag}
+
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+    return headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    if_none_match = request.headers.get("if-none-match")
+
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return etag in (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers={name: value for name, value in headers.items()
+                                              if name.lower() not in BODY_HEADERS})
+
+
+def render(response_model: Any, content: Any) -> bytes:
+    body = encode_rows(response_model, content)
+
+    if body is not None:
+        return body
+
+    return dumps(parse_obj_as(response_model, content))
+
+
+def find_fieldset(kwargs: dict) -> Fieldset | None:
+    return next((value for value in kwargs.values() if isinstance(value, Fieldset)), None)
+
+
+def fieldset_response_model(response_model: Any, fieldset: Fieldset | None) -> Any:
+    # Endpoints that take a Fieldset answer with its generated model in place of the full schema
+    if fieldset is None:
+        return response_model
+
+    return list[fieldset.model] if get_origin(response_model) is list else fieldset.model
+
+
+def with_request_parameter(endpoint: Callable, wrapper: Callable) -> str:
+    # The wrapper needs the request even when the endpoint does not take it, the extra parameter is added to the
+    # signature FastAPI reads and has to be dropped again before calling the endpoint
+    signature = inspect.signature(endpoint)
+    request_parameter = next((name for name, parameter in signature.parameters.items()
+                              if parameter.annotation is Request), None)
+
+    if request_parameter is not None:
+        return request_parameter
+
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("conditional_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+    ])
+
+    return "conditional_request"
+
+
+def conditional(response_model: Any) -> Callable[[Callable], Callable]:
+    # ETag/Last-Modified for a GET endpoint (sync or async) that returns ORM rows, If-None-Match is answered with 304
+    # before the body is serialized
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        response_parameter = next((name for name, parameter in signature.parameters.items()
+                                   if parameter.annotation is Response), None)
+
+        def pop_request(kwargs: dict) -> Request:
+            return kwargs[request_parameter] if request_parameter in signature.parameters \
+                else kwargs.pop(request_parameter)
+
+        def respond(request: Request, kwargs: dict, content: Any) -> Response:
+            fieldset = find_fieldset(kwargs)
+            headers = validator_headers(content, fieldset)
+
+            if response_parameter is not None:
+                headers.update((name, value) for name, value in kwargs[response_parameter].headers.items()
+                               if name not in BODY_HEADERS)
+
+            if etag_matches(request, headers["ETag"]):
+                return not_modified(headers)
+
+            return Response(content=render(fieldset_response_model(response_model, fieldset), content),
+                            media_type="application/json", headers=headers)
+
+        if inspect.iscoroutinefunction(endpoint):
+            @wraps(endpoint)
+            async def conditional_endpoint(**kwargs):
+                request = pop_request(kwargs)
+                return respond(request, kwargs, await endpoint(**kwargs))
+        else:
+            @wraps(endpoint)
+            def conditional_endpoint(**kwargs):
+                request = pop_request(kwargs)
+                return respond(request, kwargs, endpoint(**kwargs))
+
+        request_parameter = with_request_parameter(endpoint, conditional_endpoint)
+
+        return conditional_endpoint
+
+    return decorator
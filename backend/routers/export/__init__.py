@@ -0,0 +1,3 @@
+from .export import router
+
+__all__ = ["router"]
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Iterable
+
+from fastapi import Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRouter
+from sqlalchemy.orm import Session
+
+from backend import schemas
+from backend.crud.export import export_ndjson
+from backend.dependencies import get_read_db
+
+router = APIRouter()
+
+
+def get_export_db(request: Request) -> Iterable[Session]:
+    # The body is streamed after the endpoint has returned, outside of run_sync, so exports read through a sync
+    # session even when the async stack is enabled
+    yield from get_read_db(request)
+
+
+@router.get("/{resource}", response_class=StreamingResponse)
+def export_resource(resource: schemas.CatalogResource, include: list[schemas.ExportInclude] = Query([]),
+                    since: datetime | None = None, gzip: bool = False, db: Session = Depends(get_export_db)):
+    if include and resource is not schemas.CatalogResource.artworks:
+        raise HTTPException(status_code=400, detail="Only artworks can include nested rows")
+
+    filename = f"{resource.value}.ndjson.gz" if gzip else f"{resource.value}.ndjson"
+
+    return StreamingResponse(export_ndjson(db, resource, include, since, compress=gzip),
+                             media_type="application/gzip" if gzip else "application/x-ndjson",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
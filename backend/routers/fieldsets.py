@@ -0,0 +1,35 @@
+from typing import Callable
+
+from fastapi import HTTPException, Query
+
+from backend import schemas
+
+
+def _parse_names(value: str, allowed: tuple[str, ...], parameter: str) -> frozenset[str]:
+    names = frozenset(name.strip() for name in value.split(",") if name.strip())
+    unknown = names - set(allowed)
+
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {parameter}: {', '.join(sorted(unknown))}")
+
+    return names
+
+
+def fieldset_parameters(resource: str, include_by_default: bool) -> Callable[..., schemas.Fieldset]:
+    # ?fields=title,poster_url&include=tags: the comma-separated fields and nested relationships of the response.
+    # All fields are sent by default, the relationships only where include_by_default is set (single rows).
+    scalar_names, nested_names = schemas.fieldset_names(resource)
+
+    def get_fieldset(fields: str | None = Query(None, description=f"Any of: {', '.join(scalar_names)}"),
+                     include: str | None = Query(None, description=f"Any of: {', '.join(nested_names)}")
+                     ) -> schemas.Fieldset:
+        selected = frozenset(scalar_names) if fields is None else _parse_names(fields, scalar_names, "fields")
+
+        if include is not None:
+            included = _parse_names(include, nested_names, "include")
+        else:
+            included = frozenset(nested_names) if include_by_default else frozenset()
+
+        return schemas.Fieldset(resource, selected, included)
+
+    return get_fieldset
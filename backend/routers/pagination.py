@@ -0,0 +1,36 @@
+from typing import Sequence
+
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.crud.pagination import Cursor, decode_cursor, encode_cursor, next_cursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def get_cursor(cursor: str | None = None) -> Cursor | None:
+    if cursor is None:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_page(request: Request, response: Response, items: Sequence, limit: int,
+                  sort_attribute: str = "id") -> None:
+    # The body stays a plain list for backward compatibility, the next page is advertised in headers
+    set_next_cursor(request, response, next_cursor(items, limit, sort_attribute))
+
+
+def set_next_cursor(request: Request, response: Response, cursor: Cursor | None) -> None:
+    if cursor is None:
+        return
+
+    token = encode_cursor(cursor)
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=token)
+
+    response.headers[NEXT_CURSOR_HEADER] = token
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
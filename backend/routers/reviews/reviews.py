@@ -1,21 +1,64 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 
 from backend import crud
 from backend import schemas
-from backend.dependencies import get_db
+from backend.crud.pagination import Cursor
+from backend.dependencies import AsyncSession, get_async_read_db, get_db, get_read_db
+from backend.routers.async_routers import async_endpoint
+from backend.routers.conditional import conditional
+from backend.routers.pagination import get_cursor, set_next_page
 
 router = APIRouter()
 
 
+@router.post("/bulk", response_model=schemas.BulkCreateResult, status_code=status.HTTP_201_CREATED)
+def create_reviews(reviews: list[schemas.ReviewBulkCreate], db: Session = Depends(get_db)):
+    user_ids = {review.author_id for review in reviews}
+    missing_user_ids = user_ids - crud.get_existing_user_ids(db, user_ids)
+
+    if missing_user_ids:
+        raise HTTPException(status_code=404, detail=f"Users not found: {sorted(missing_user_ids)}")
+
+    artwork_ids = {review.artwork_id for review in reviews}
+    missing_artwork_ids = artwork_ids - crud.get_existing_artwork_ids(db, artwork_ids)
+
+    if missing_artwork_ids:
+        raise HTTPException(status_code=404, detail=f"Artworks not found: {sorted(missing_artwork_ids)}")
+
+    pairs = [(review.author_id, review.artwork_id) for review in reviews]
+
+    if len(set(pairs)) != len(pairs) or crud.get_existing_review_pairs(db, pairs):
+        raise HTTPException(status_code=400, detail="User with this id already has a review for artwork with this id")
+
+    return schemas.BulkCreateResult(ids=crud.create_reviews(db, reviews))
+
+
 @router.get("/", response_model=list[schemas.Review])
-def get_all_reviews(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_all_reviews(db, skip=skip, limit=limit)
+@conditional(list[schemas.Review])
+def get_all_reviews(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                    cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
+    reviews = crud.get_all_reviews(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, reviews, limit)
+
+    return reviews
+
+
+@async_endpoint(get_all_reviews)
+@conditional(list[schemas.Review])
+async def get_all_reviews_async(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                                cursor: Cursor | None = Depends(get_cursor),
+                                db: AsyncSession = Depends(get_async_read_db)):
+    reviews = await crud.async_crud.get_all_reviews(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, reviews, limit)
+
+    return reviews
 
 
 @router.get("/{review_id}", response_model=schemas.Review)
-def get_review(review_id: int, db: Session = Depends(get_db)):
+@conditional(schemas.Review)
+def get_review(review_id: int, db: Session = Depends(get_read_db)):
     review = crud.get_review_by_id(db, review_id)
 
     if review is None:
@@ -24,23 +67,32 @@ def get_review(review_id: int, db: Session = Depends(get_db)):
     return review
 
 
+@async_endpoint(get_review)
+@conditional(schemas.Review)
+async def get_review_async(review_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    review = await crud.async_crud.get_review_by_id(db, review_id)
+
+    if review is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+
+    return review
+
+
 @router.put("/{review_id}", response_model=schemas.Review)
 def update_review(review_id: int, review_schema_updated: schemas.ReviewUpdate, db: Session = Depends(get_db)):
-    check_review = crud.get_review_by_id(db, review_id)
+    review = crud.update_review_base(db, review_id, review_schema_updated)
 
-    if check_review is None:
+    if review is None:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    return crud.update_review_base(db, review_id, review_schema_updated)
+    return review
 
 
 @router.delete("/{review_id}", response_model=schemas.Review)
 def delete_review(review_id: int, db: Session = Depends(get_db)):
-    check_review = crud.get_review_by_id(db, review_id)
+    review = crud.delete_review(db, review_id)
 
-    if check_review is None:
+    if review is None:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    check_review = crud.delete_review(db, review_id)
-
-    return check_review
+    return review
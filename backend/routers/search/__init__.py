@@ -0,0 +1,3 @@
+from .search import router
+
+__all__ = ["router"]
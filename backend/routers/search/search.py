@@ -0,0 +1,21 @@
+from fastapi import Depends, Query, Request, Response
+from fastapi.routing import APIRouter
+from sqlalchemy.orm import Session
+
+from backend import crud
+from backend import schemas
+from backend.crud.pagination import Cursor
+from backend.dependencies import get_read_db
+from backend.routers.pagination import get_cursor, set_next_page
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[schemas.SearchHit])
+def search(request: Request, response: Response, q: str = Query(min_length=1),
+           index: schemas.SearchIndex = schemas.SearchIndex.artwork, skip: int = 0, limit: int = 20,
+           cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
+    hits = crud.search(db, index, q, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, hits, limit, sort_attribute="score")
+
+    return hits
@@ -0,0 +1,70 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, get_args, get_origin
+
+import orjson
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON, ModelField
+from starlette.responses import JSONResponse
+
+from backend import models
+
+
+def _json_default(value: Any) -> Any:
+    # orjson encodes dates, datetimes, enums and str subclasses (HttpUrl, EmailStr) itself, models are sent by alias
+    # like FastAPI sends them
+    if isinstance(value, BaseModel):
+        return value.dict(by_alias=True)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    # The default response class of the app
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _is_plain(field: ModelField) -> bool:
+    # A single column value sent as stored: no nested model, no container and nothing that converts it
+    return field.shape == SHAPE_SINGLETON and not field.sub_fields and not field.class_validators \
+        and not (isinstance(field.type_, type) and issubclass(field.type_, BaseModel))
+
+
+@lru_cache(maxsize=1024)
+def row_fields(model: type[BaseModel]) -> tuple[tuple[str, ...], Callable[[Any], tuple]] | None:
+    # The JSON keys of an orm_mode model and a getter for the matching attribute values of a row, or None when
+    # one of its fields needs pydantic
+    fields = list(model.__fields__.values())
+
+    if not model.__config__.orm_mode or not all(_is_plain(field) for field in fields):
+        return None
+
+    getter = attrgetter(*(field.name for field in fields))
+
+    return tuple(field.alias for field in fields), getter if len(fields) > 1 else lambda row: (getter(row),)
+
+
+def encode_rows(response_model: Any, content: Any) -> bytes | None:
+    # JSON for ORM rows (or a single row) built straight from their column values, skipping pydantic validation:
+    # the database already enforced the types. None when the response needs the model, e.g. nested relationships.
+    many = get_origin(response_model) is list
+    model = get_args(response_model)[0] if many else response_model
+    rows = content if many else [content]
+
+    if not (isinstance(model, type) and issubclass(model, BaseModel)) or not isinstance(rows, (list, tuple)):
+        return None
+
+    fields = row_fields(model)
+
+    if fields is None or not all(isinstance(row, models.Base) for row in rows):
+        return None
+
+    keys, values = fields
+    objects = [dict(zip(keys, values(row))) for row in rows]
+
+    return dumps(objects if many else objects[0])
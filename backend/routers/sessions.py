@@ -0,0 +1,41 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend import crud
+from backend.dependencies import SessionClaims, db_state, session_tokens
+
+SESSION_COOKIE = "session"
+SESSION_TOKEN_HEADER = "X-Session-Token"
+
+
+def set_session(response: Response, token: str, claims: SessionClaims) -> None:
+    # Browsers get the token as a cookie, API clients read it from the header and send it back as a bearer token
+    response.set_cookie(SESSION_COOKIE, token, max_age=(claims.expires_at - claims.issued_at) // 1_000_000,
+                        httponly=True, samesite="lax")
+    response.headers[SESSION_TOKEN_HEADER] = token
+
+
+def clear_session(response: Response) -> None:
+    response.delete_cookie(SESSION_COOKIE, httponly=True, samesite="lax")
+
+
+def _sessions_revoked_at(user_id: int) -> int | None:
+    # Read from the primary, a replica may not have the revocation yet
+    with Session(db_state.engine) as db:
+        return crud.get_user_sessions_revoked_at(db, user_id)
+
+
+def get_session(request: Request) -> SessionClaims:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+
+    if scheme.lower() != "bearer" or not token:
+        token = request.cookies.get(SESSION_COOKIE)
+
+    claims = session_tokens.verify(token, _sessions_revoked_at) if token else None
+
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+    return claims
@@ -1,13 +1,20 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 
 from backend import crud
 from backend import schemas
-from backend.dependencies import get_db
+from backend.crud.pagination import Cursor
+from backend.dependencies import get_db, get_read_db
+from backend.routers.cache import cached
+from backend.routers.fieldsets import fieldset_parameters
+from backend.routers.pagination import get_cursor, set_next_page
 
 router = APIRouter()
 
+# Tables the cached tag responses are built from
+TAG_TABLES = ("tag", "artwork_tag", "artwork")
+
 
 @router.post("/", response_model=schemas.Tag, status_code=status.HTTP_201_CREATED)
 def create_tag(tag: schemas.TagCreate, db: Session = Depends(get_db)):
@@ -19,14 +26,38 @@ def create_tag(tag: schemas.TagCreate, db: Session = Depends(get_db)):
     return crud.create_tag(db, tag)
 
 
-@router.get("/", response_model=list[schemas.Tag])
-def get_tags(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_tags(db, skip=skip, limit=limit)
+@router.post("/bulk", response_model=schemas.BulkCreateResult, status_code=status.HTTP_201_CREATED)
+def create_tags(tags: list[schemas.TagCreate], db: Session = Depends(get_db)):
+    names = [tag.name for tag in tags]
+
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=409, detail="Tags with duplicate names in the request")
+
+    existing_names = crud.get_existing_tag_names(db, names)
+
+    if existing_names:
+        raise HTTPException(status_code=409, detail=f"Tags with such names already exist: {sorted(existing_names)}")
+
+    return schemas.BulkCreateResult(ids=crud.create_tags(db, tags))
+
+
+@router.get("/", response_model=list[schemas.TagSummary])
+@cached(list[schemas.TagSummary], tables=TAG_TABLES)
+def get_tags(request: Request, response: Response, skip: int = 0, limit: int = 100,
+             cursor: Cursor | None = Depends(get_cursor),
+             fieldset: schemas.Fieldset = Depends(fieldset_parameters("tag", include_by_default=False)),
+             db: Session = Depends(get_read_db)):
+    tags = crud.get_tags(db, skip=skip, limit=limit, cursor=cursor, profile=fieldset)
+    set_next_page(request, response, tags, limit)
+
+    return tags
 
 
 @router.get("/{tag_id}", response_model=schemas.Tag)
-def get_tag(tag_id: int, db: Session = Depends(get_db)):
-    tag = crud.get_tag_by_id(db, tag_id)
+@cached(schemas.Tag, tables=TAG_TABLES)
+def get_tag(tag_id: int, fieldset: schemas.Fieldset = Depends(fieldset_parameters("tag", include_by_default=True)),
+            db: Session = Depends(get_read_db)):
+    tag = crud.get_tag_by_id(db, tag_id, profile=fieldset)
 
     if tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
@@ -36,21 +67,19 @@ def get_tag(tag_id: int, db: Session = Depends(get_db)):
 
 @router.put("/{tag_id}", response_model=schemas.Tag)
 def update_tag(tag_id: int, tag_schema_updated: schemas.TagUpdate, db: Session = Depends(get_db)):
-    check_tag = crud.get_tag_by_id(db, tag_id)
+    tag = crud.update_tag_base(db, tag_id, tag_schema_updated, profile="tag")
 
-    if check_tag is None:
+    if tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    return crud.update_tag_base(db, tag_id, tag_schema_updated)
+    return tag
 
 
 @router.delete("/{tag_id}", response_model=schemas.Tag)
 def delete_tag(tag_id: int, db: Session = Depends(get_db)):
-    check_tag = crud.get_tag_by_id(db, tag_id)
+    tag = crud.delete_tag(db, tag_id)
 
-    if check_tag is None:
+    if tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    check_tag = crud.delete_tag(db, tag_id)
-
-    return check_tag
+    return tag
@@ -1,16 +1,31 @@
-from fastapi import Depends, HTTPException, status
+from typing import Iterable
+
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 
 from backend import crud
 from backend import schemas
-from backend.dependencies import get_db
+from backend.crud.pagination import Cursor
+from backend.dependencies import AsyncSession, SessionClaims, get_async_read_db, get_db, get_read_db, password_hasher, \
+    session_tokens
+from backend.routers.async_routers import async_endpoint
+from backend.routers.conditional import conditional
+from backend.routers.fieldsets import fieldset_parameters
+from backend.routers.pagination import get_cursor, set_next_page
+from backend.routers.sessions import get_session
+
+router = APIRouter(on_shutdown=[password_hasher.close])
 
-router = APIRouter()
+
+def get_password_db(request: Request, response: Response) -> Iterable[Session]:
+    # Endpoints that hash passwords wait on the hasher's worker processes. With a sync session they stay on the
+    # thread pool when the async stack is enabled, instead of blocking the event loop inside run_sync.
+    yield from get_db(request, response)
 
 
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+def create_user(user: schemas.UserCreate, db: Session = Depends(get_password_db)):
     check_user = crud.get_user_by_login(db, user.login)
 
     if check_user:
@@ -24,14 +39,38 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return crud.create_user(db, user)
 
 
-@router.get("/", response_model=list[schemas.User])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_users(db, skip=skip, limit=limit)
+@router.get("/", response_model=list[schemas.UserSummary])
+@conditional(list[schemas.UserSummary])
+def get_users(request: Request, response: Response, skip: int = 0, limit: int = 100,
+              cursor: Cursor | None = Depends(get_cursor),
+              fieldset: schemas.Fieldset = Depends(fieldset_parameters("user", include_by_default=False)),
+              db: Session = Depends(get_read_db)):
+    users = crud.get_users(db, skip=skip, limit=limit, cursor=cursor, profile=fieldset)
+    set_next_page(request, response, users, limit)
+
+    return users
+
+
+@router.get("/password-hashing/stats")
+def get_password_hashing_stats():
+    return password_hasher.stats()
+
+
+@router.get("/me", response_model=schemas.User)
+def get_current_user(session: SessionClaims = Depends(get_session), db: Session = Depends(get_read_db)):
+    user = crud.get_user_by_id(db, session.user_id, profile="user")
+
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user
 
 
 @router.get("/{user_id}", response_model=schemas.User)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = crud.get_user_by_id(db, user_id)
+@conditional(schemas.User)
+def get_user(user_id: int, fieldset: schemas.Fieldset = Depends(fieldset_parameters("user", include_by_default=True)),
+             db: Session = Depends(get_read_db)):
+    user = crud.get_user_by_id(db, user_id, profile=fieldset)
 
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -40,33 +79,55 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=schemas.User)
-def update_user(user_id: int, user_schema_updated: schemas.UserUpdate, db: Session = Depends(get_db)):
-    check_user = crud.get_user_by_id(db, user_id)
+def update_user(user_id: int, user_schema_updated: schemas.UserUpdate, db: Session = Depends(get_password_db)):
+    user = crud.update_user_base(db, user_id, user_schema_updated, profile="user")
 
-    if check_user is None:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return crud.update_user_base(db, user_id, user_schema_updated)
+    if user_schema_updated.password is not None:
+        session_tokens.revoke_user(user_id, user.sessions_revoked_at)
+
+    return user
 
 
 @router.delete("/{user_id}", response_model=schemas.User)
 def delete_user(user_id: int, db: Session = Depends(get_db)):
-    check_user = crud.get_user_by_id(db, user_id)
+    user = crud.delete_user(db, user_id)
 
-    if check_user is None:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    check_user = crud.delete_user(db, user_id)
+    session_tokens.revoke_user(user_id)
 
-    return check_user
+    return user
 
 
 @router.get("/{user_id}/comments/", response_model=list[schemas.Comment])
-def get_comments_from_user(user_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@conditional(list[schemas.Comment])
+def get_comments_from_user(request: Request, response: Response, user_id: int, skip: int = 0, limit: int = 100,
+                           cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
     if crud.get_user_by_id(db, user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return crud.get_comments_from_user(db, user_id=user_id, skip=skip, limit=limit)
+    comments = crud.get_comments_from_user(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, comments, limit)
+
+    return comments
+
+
+@async_endpoint(get_comments_from_user)
+@conditional(list[schemas.Comment])
+async def get_comments_from_user_async(request: Request, response: Response, user_id: int, skip: int = 0,
+                                       limit: int = 100, cursor: Cursor | None = Depends(get_cursor),
+                                       db: AsyncSession = Depends(get_async_read_db)):
+    if await crud.async_crud.get_user_by_id(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    comments = await crud.async_crud.get_comments_from_user(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, comments, limit)
+
+    return comments
 
 
 @router.post("/{user_id}/comments/", response_model=schemas.Comment, status_code=status.HTTP_201_CREATED)
@@ -81,11 +142,30 @@ def create_comment(user_id: int, artwork_id: int, comment: schemas.CommentCreate
 
 
 @router.get("/{user_id}/reviews/", response_model=list[schemas.Review])
-def get_reviews_from_user(user_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@conditional(list[schemas.Review])
+def get_reviews_from_user(request: Request, response: Response, user_id: int, skip: int = 0, limit: int = 100,
+                          cursor: Cursor | None = Depends(get_cursor), db: Session = Depends(get_read_db)):
     if crud.get_user_by_id(db, user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return crud.get_reviews_from_user(db, user_id=user_id, skip=skip, limit=limit)
+    reviews = crud.get_reviews_from_user(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, reviews, limit)
+
+    return reviews
+
+
+@async_endpoint(get_reviews_from_user)
+@conditional(list[schemas.Review])
+async def get_reviews_from_user_async(request: Request, response: Response, user_id: int, skip: int = 0,
+                                      limit: int = 100, cursor: Cursor | None = Depends(get_cursor),
+                                      db: AsyncSession = Depends(get_async_read_db)):
+    if await crud.async_crud.get_user_by_id(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    reviews = await crud.async_crud.get_reviews_from_user(db, user_id=user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_page(request, response, reviews, limit)
+
+    return reviews
 
 
 @router.post("/{user_id}/reviews/", response_model=schemas.Review, status_code=status.HTTP_201_CREATED)
@@ -102,4 +182,3 @@ def create_review(user_id: int, artwork_id: int, review: schemas.ReviewCreate, d
         raise HTTPException(status_code=400, detail="User with this id already has a review for artwork with this id")
 
     return crud.create_review(db, user_id=user_id, artwork_id=artwork_id, review_schema=review)
-
@@ -1 +1,2 @@
-from .schemas import *
\ No newline at end of file
+from .schemas import *
+from .fieldsets import FIELDSET_SCHEMAS, Fieldset, fieldset_model, fieldset_names
@@ -0,0 +1,64 @@
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+
+from pydantic import BaseModel, create_model, validator
+from pydantic.fields import ModelField
+
+from .schemas import Artwork, Category, Tag, User
+
+# Full response schema per resource, sparse fieldsets pick their fields from it
+FIELDSET_SCHEMAS: dict[str, type[BaseModel]] = {
+    "artwork": Artwork,
+    "category": Category,
+    "tag": Tag,
+    "user": User,
+}
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    # The scalar fields and nested relationships (include) of a resource a response carries, the id always
+    resource: str
+    fields: frozenset[str]
+    include: frozenset[str]
+
+    @property
+    def model(self) -> type[BaseModel]:
+        return fieldset_model(self.resource, self.fields, self.include)
+
+
+def _is_nested(field: ModelField) -> bool:
+    return isinstance(field.type_, type) and issubclass(field.type_, BaseModel)
+
+
+def fieldset_names(resource: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    # (scalar field names, nested field names) of the full schema, in declaration order
+    schema_fields = FIELDSET_SCHEMAS[resource].__fields__.values()
+
+    return (tuple(field.name for field in schema_fields if not _is_nested(field)),
+            tuple(field.name for field in schema_fields if _is_nested(field)))
+
+
+@lru_cache(maxsize=1024)
+def fieldset_model(resource: str, fields: frozenset[str], include: frozenset[str]) -> type[BaseModel]:
+    # A copy of the full schema with only the chosen fields, built once per combination. Field validators come along
+    # with their fields.
+    schema = FIELDSET_SCHEMAS[resource]
+    chosen = [field for name, field in schema.__fields__.items() if name == "id" or name in fields or name in include]
+    validators = {
+        f"{field.name}_{name}": validator(field.name, pre=class_validator.pre, each_item=class_validator.each_item,
+                                          always=class_validator.always, allow_reuse=True)(class_validator.func)
+        for field in chosen for name, class_validator in field.class_validators.items()
+    }
+
+    model = create_model(
+        f"{schema.__name__}Fieldset",
+        __config__=schema.__config__,
+        __validators__=validators,
+        **{field.name: (field.outer_type_, field.field_info) for field in chosen},
+    )
+    # Forward references (e.g. Tag.artworks) resolve against the module of the full schema
+    model.update_forward_refs(**vars(sys.modules[schema.__module__]))
+
+    return model
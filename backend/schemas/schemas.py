@@ -1,6 +1,7 @@
 from datetime import date, datetime
+from enum import Enum
 from typing import Optional
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, HttpUrl, validator
 
 
 # Schemas for COMMENT
@@ -25,6 +26,11 @@ class CommentCreate(CommentBase):
     pass
 
 
+class CommentBulkCreate(CommentCreate):
+    author_id: int
+    artwork_id: int
+
+
 class Comment(CommentBase):
     id: int
     author_id: int
@@ -51,6 +57,11 @@ class ReviewCreate(ReviewBase):
     pass
 
 
+class ReviewBulkCreate(ReviewCreate):
+    author_id: int
+    artwork_id: int
+
+
 class Review(ReviewBase):
     id: int
     author_id: int
@@ -77,8 +88,11 @@ class TagCreate(TagBase):
     pass
 
 
-class Tag(TagBase):
+class TagSummary(TagBase):
     id: int
+
+
+class Tag(TagSummary):
     artworks: list["ArtworkBase"]
 
 
@@ -110,12 +124,87 @@ class ArtworkCreate(ArtworkBase):
     pass
 
 
-class Artwork(ArtworkBase):
+class ArtworkBulkCreate(ArtworkCreate):
+    category_id: int
+
+
+class ArtworkRating(BaseModel):
+    review_count: int
+    average: Optional[float] = None
+    standard_deviation: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ArtworkSummary(ArtworkBase):
     id: int
     category_id: int
+
+
+class Artwork(ArtworkSummary):
     comments: list[Comment]
     reviews: list[Review]
     tags: list[TagBase]
+    rating: ArtworkRating
+
+    @validator("rating", pre=True, always=True)
+    def unrated_artwork(cls, rating):
+        # Artworks that never had a review have no artwork_rating row
+        return ArtworkRating(review_count=0) if rating is None else rating
+
+
+class ArtworkFacets(BaseModel):
+    # Number of matching artworks and one page of their ids
+    total: int
+    artwork_ids: list[int]
+    # Tag/category id -> number of matching artworks that have it
+    tags: dict[int, int]
+    categories: dict[int, int]
+
+
+class SimilarArtwork(BaseModel):
+    similar_artwork_id: int
+    score: float
+    similar_artwork: ArtworkBase
+
+    class Config:
+        orm_mode = True
+
+
+class LeaderboardMetric(str, Enum):
+    average = "average"
+    bayesian_average = "bayesian_average"
+    review_count = "review_count"
+    comment_count = "comment_count"
+    star_rating = "star_rating"
+
+
+class LeaderboardEntry(BaseModel):
+    artwork_id: int
+    score: float
+    artwork: ArtworkBase
+
+    class Config:
+        orm_mode = True
+
+
+class ArtworkTagPair(BaseModel):
+    artwork_id: int
+    tag_id: int
+
+
+class ArtworkTagStatus(str, Enum):
+    attached = "attached"
+    already_attached = "already_attached"
+    detached = "detached"
+    not_attached = "not_attached"
+    artwork_not_found = "artwork_not_found"
+    tag_not_found = "tag_not_found"
+
+
+class ArtworkTagResult(ArtworkTagPair):
+    status: ArtworkTagStatus
 
 
 Tag.update_forward_refs(ArtworkBase=ArtworkBase)
@@ -141,8 +230,11 @@ class CategoryCreate(CategoryBase):
     pass
 
 
-class Category(CategoryBase):
+class CategorySummary(CategoryBase):
     id: int
+
+
+class Category(CategorySummary):
     artworks: list[ArtworkBase]
 
 
@@ -151,7 +243,6 @@ class Category(CategoryBase):
 # ================================================= #
 class UserBase(BaseModel):
     login: str
-    password: str
     email: EmailStr
 
     class Config:
@@ -164,11 +255,56 @@ class UserUpdate(BaseModel):
 
 
 class UserCreate(UserBase):
-    pass
+    password: str
 
 
-class User(UserBase):
+class UserSummary(UserBase):
     id: int
     created_at: datetime
+
+
+class User(UserSummary):
     comments: list[Comment]
     reviews: list[Review]
+
+
+# Schemas for BULK operations
+# ================================================= #
+# ================================================= #
+class BulkCreateResult(BaseModel):
+    ids: list[int]
+
+
+# Schemas for SEARCH
+# ================================================= #
+# ================================================= #
+class SearchIndex(str, Enum):
+    artwork = "artwork"
+    tag = "tag"
+    category = "category"
+
+
+class SearchHit(BaseModel):
+    id: int
+    # bm25() rank, lower is a better match
+    score: float
+    # Matched column -> HTML-escaped text with the matches wrapped in <mark></mark>, long columns are cut to a snippet
+    highlights: dict[str, str]
+
+
+# Schemas for EXPORT and IMPORT
+# ================================================= #
+# ================================================= #
+class CatalogResource(str, Enum):
+    artworks = "artworks"
+    categories = "categories"
+    tags = "tags"
+    users = "users"
+    comments = "comments"
+    reviews = "reviews"
+
+
+class ExportInclude(str, Enum):
+    tags = "tags"
+    reviews = "reviews"
+    comments = "comments"
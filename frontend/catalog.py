@@ -0,0 +1,315 @@
+from typing import Any
+
+import orjson
+import requests
+from fastapi import Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from sqlalchemy.orm import Session
+
+from backend import crud
+from backend import schemas
+from backend.dependencies import get_db, get_read_db, settings
+from backend.routers.artworks import artworks as artwork_endpoints
+from backend.routers.categories import categories as category_endpoints
+from backend.routers.comments import comments as comment_endpoints
+from backend.routers.conditional import render
+from backend.routers.reviews import reviews as review_endpoints
+from backend.routers.tags import tags as tag_endpoints
+from backend.routers.users import users as user_endpoints
+
+# What the pages get from either catalog: the decoded JSON body the API would send, None for a missing row
+Json = Any
+
+
+def _list_fieldset(resource: str) -> schemas.Fieldset:
+    # The default fieldset of the list endpoints, all fields without the nested relationships
+    return schemas.Fieldset(resource, frozenset(schemas.fieldset_names(resource)[0]), frozenset())
+
+
+def _parse(model: type[BaseModel], data: dict) -> BaseModel:
+    # Payloads are validated like request bodies, an invalid one is answered with the same 422 the API sends
+    try:
+        return model.parse_obj(data)
+    except ValidationError as error:
+        raise RequestValidationError([ErrorWrapper(error, loc="body")], body=data) from error
+
+
+class LocalCatalog:
+    # The data behind the pages, read with the crud functions on the session of the page request instead of a
+    # round trip through the app's own HTTP API. Writes go through the API's endpoint functions, so the checks
+    # (duplicate names, missing rows, session revocation) are the ones the API applies.
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _json(response_model: Any, content: Any) -> Json:
+        return None if content is None else orjson.loads(render(response_model, content))
+
+    def _list(self, resource: str, get_rows, **kwargs) -> Json:
+        fieldset = _list_fieldset(resource)
+
+        return self._json(list[fieldset.model], get_rows(self.db, profile=fieldset, **kwargs))
+
+    def artworks(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._list("artwork", crud.get_all_artworks, skip=skip, limit=limit)
+
+    def artwork(self, artwork_id: int) -> Json:
+        return self._json(schemas.Artwork, crud.get_artwork_by_id(self.db, artwork_id, profile="artwork"))
+
+    def artwork_comments(self, artwork_id: int, skip: int = 0, limit: int = 100) -> Json:
+        if crud.get_artwork_by_id(self.db, artwork_id) is None:
+            return None
+
+        return self._json(list[schemas.Comment], crud.get_comments_from_artwork(self.db, artwork_id, skip, limit))
+
+    def artwork_reviews(self, artwork_id: int, skip: int = 0, limit: int = 100) -> Json:
+        if crud.get_artwork_by_id(self.db, artwork_id) is None:
+            return None
+
+        return self._json(list[schemas.Review], crud.get_reviews_from_artwork(self.db, artwork_id, skip, limit))
+
+    def artwork_tags(self, artwork_id: int, skip: int = 0, limit: int = 100) -> Json:
+        if crud.get_artwork_by_id(self.db, artwork_id) is None:
+            return None
+
+        return self._json(list[schemas.Tag],
+                          crud.get_tags_from_artwork(self.db, artwork_id, skip, limit, profile="tag"))
+
+    def categories(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._list("category", crud.get_categories, skip=skip, limit=limit)
+
+    def category(self, category_id: int) -> Json:
+        return self._json(schemas.Category, crud.get_category_by_id(self.db, category_id, profile="category"))
+
+    def category_artworks(self, category_id: int) -> Json:
+        category = self.category(category_id)
+
+        return None if category is None else category["artworks"]
+
+    def comments(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._json(list[schemas.Comment], crud.get_all_comments(self.db, skip, limit))
+
+    def comment(self, comment_id: int) -> Json:
+        return self._json(schemas.Comment, crud.get_comment_by_id(self.db, comment_id))
+
+    def reviews(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._json(list[schemas.Review], crud.get_all_reviews(self.db, skip, limit))
+
+    def review(self, review_id: int) -> Json:
+        return self._json(schemas.Review, crud.get_review_by_id(self.db, review_id))
+
+    def tags(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._list("tag", crud.get_tags, skip=skip, limit=limit)
+
+    def tag(self, tag_id: int) -> Json:
+        return self._json(schemas.Tag, crud.get_tag_by_id(self.db, tag_id, profile="tag"))
+
+    def users(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._list("user", crud.get_users, skip=skip, limit=limit)
+
+    def user(self, user_id: int) -> Json:
+        return self._json(schemas.User, crud.get_user_by_id(self.db, user_id, profile="user"))
+
+    def user_comments(self, user_id: int, skip: int = 0, limit: int = 100) -> Json:
+        if crud.get_user_by_id(self.db, user_id) is None:
+            return None
+
+        return self._json(list[schemas.Comment], crud.get_comments_from_user(self.db, user_id, skip, limit))
+
+    def user_reviews(self, user_id: int, skip: int = 0, limit: int = 100) -> Json:
+        if crud.get_user_by_id(self.db, user_id) is None:
+            return None
+
+        return self._json(list[schemas.Review], crud.get_reviews_from_user(self.db, user_id, skip, limit))
+
+    def create_tag(self, data: dict) -> Json:
+        return self._json(schemas.Tag, tag_endpoints.create_tag(_parse(schemas.TagCreate, data), self.db))
+
+    def update_tag(self, tag_id: int, data: dict) -> Json:
+        return self._json(schemas.Tag, tag_endpoints.update_tag(tag_id, _parse(schemas.TagUpdate, data), self.db))
+
+    def create_category(self, data: dict) -> Json:
+        return self._json(schemas.Category,
+                          category_endpoints.create_category(_parse(schemas.CategoryCreate, data), self.db))
+
+    def update_category(self, category_id: int, data: dict) -> Json:
+        return self._json(schemas.Category, category_endpoints.update_category(
+            category_id, _parse(schemas.CategoryUpdate, data), self.db))
+
+    def delete_category(self, category_id: int) -> Json:
+        return self._json(schemas.Category, category_endpoints.delete_category(category_id, self.db))
+
+    def create_artwork(self, category_id: int, data: dict) -> Json:
+        return self._json(schemas.Artwork, category_endpoints.create_artwork(
+            category_id, _parse(schemas.ArtworkCreate, data), self.db))
+
+    def update_artwork(self, artwork_id: int, data: dict) -> Json:
+        return self._json(schemas.Artwork, artwork_endpoints.update_artwork(
+            artwork_id, _parse(schemas.ArtworkUpdate, data), self.db))
+
+    def remove_artwork_tag(self, artwork_id: int, tag_id: int) -> Json:
+        return self._json(schemas.Artwork, artwork_endpoints.remove_tag_from_artwork(artwork_id, tag_id, self.db))
+
+    def update_comment(self, comment_id: int, data: dict) -> Json:
+        return self._json(schemas.Comment, comment_endpoints.update_comment(
+            comment_id, _parse(schemas.CommentUpdate, data), self.db))
+
+    def update_review(self, review_id: int, data: dict) -> Json:
+        return self._json(schemas.Review, review_endpoints.update_review(
+            review_id, _parse(schemas.ReviewUpdate, data), self.db))
+
+    def create_user(self, data: dict) -> Json:
+        return self._json(schemas.User, user_endpoints.create_user(_parse(schemas.UserCreate, data), self.db))
+
+    def update_user(self, user_id: int, data: dict) -> Json:
+        return self._json(schemas.User, user_endpoints.update_user(user_id, _parse(schemas.UserUpdate, data), self.db))
+
+    def create_user_comment(self, user_id: int, artwork_id: int, data: dict) -> Json:
+        return self._json(schemas.Comment, user_endpoints.create_comment(
+            user_id, artwork_id, _parse(schemas.CommentCreate, data), self.db))
+
+    def create_user_review(self, user_id: int, artwork_id: int, data: dict) -> Json:
+        return self._json(schemas.Review, user_endpoints.create_review(
+            user_id, artwork_id, _parse(schemas.ReviewCreate, data), self.db))
+
+
+class RemoteCatalog:
+    # The same pages served from an API running elsewhere, over one pooled HTTP session
+    def __init__(self, base_url: str, timeout_seconds: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        self.session = requests.Session()
+
+    def _send(self, method: str, path: str, data: dict | None = None, **params: Any) -> Json:
+        response = self.session.request(method, f"{self.base_url}{path}", params=params or None,
+                                        json=None if data is None else jsonable_encoder(data),
+                                        timeout=self.timeout_seconds)
+
+        if response.status_code == 404 and method == "GET":
+            return None
+
+        if not response.ok:
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = response.text
+
+            raise HTTPException(status_code=response.status_code, detail=detail)
+
+        return response.json()
+
+    def artworks(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", "/artworks/", skip=skip, limit=limit)
+
+    def artwork(self, artwork_id: int) -> Json:
+        return self._send("GET", f"/artworks/{artwork_id}")
+
+    def artwork_comments(self, artwork_id: int, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", f"/artworks/{artwork_id}/comments/", skip=skip, limit=limit)
+
+    def artwork_reviews(self, artwork_id: int, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", f"/artworks/{artwork_id}/reviews/", skip=skip, limit=limit)
+
+    def artwork_tags(self, artwork_id: int, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", f"/artworks/{artwork_id}/tags/", skip=skip, limit=limit)
+
+    def categories(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", "/categories/", skip=skip, limit=limit)
+
+    def category(self, category_id: int) -> Json:
+        return self._send("GET", f"/categories/{category_id}")
+
+    def category_artworks(self, category_id: int) -> Json:
+        category = self._send("GET", f"/categories/{category_id}", fields="id", include="artworks")
+
+        return None if category is None else category["artworks"]
+
+    def comments(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", "/comments/", skip=skip, limit=limit)
+
+    def comment(self, comment_id: int) -> Json:
+        return self._send("GET", f"/comments/{comment_id}")
+
+    def reviews(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", "/reviews/", skip=skip, limit=limit)
+
+    def review(self, review_id: int) -> Json:
+        return self._send("GET", f"/reviews/{review_id}")
+
+    def tags(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", "/tags/", skip=skip, limit=limit)
+
+    def tag(self, tag_id: int) -> Json:
+        return self._send("GET", f"/tags/{tag_id}")
+
+    def users(self, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", "/users/", skip=skip, limit=limit)
+
+    def user(self, user_id: int) -> Json:
+        return self._send("GET", f"/users/{user_id}")
+
+    def user_comments(self, user_id: int, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", f"/users/{user_id}/comments/", skip=skip, limit=limit)
+
+    def user_reviews(self, user_id: int, skip: int = 0, limit: int = 100) -> Json:
+        return self._send("GET", f"/users/{user_id}/reviews/", skip=skip, limit=limit)
+
+    def create_tag(self, data: dict) -> Json:
+        return self._send("POST", "/tags/", data)
+
+    def update_tag(self, tag_id: int, data: dict) -> Json:
+        return self._send("PUT", f"/tags/{tag_id}", data)
+
+    def create_category(self, data: dict) -> Json:
+        return self._send("POST", "/categories/", data)
+
+    def update_category(self, category_id: int, data: dict) -> Json:
+        return self._send("PUT", f"/categories/{category_id}", data)
+
+    def delete_category(self, category_id: int) -> Json:
+        return self._send("DELETE", f"/categories/{category_id}")
+
+    def create_artwork(self, category_id: int, data: dict) -> Json:
+        return self._send("POST", f"/categories/{category_id}/artworks", data)
+
+    def update_artwork(self, artwork_id: int, data: dict) -> Json:
+        return self._send("PUT", f"/artworks/{artwork_id}", data)
+
+    def remove_artwork_tag(self, artwork_id: int, tag_id: int) -> Json:
+        return self._send("DELETE", f"/artworks/{artwork_id}/tags/{tag_id}")
+
+    def update_comment(self, comment_id: int, data: dict) -> Json:
+        return self._send("PUT", f"/comments/{comment_id}", data)
+
+    def update_review(self, review_id: int, data: dict) -> Json:
+        return self._send("PUT", f"/reviews/{review_id}", data)
+
+    def create_user(self, data: dict) -> Json:
+        return self._send("POST", "/users/", data)
+
+    def update_user(self, user_id: int, data: dict) -> Json:
+        return self._send("PUT", f"/users/{user_id}", data)
+
+    def create_user_comment(self, user_id: int, artwork_id: int, data: dict) -> Json:
+        return self._send("POST", f"/users/{user_id}/comments/", data, artwork_id=artwork_id)
+
+    def create_user_review(self, user_id: int, artwork_id: int, data: dict) -> Json:
+        return self._send("POST", f"/users/{user_id}/reviews/", data, artwork_id=artwork_id)
+
+
+Catalog = LocalCatalog | RemoteCatalog
+
+remote_catalog = RemoteCatalog(settings.frontend_backend_url, settings.frontend_backend_timeout_seconds) \
+    if settings.frontend_backend_url else None
+
+
+def get_catalog(db: Session = Depends(get_read_db)) -> Catalog:
+    # Sessions connect on first use, the remote mode never touches the one it is handed
+    return LocalCatalog(db) if remote_catalog is None else remote_catalog
+
+
+def get_write_catalog(db: Session = Depends(get_db)) -> Catalog:
+    return LocalCatalog(db) if remote_catalog is None else remote_catalog
@@ -1,14 +1,17 @@
-from fastapi import FastAPI, Request
+from functools import partial
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.templating import Jinja2Templates
-import requests
 from fastapi.staticfiles import StaticFiles
 
-from backend.dependencies import close_db_state, db_state, metadata
+from backend.dependencies import close_async_db_state, close_db_state, db_state, init_db_state
 from backend.routers import artworks as artworks_router
+from backend.routers.async_routers import select_router
+from frontend.catalog import Catalog, get_catalog, get_write_catalog
 
 app = FastAPI(
-    on_startup=[lambda: metadata.create_all(bind=db_state.engine)],
-    on_shutdown=[lambda: close_db_state(db_state)],
+    on_startup=[lambda: init_db_state(db_state)],
+    on_shutdown=[lambda: close_db_state(db_state), partial(close_async_db_state, db_state)],
 )
 tags_metadata = [
     {
@@ -20,7 +23,7 @@ tags_metadata = [
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
 
-app.include_router(router=artworks_router.router, prefix="/artworks", tags=["crud - artworks"])
+app.include_router(router=select_router(artworks_router.router), prefix="/artworks", tags=["crud - artworks"])
 
 
 # @app.get("/get-artworks", response_class=HTMLResponse)
@@ -85,51 +88,25 @@ app.include_router(router=artworks_router.router, prefix="/artworks", tags=["cru
 #     updated_artwork = response.json()
 #     return templates.TemplateResponse("updated_artwork.html", {"request": request, "artwork": updated_artwork})
 @app.get("/get-categories/{category_id}/artworks")
-def show_artworks_in_category(request: Request, artwork_data: dict, category_id: int):
-    response = requests.get(f"http://127.0.0.1:8000/categories/{category_id}/artworks", json=artwork_data)
-    new_artwork = response.json()
+def show_artworks_in_category(request: Request, category_id: int, catalog: Catalog = Depends(get_catalog)):
+    new_artwork = catalog.category_artworks(category_id)
     return templates.TemplateResponse("show_artwork.html", {"request": request, "artwork": new_artwork})
 
 
 @app.get("/post-categories-form/{category_id}/artworks")
-def create_artworks_in_category(request: Request, category_id: int):
-    artwork_data = {
-        "title": "string",
-        "description": "string",
-        "poster_url": "string",
-        "release_date": "2023-06-09",
-        "age_rating": "string",
-        "star_rating": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/categories/{category_id}/artworks", json=artwork_data)
-    new_artwork = response.json()
+def create_artworks_in_category(request: Request, category_id: int, catalog: Catalog = Depends(get_catalog)):
+    new_artwork = catalog.category_artworks(category_id)
     return templates.TemplateResponse("create_artwork.html", {"request": request, "artwork": new_artwork})
 
 
 @app.get("/get-artworks/{artwork_id}/tags")
-def get_tags_in_artwork(request: Request, artwork_id: int):
-    artwork_data = {
-        "name": "string",
-        "description": "string",
-        "id": 0,
-        "artworks": [
-            {
-                "title": "string",
-                "description": "string",
-                "poster_url": "string",
-                "release_date": "2023-06-18",
-                "age_rating": "string",
-                "star_rating": 0
-            }
-        ]
-    }
-    response = requests.get(f"http://127.0.0.1:8000/artworks/{artwork_id}/tags", json=artwork_data)
-    new_artwork = response.json()
+def get_tags_in_artwork(request: Request, artwork_id: int, catalog: Catalog = Depends(get_catalog)):
+    new_artwork = catalog.artwork_tags(artwork_id)
     return templates.TemplateResponse("artworks-single.html", {"request": request, "artwork": new_artwork})
 
 
 @app.post("/post-categories/{category_id}/artworks")
-def create_artworks_in_category(request: Request, category_id: int):
+def create_artworks_in_category(request: Request, category_id: int, catalog: Catalog = Depends(get_write_catalog)):
     artwork_data = {
         "title": "string",
         "description": "string",
@@ -138,112 +115,30 @@ def create_artworks_in_category(request: Request, category_id: int):
         "age_rating": "string",
         "star_rating": 0
     }
-    response = requests.post(f"http://127.0.0.1:8000/categories/{category_id}/artworks", json=artwork_data)
-    new_artwork = response.json()
+    new_artwork = catalog.create_artwork(category_id, artwork_data)
     return templates.TemplateResponse("create_artwork.html", {"request": request, "artwork": new_artwork})
 
 
 @app.get("/get-artworks")
-def show_artworks(request: Request):
-    artwork_data = {
-        "title": "string",
-        "description": "string",
-        "poster_url": "string",
-        "release_date": "2023-06-09",
-        "age_rating": "string",
-        "star_rating": 0,
-        "id": 0,
-        "category_id": 0,
-        "comments":
-            {
-                "text": "string",
-                "likes": 0,
-                "dislikes": 0,
-                "id": 0,
-                "author_id": 0,
-                "artwork_id": 0
-            }
-        ,
-        "reviews":
-            {
-                "text": "string",
-                "score": 0,
-                "id": 0,
-                "author_id": 0,
-                "artwork_id": 0
-            }
-        ,
-        "tags":
-            {
-                "name": "string",
-                "description": "string"
-            }
-
-    }
-    response = requests.get("http://127.0.0.1:8000/artworks", json=artwork_data)
-    new_artwork = response.json()
+def show_artworks(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_artwork = catalog.artworks()
     return templates.TemplateResponse("artworks.html", {"request": request, "artwork": new_artwork})
 
 
 @app.get("/get-artworks/{artwork_id}")
-def get_artwork(request: Request):
-    artwork_id = {
-        "title": "string",
-        "description": "string",
-        "poster_url": "string",
-        "release_date": "2023-06-09",
-        "age_rating": "string",
-        "star_rating": 0,
-        "id": 0,
-        "category_id": 0,
-        "comments": [
-            {
-                "text": "string",
-                "likes": 0,
-                "dislikes": 0,
-                "id": 0,
-                "author_id": 0,
-                "artwork_id": 0
-            }
-        ],
-        "reviews": [
-            {
-                "text": "string",
-                "score": 0,
-                "id": 0,
-                "author_id": 0,
-                "artwork_id": 0
-            }
-        ],
-        "tags": [
-            {
-                "name": "string",
-                "description": "string"
-            }
-        ]
-    }
-    response = requests.get(f"http://127.0.0.1:8000/artworks/{artwork_id}")
-    artwork_data = response.json()
+def get_artwork(request: Request, artwork_id: int, catalog: Catalog = Depends(get_catalog)):
+    artwork_data = catalog.artwork(artwork_id)
     return templates.TemplateResponse("show_artwork.html", {"request": request, "artwork": artwork_data})
 
 
 @app.get("/put-artworks-form/{artwork_id}")
-def update_artwork(request: Request, artwork_id: int):
-    new_data = {
-        "title": "string",
-        "description": "string",
-        "poster_url": "string",
-        "release_date": "2023-06-09",
-        "age_rating": "string",
-        "star_rating": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/artworks/{artwork_id}", json=new_data)
-    updated_artwork = response.json()
+def update_artwork(request: Request, artwork_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_artwork = catalog.artwork(artwork_id)
     return templates.TemplateResponse("artwork_update.html", {"request": request, "artwork": updated_artwork})
 
 
 @app.put("/put-artworks/{artwork_id}")
-def update_artwork(request: Request, artwork_id: int):
+def update_artwork(request: Request, artwork_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "title": "string",
         "description": "string",
@@ -252,43 +147,23 @@ def update_artwork(request: Request, artwork_id: int):
         "age_rating": "string",
         "star_rating": 0
     }
-    response = requests.put(f"http://127.0.0.1:8000/artworks/{artwork_id}", json=new_data)
-    updated_artwork = response.json()
+    updated_artwork = catalog.update_artwork(artwork_id, new_data)
     return templates.TemplateResponse("artwork_update.html", {"request": request, "artwork": updated_artwork})
 
 
 @app.get("/get-artworks/{artwork_id}/comments")
-def get_artwork_comments(request: Request, artwork_id: int):
-    artwork_data = {
-
-        "text": "string",
-        "likes": 0,
-        "dislikes": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/artworks/{artwork_id}/comments", json=artwork_data)
-    artwork_data = response.json()
+def get_artwork_comments(request: Request, artwork_id: int, catalog: Catalog = Depends(get_catalog)):
+    artwork_data = catalog.artwork_comments(artwork_id)
     return templates.TemplateResponse("artwork_comment.html", {"request": request, "artwork": artwork_data})
 
 
 @app.get("/get-artworks/{artwork_id}/reviews")
-def get_artwork_reviews(request: Request, artwork_id: int):
-    artwork_data = {
-        "text": "string",
-        "score": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/artworks/{artwork_id}/reviews", json=artwork_data)
-    artwork_data = response.json()
+def get_artwork_reviews(request: Request, artwork_id: int, catalog: Catalog = Depends(get_catalog)):
+    artwork_data = catalog.artwork_reviews(artwork_id)
     return templates.TemplateResponse("artwork_review.html", {"request": request, "artwork": artwork_data})
 
 
 @app.delete("/remove-tag/{artwork_id}/{tag_id}")
-def remove_tag(request: Request, artwork_id: int, tag_id: int):
-    response = requests.delete(f"http://127.0.0.1:8000/artworks/{artwork_id}/tags/{tag_id}")
-    updated_artwork = response.json()
+def remove_tag(request: Request, artwork_id: int, tag_id: int, catalog: Catalog = Depends(get_write_catalog)):
+    updated_artwork = catalog.remove_artwork_tag(artwork_id, tag_id)
     return templates.TemplateResponse("updated_artwork.html", {"request": request, "artwork": updated_artwork})
@@ -1,14 +1,17 @@
-from fastapi import FastAPI, Request
+from functools import partial
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.templating import Jinja2Templates
-import requests
 from starlette.staticfiles import StaticFiles
 
-from backend.dependencies import close_db_state, db_state, metadata
+from backend.dependencies import close_async_db_state, close_db_state, db_state, init_db_state
 from backend.routers import categories as categories_router
+from backend.routers.async_routers import select_router
+from frontend.catalog import Catalog, get_catalog, get_write_catalog
 
 app = FastAPI(
-    on_startup=[lambda: metadata.create_all(bind=db_state.engine)],
-    on_shutdown=[lambda: close_db_state(db_state)],
+    on_startup=[lambda: init_db_state(db_state)],
+    on_shutdown=[lambda: close_db_state(db_state), partial(close_async_db_state, db_state)],
 )
 tags_metadata = [
     {
@@ -18,89 +21,54 @@ tags_metadata = [
 ]
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
-app.include_router(router=categories_router.router, prefix="/categories", tags=["crud - categories"])
+app.include_router(router=select_router(categories_router.router), prefix="/categories", tags=["crud - categories"])
 
 # Route for categories
 @app.get("/get-categories")
-def show_categories(request: Request):
-    category_data = {
-        "name": "string",
-        "description": "string"
-    }
-    response = requests.get("http://127.0.0.1:8000/categories", json=category_data)
-    new_category = response.json()
+def show_categories(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_category = catalog.categories()
     return templates.TemplateResponse("categories.html", {"request": request, "category": new_category})
 
 
 @app.get("/post-categories-form")
-def create_category(request: Request):
-    category_data = {
-        "name": "string",
-        "description": "string"
-    }
-    response = requests.get("http://127.0.0.1:8000/categories", json=category_data)
-    new_category = response.json()
+def create_category(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_category = catalog.categories()
     return templates.TemplateResponse("category_created.html", {"request": request, "category": new_category})
 
 
 @app.post("/post-categories")
-def create_category(request: Request):
+def create_category(request: Request, catalog: Catalog = Depends(get_write_catalog)):
     category_data = {
         "name": "string",
         "description": "string"
     }
-    response = requests.post("http://127.0.0.1:8000/categories", json=category_data)
-    new_category = response.json()
+    new_category = catalog.create_category(category_data)
     return templates.TemplateResponse("category_created.html", {"request": request, "category": new_category})
 
 
 @app.get("/get-categories/{category_id}")
-def get_category(request: Request, category_id: int):
-    category_data = {
-        "name": "string",
-        "description": "string",
-        "id": 0,
-        "artworks": [
-            {
-                "title": "string",
-                "description": "string",
-                "poster_url": "string",
-                "release_date": "2023-06-09",
-                "age_rating": "string",
-                "star_rating": 0
-            }
-        ]
-    }
-    response = requests.get(f"http://127.0.0.1:8000/categories/{category_id}", json=category_data)
-    category_data = response.json()
+def get_category(request: Request, category_id: int, catalog: Catalog = Depends(get_catalog)):
+    category_data = catalog.category(category_id)
     return templates.TemplateResponse("category.html", {"request": request, "category": category_data})
 
 
 @app.get("/put-categories-form/{category_id}")
-def update_category(request: Request, category_id: int):
-    new_data = {
-        "name": "string",
-        "description": "string"
-    }
-    response = requests.get(f"http://127.0.0.1:8000/categories/{category_id}", json=new_data)
-    updated_category = response.json()
+def update_category(request: Request, category_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_category = catalog.category(category_id)
     return templates.TemplateResponse("category_updated.html", {"request": request, "category": updated_category})
 
 
 @app.put("/put-categories/{category_id}")
-def update_category(request: Request, category_id: int):
+def update_category(request: Request, category_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "name": "string",
         "description": "string"
     }
-    response = requests.put(f"http://127.0.0.1:8000/categories/{category_id}", json=new_data)
-    updated_category = response.json()
+    updated_category = catalog.update_category(category_id, new_data)
     return templates.TemplateResponse("category_updated.html", {"request": request, "category": updated_category})
 
 
 @app.delete("/remove-tag/{category_id}")
-def remove_category(request: Request, category_id: int):
-    response = requests.delete(f"http://127.0.0.1:8000/artworks/{category_id}")
-    updated_category = response.json()
+def remove_category(request: Request, category_id: int, catalog: Catalog = Depends(get_write_catalog)):
+    updated_category = catalog.delete_category(category_id)
     return templates.TemplateResponse("category.html", {"request": request, "artwork": updated_category})
-
@@ -1,14 +1,17 @@
-from fastapi import FastAPI, Request
+from functools import partial
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.templating import Jinja2Templates
-import requests
 from fastapi.staticfiles import StaticFiles
 
-from backend.dependencies import close_db_state, db_state, metadata
+from backend.dependencies import close_async_db_state, close_db_state, db_state, init_db_state
 from backend.routers import comments as comments_router
+from backend.routers.async_routers import select_router
+from frontend.catalog import Catalog, get_catalog, get_write_catalog
 
 app = FastAPI(
-    on_startup=[lambda: metadata.create_all(bind=db_state.engine)],
-    on_shutdown=[lambda: close_db_state(db_state)],
+    on_startup=[lambda: init_db_state(db_state)],
+    on_shutdown=[lambda: close_db_state(db_state), partial(close_async_db_state, db_state)],
 )
 tags_metadata = [
     {
@@ -20,9 +23,9 @@ tags_metadata = [
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
 
-app.include_router(router=comments_router.router, prefix="/comments", tags=["crud - comments"])
+app.include_router(router=select_router(comments_router.router), prefix="/comments", tags=["crud - comments"])
 @app.post("/get-get-form-comments")
-def create_comment(request: Request):
+def create_comment(request: Request, catalog: Catalog = Depends(get_write_catalog)):
     comment_data = {
         "text": "string",
         "likes": 0,
@@ -31,60 +34,34 @@ def create_comment(request: Request):
         "author_id": 0,
         "artwork_id": 0
     }
-    response = requests.post("http://127.0.0.1:8000/comments", json=comment_data)
-    new_comment = response.json()
+    new_comment = catalog.create_user_comment(comment_data["author_id"], comment_data["artwork_id"], comment_data)
     return templates.TemplateResponse("comment_create.html", {"request": request, "comment": new_comment})
 
 
 @app.get("/get-get-comments")
-def create_comment(request: Request):
-    comment_data = {
-        "text": "string",
-        "likes": 0,
-        "dislikes": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get("http://127.0.0.1:8000/comments", json=comment_data)
-    new_comment = response.json()
+def create_comment(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_comment = catalog.comments()
     return templates.TemplateResponse("comment_create.html", {"request": request, "comment": new_comment})
 
 
 @app.get("/get-comments/{comment_id}")
-def get_comment(request: Request, comment_id: int):
-    comment_data = {
-        "text": "string",
-        "likes": 0,
-        "dislikes": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/comments/{comment_id}", json=comment_data)
-    comment_data = response.json()
+def get_comment(request: Request, comment_id: int, catalog: Catalog = Depends(get_catalog)):
+    comment_data = catalog.comment(comment_id)
     return templates.TemplateResponse("comment.html", {"request": request, "comment": comment_data})
 
 
 @app.get("/put-comments-form/{comment_id}")
-def update_comment(request: Request, comment_id: int):
-    new_data = {
-        "text": "string",
-        "likes": 0,
-        "dislikes": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/comments/{comment_id}", json=new_data)
-    updated_comment = response.json()
+def update_comment(request: Request, comment_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_comment = catalog.comment(comment_id)
     return templates.TemplateResponse("comment_update.html", {"request": request, "comment": updated_comment})
 
 
 @app.put("/put-comments/{comment_id}")
-def update_comment(request: Request, comment_id: int):
+def update_comment(request: Request, comment_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "text": "string",
         "likes": 0,
         "dislikes": 0
     }
-    response = requests.put(f"http://127.0.0.1:8000/comments/{comment_id}", json=new_data)
-    updated_comment = response.json()
+    updated_comment = catalog.update_comment(comment_id, new_data)
     return templates.TemplateResponse("comment_update.html", {"request": request, "comment": updated_comment})
@@ -1,14 +1,17 @@
-from fastapi import FastAPI, Request
+from functools import partial
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.templating import Jinja2Templates
-import requests
 from fastapi.staticfiles import StaticFiles
 
-from backend.dependencies import close_db_state, db_state, metadata
+from backend.dependencies import close_async_db_state, close_db_state, db_state, init_db_state
 from backend.routers import reviews as reviews_router
+from backend.routers.async_routers import select_router
+from frontend.catalog import Catalog, get_catalog, get_write_catalog
 
 app = FastAPI(
-    on_startup=[lambda: metadata.create_all(bind=db_state.engine)],
-    on_shutdown=[lambda: close_db_state(db_state)],
+    on_startup=[lambda: init_db_state(db_state)],
+    on_shutdown=[lambda: close_db_state(db_state), partial(close_async_db_state, db_state)],
 )
 tags_metadata = [
     {
@@ -20,51 +23,27 @@ tags_metadata = [
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
 
-app.include_router(router=reviews_router.router, prefix="/reviews", tags=["crud - reviews"])
+app.include_router(router=select_router(reviews_router.router), prefix="/reviews", tags=["crud - reviews"])
 @app.get("/get-reviews")
-def show_reviews(request: Request, review_data: dict):
-    review_data = {
-        "text": "string",
-        "score": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get("http://127.0.0.1:8000/reviews", json=review_data)
-    new_review = response.json()
+def show_reviews(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_review = catalog.reviews()
     return templates.TemplateResponse("reviews.html", {"request": request, "review": new_review})
 
 
 @app.get("/get-reviews/{review_id}")
-def get_review(request: Request, review_id: int):
-    review_data = {
-        "text": "string",
-        "score": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/reviews/{review_id}", json=review_data)
-    review_data = response.json()
+def get_review(request: Request, review_id: int, catalog: Catalog = Depends(get_catalog)):
+    review_data = catalog.review(review_id)
     return templates.TemplateResponse("review.html", {"request": request, "review": review_data})
 
 
 @app.get("/put-reviews-form/{review_id}")
-def update_review(request: Request, review_id: int):
-    new_data = {
-        "text": "string",
-        "score": 0,
-        "id": 0,
-        "author_id": 0,
-        "artwork_id": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/reviews/{review_id}", json=new_data)
-    updated_review = response.json()
+def update_review(request: Request, review_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_review = catalog.review(review_id)
     return templates.TemplateResponse("review_update.html", {"request": request, "review": updated_review})
 
 
 @app.put("/put-reviews/{review_id}")
-def update_review(request: Request, review_id: int):
+def update_review(request: Request, review_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "text": "string",
         "score": 0,
@@ -72,7 +51,5 @@ def update_review(request: Request, review_id: int):
         "author_id": 0,
         "artwork_id": 0
     }
-    response = requests.put(f"http://127.0.0.1:8000/reviews/{review_id}", json=new_data)
-    updated_review = response.json()
+    updated_review = catalog.update_review(review_id, new_data)
     return templates.TemplateResponse("review_update.html", {"request": request, "review": updated_review})
-
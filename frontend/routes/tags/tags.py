@@ -1,14 +1,17 @@
-from fastapi import FastAPI, Request
+from functools import partial
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.templating import Jinja2Templates
-import requests
 from fastapi.staticfiles import StaticFiles
 
-from backend.dependencies import close_db_state, db_state, metadata
+from backend.dependencies import close_async_db_state, close_db_state, db_state, init_db_state
 from backend.routers import tags as tags_router
+from backend.routers.async_routers import select_router
+from frontend.catalog import Catalog, get_catalog, get_write_catalog
 
 app = FastAPI(
-    on_startup=[lambda: metadata.create_all(bind=db_state.engine)],
-    on_shutdown=[lambda: close_db_state(db_state)],
+    on_startup=[lambda: init_db_state(db_state)],
+    on_shutdown=[lambda: close_db_state(db_state), partial(close_async_db_state, db_state)],
 )
 tags_metadata = [
     {
@@ -20,81 +23,47 @@ tags_metadata = [
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
 
-app.include_router(router=tags_router.router, prefix="/tags", tags=["crud - tags"])
+app.include_router(router=select_router(tags_router.router), prefix="/tags", tags=["crud - tags"])
 
 @app.get("/get-tags/{tag_id}")
-def get_tag(request: Request, tag_id: int):
-    tag_data = {
-        "name": "string",
-        "description": "string",
-        "id": 0,
-        "artworks": [
-            {
-                "title": "string",
-                "description": "string",
-                "poster_url": "string",
-                "release_date": "2023-06-09",
-                "age_rating": "string",
-                "star_rating": 0
-            }
-        ]
-    }
-    response = requests.get(f"http://127.0.0.1:8000/tags/{tag_id}", json=tag_data)
-    tag_data = response.json()
+def get_tag(request: Request, tag_id: int, catalog: Catalog = Depends(get_catalog)):
+    tag_data = catalog.tag(tag_id)
     return templates.TemplateResponse("tag.html", {"request": request, "tag": tag_data})
 
 
 @app.get("/put-tags-form/{tag_id}")
-def update_tag(request: Request, tag_id: int):
-    new_data = {
-        "name": "string",
-        "description": "string"
-    }
-    response = requests.get(f"http://127.0.0.1:8000/tags/{tag_id}", json=new_data)
-    updated_tag = response.json()
+def update_tag(request: Request, tag_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_tag = catalog.tag(tag_id)
     return templates.TemplateResponse("tag_update.html", {"request": request, "tag": updated_tag})
 
 
 @app.put("/put-tags/{tag_id}")
-def update_tag(request: Request, tag_id: int):
+def update_tag(request: Request, tag_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "name": "string",
         "description": "string"
     }
-    response = requests.put(f"http://127.0.0.1:8000/tags/{tag_id}", json=new_data)
-    updated_tag = response.json()
+    updated_tag = catalog.update_tag(tag_id, new_data)
     return templates.TemplateResponse("tag_update.html", {"request": request, "tag": updated_tag})
 
 
 @app.get("/get-tags")
-def show_tags(request: Request):
-    tag_data = {
-        "name": "string",
-        "description": "string"
-    }
-    response = requests.get("http://127.0.0.1:8000/tags/", json=tag_data)
-    new_tag = response.json()
+def show_tags(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_tag = catalog.tags()
     return templates.TemplateResponse("tags.html", {"request": request, "tag": new_tag})
 
 
 @app.get("/create-tag-form")
-def create_tag(request: Request):
-    tag_data = {
-        "name": "",
-        "description": ""
-    }
-    response = requests.get("http://127.0.0.1:8000/tags/", json=tag_data)
-    new_tag = response.json()
+def create_tag(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_tag = catalog.tags()
     return templates.TemplateResponse("tag_create.html", {"request": request, "tag": new_tag})
 
 
 @app.post("/create-tag")
-def create_tag(request: Request):
+def create_tag(request: Request, catalog: Catalog = Depends(get_write_catalog)):
     tag_data = {
         "name": "string",
         "description": "string"
     }
-    response = requests.post("http://127.0.0.1:8000/tags/", json=tag_data)
-    new_tag = response.json()
+    new_tag = catalog.create_tag(tag_data)
     return templates.TemplateResponse("tag_create.html", {"request": request, "tag": new_tag})
-
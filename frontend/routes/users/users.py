@@ -1,14 +1,17 @@
-from fastapi import FastAPI, Request
+from functools import partial
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.templating import Jinja2Templates
-import requests
 from fastapi.staticfiles import StaticFiles
 
-from backend.dependencies import close_db_state, db_state, metadata
+from backend.dependencies import close_async_db_state, close_db_state, db_state, init_db_state
 from backend.routers import users as users_router
+from backend.routers.async_routers import select_router
+from frontend.catalog import Catalog, get_catalog, get_write_catalog
 
 app = FastAPI(
-    on_startup=[lambda: metadata.create_all(bind=db_state.engine)],
-    on_shutdown=[lambda: close_db_state(db_state)],
+    on_startup=[lambda: init_db_state(db_state)],
+    on_shutdown=[lambda: close_db_state(db_state), partial(close_async_db_state, db_state)],
 )
 tags_metadata = [
     {
@@ -20,119 +23,81 @@ tags_metadata = [
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 templates = Jinja2Templates(directory="frontend/templates")
 
-app.include_router(router=users_router.router, prefix="/users", tags=["crud - users"])
+app.include_router(router=select_router(users_router.router), prefix="/users", tags=["crud - users"])
 
 @app.get("/get-users")
-def show_users(request: Request):
-    user_data = {
-        "login": "string",
-        "password": "string",
-        "email": "user@example.com"
-    }
-    response = requests.get("http://127.0.0.1:8000/users/", json=user_data)
-    new_user = response.json()
+def show_users(request: Request, catalog: Catalog = Depends(get_catalog)):
+    new_user = catalog.users()
     return templates.TemplateResponse("users.html", {"request": request, "users": new_user})
 
 
 @app.post("/make-users")
-def create_user(request: Request):
+def create_user(request: Request, catalog: Catalog = Depends(get_write_catalog)):
     user_data = {
         "login": "string",
         "password": "string",
         "email": "user@example.com"
     }
-    response = requests.post("http://127.0.0.1:8000/users/", json=user_data)
-    new_user = response.json()
+    new_user = catalog.create_user(user_data)
     return templates.TemplateResponse("user_create.html", {"request": request, "user": new_user})
 
 
 @app.get("/get-users/{user_id}")
-def show_user_one(request: Request, user_id: int):
-    user_data = {
-        "login": "string",
-        "password": "string",
-        "email": "user@example.com"
-    }
-    response = requests.get(f"http://127.0.0.1:8000/users/{user_id}", json=user_data)
-    new_user = response.json()
+def show_user_one(request: Request, user_id: int, catalog: Catalog = Depends(get_catalog)):
+    new_user = catalog.user(user_id)
     return templates.TemplateResponse("user_show.html", {"request": request, "user": new_user})
 
 
 @app.get("/put-users-form/{user_id}")
-def update_user(request: Request, user_id: int):
-    new_data = {
-        "password": "string",
-        "email": "user@example.com"
-    }
-    response = requests.get(f"http://127.0.0.1:8000/users/{user_id}", json=new_data)
-    updated_user = response.json()
+def update_user(request: Request, user_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_user = catalog.user(user_id)
     return templates.TemplateResponse("update_user.html", {"request": request, "user": updated_user})
 
 
 @app.put("/put-users/{user_id}")
-def update_user(request: Request, user_id: int):
+def update_user(request: Request, user_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "password": "string",
         "email": "user@example.com"
     }
-    response = requests.put(f"http://127.0.0.1:8000/users/{user_id}", json=new_data)
-    updated_user = response.json()
+    updated_user = catalog.update_user(user_id, new_data)
     return templates.TemplateResponse("update_user.html", {"request": request, "user": updated_user})
 
 
 @app.get("/get-users/{user_id}/comments")
-def show_user_comment(request: Request, user_id: int):
-    user_data = {
-        "text": "string",
-        "likes": 0,
-        "dislikes": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/users/{user_id}/comments", json=user_data)
-    new_user = response.json()
+def show_user_comment(request: Request, user_id: int, catalog: Catalog = Depends(get_catalog)):
+    new_user = catalog.user_comments(user_id)
     return templates.TemplateResponse("show_user_comment.html", {"request": request, "user": new_user})
 
 
 @app.get("/post-users-form/{user_id}/comments")
-def create_user_comment(request: Request, user_id: int):
-    new_data = {
-        "text": "string",
-        "likes": 0,
-        "dislikes": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/users/{user_id}/comments", json=new_data)
-    updated_user = response.json()
+def create_user_comment(request: Request, user_id: int, catalog: Catalog = Depends(get_catalog)):
+    updated_user = catalog.user_comments(user_id)
     return templates.TemplateResponse("create_user_comment.html", {"request": request, "user": updated_user})
 
 
 @app.post("/post-users/{user_id}/comments")
-def create_user_comment(request: Request, user_id: int):
+def create_user_comment(request: Request, user_id: int, artwork_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "text": "string",
         "likes": 0,
         "dislikes": 0
     }
-    response = requests.post(f"http://127.0.0.1:8000/users/{user_id}/comments", json=new_data)
-    updated_user = response.json()
+    updated_user = catalog.create_user_comment(user_id, artwork_id, new_data)
     return templates.TemplateResponse("create_user_comment.html", {"request": request, "user": updated_user})
 
 
 @app.get("/get-users/{user_id}/reviews")
-def show_user_review(request: Request, user_id: int):
-    user_data = {
-        "text": "string",
-        "score": 0
-    }
-    response = requests.get(f"http://127.0.0.1:8000/users/{user_id}/reviews", json=user_data)
-    new_user = response.json()
+def show_user_review(request: Request, user_id: int, catalog: Catalog = Depends(get_catalog)):
+    new_user = catalog.user_reviews(user_id)
     return templates.TemplateResponse("show_user_review.html", {"request": request, "user": new_user})
 
 
 @app.post("/post-users/{user_id}/reviews")
-def create_user_review(request: Request, user_id: int):
+def create_user_review(request: Request, user_id: int, artwork_id: int, catalog: Catalog = Depends(get_write_catalog)):
     new_data = {
         "text": "string",
         "score": 0
     }
-    response = requests.post(f"http://127.0.0.1:8000/users/{user_id}/reviews", json=new_data)
-    updated_user = response.json()
+    updated_user = catalog.create_user_review(user_id, artwork_id, new_data)
     return templates.TemplateResponse("create_user_review.html", {"request": request, "user": updated_user})
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read when the app is imported, so the test database has to be chosen first
+os.environ["DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from frontend.main import app
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_category(client):
+    def make_category() -> int:
+        response = client.post("/categories/", json={"name": unique("category"), "description": "d"})
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    return make_category
+
+
+@pytest.fixture
+def make_artwork(client, make_category):
+    def make_artwork(category_id: int | None = None, star_rating: float = 5.0) -> int:
+        response = client.post(f"/categories/{category_id or make_category()}/artworks", json={
+            "title": unique("artwork"), "description": "d", "poster_url": "http://example.com/poster.png",
+            "release_date": "2023-06-09", "age_rating": "PG", "star_rating": star_rating,
+        })
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    return make_artwork
+
+
+@pytest.fixture
+def make_user(client):
+    def make_user() -> int:
+        login = unique("user")
+        response = client.post("/users/", json={"login": login, "password": "secret", "email": f"{login}@example.com"})
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    return make_user
+
+
+@pytest.fixture
+def make_review(client):
+    def make_review(user_id: int, artwork_id: int, score: int) -> int:
+        response = client.post(f"/users/{user_id}/reviews/", params={"artwork_id": artwork_id},
+                               json={"text": "t", "score": score})
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    return make_review
@@ -0,0 +1,57 @@
+import asyncio
+import inspect
+
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import crud
+from backend.dependencies import create_async_db_engine, settings
+from backend.routers.artworks import artworks
+from backend.routers.async_routers import to_async_router
+from backend.routers.comments import comments
+from backend.routers.reviews import reviews
+from backend.routers.users import users
+
+
+def endpoints(router) -> dict[tuple[str, str], object]:
+    return {(route.path, method): route.endpoint for route in to_async_router(router).routes
+            if isinstance(route, APIRoute) for method in route.methods}
+
+
+def test_read_paths_use_the_native_async_endpoints():
+    assert endpoints(comments.router)[("/", "GET")] is comments.get_all_comments_async
+    assert endpoints(comments.router)[("/{comment_id}", "GET")] is comments.get_comment_async
+    assert endpoints(reviews.router)[("/", "GET")] is reviews.get_all_reviews_async
+    assert endpoints(reviews.router)[("/{review_id}", "GET")] is reviews.get_review_async
+    assert endpoints(users.router)[("/{user_id}/reviews/", "GET")] is users.get_reviews_from_user_async
+    assert endpoints(artworks.router)[("/{artwork_id}/comments/", "GET")] is artworks.get_comments_from_artwork_async
+
+    # Everything else is still the sync endpoint run through run_sync
+    wrapped = endpoints(comments.router)[("/{comment_id}", "PUT")]
+    assert inspect.iscoroutinefunction(wrapped) and wrapped is not comments.update_comment
+
+
+def test_async_crud_awaits_its_statements(client, make_artwork, make_user, make_review, monkeypatch):
+    artwork_id, user_id = make_artwork(), make_user()
+    review_ids = [make_review(user_id, artwork_id, 5), make_review(make_user(), artwork_id, 3)]
+
+    def run_sync(self, fn, *args, **kwargs):
+        raise AssertionError("async crud ran sync code through run_sync")
+
+    monkeypatch.setattr(AsyncSession, "run_sync", run_sync)
+
+    async def read():
+        engine = create_async_db_engine(settings)
+
+        try:
+            async with AsyncSession(engine) as db:
+                return ([review.id for review in await crud.async_crud.get_reviews_from_artwork(db, artwork_id)],
+                        [review.id for review in await crud.async_crud.get_reviews_from_artwork(
+                            db, artwork_id, limit=1, cursor=(review_ids[0], review_ids[0]))],
+                        (await crud.async_crud.get_review_by_id(db, review_ids[1])).score,
+                        (await crud.async_crud.get_user_by_id(db, user_id, profile="user")).reviews[0].id,
+                        await crud.async_crud.get_artwork_by_id(db, 0))
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(read()) == (review_ids, review_ids[1:], 3, review_ids[0], None)
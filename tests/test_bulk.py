@@ -0,0 +1,6 @@
+def test_bulk_create_returns_ids_in_request_order(client, tmp_path):
+    names = [f"bulk-tag-{tmp_path.name}-{index}" for index in range(30)]
+    response = client.post("/tags/bulk", json=[{"name": name, "description": "d"} for name in names])
+    assert response.status_code == 201
+
+    assert [client.get(f"/tags/{tag_id}").json()["name"] for tag_id in response.json()["ids"]] == names
@@ -0,0 +1,92 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from sqlalchemy.orm import Session
+
+from backend.dependencies import db_state
+from frontend.catalog import LocalCatalog
+
+
+@pytest.fixture
+def catalog(client):
+    with Session(db_state.engine) as db:
+        yield LocalCatalog(db)
+
+
+@pytest.fixture
+def rows(client, make_category, make_artwork, make_user, make_review):
+    category_id = make_category()
+    artwork_id = make_artwork(category_id)
+    user_id = make_user()
+    review_id = make_review(user_id, artwork_id, 4)
+    comment_id = client.post(f"/users/{user_id}/comments/", params={"artwork_id": artwork_id},
+                             json={"text": "t", "likes": 1, "dislikes": 0}).json()["id"]
+    tag_id = client.post("/tags/", json={"name": f"catalog-{category_id}", "description": "d"}).json()["id"]
+    client.post(f"/artworks/{artwork_id}/tags/{tag_id}")
+
+    return {"category_id": category_id, "artwork_id": artwork_id, "user_id": user_id, "review_id": review_id,
+            "comment_id": comment_id, "tag_id": tag_id}
+
+
+READS = [
+    ("artworks", "/artworks/", ()),
+    ("artwork", "/artworks/{artwork_id}", ("artwork_id",)),
+    ("artwork_comments", "/artworks/{artwork_id}/comments/", ("artwork_id",)),
+    ("artwork_reviews", "/artworks/{artwork_id}/reviews/", ("artwork_id",)),
+    ("artwork_tags", "/artworks/{artwork_id}/tags/", ("artwork_id",)),
+    ("categories", "/categories/", ()),
+    ("category", "/categories/{category_id}", ("category_id",)),
+    ("comments", "/comments/", ()),
+    ("comment", "/comments/{comment_id}", ("comment_id",)),
+    ("reviews", "/reviews/", ()),
+    ("review", "/reviews/{review_id}", ("review_id",)),
+    ("tags", "/tags/", ()),
+    ("tag", "/tags/{tag_id}", ("tag_id",)),
+    ("users", "/users/", ()),
+    ("user", "/users/{user_id}", ("user_id",)),
+    ("user_comments", "/users/{user_id}/comments/", ("user_id",)),
+    ("user_reviews", "/users/{user_id}/reviews/", ("user_id",)),
+]
+
+
+@pytest.mark.parametrize(("method", "path", "arguments"), READS, ids=[read[0] for read in READS])
+def test_local_reads_return_the_api_bodies(client, catalog, rows, method, path, arguments):
+    args = [rows[argument] for argument in arguments]
+    url = path.format(**rows)
+
+    if path.endswith("/"):
+        assert getattr(catalog, method)(*args, 0, 1000) == client.get(url, params={"limit": 1000}).json()
+    else:
+        assert getattr(catalog, method)(*args) == client.get(url).json()
+
+    if args:
+        assert getattr(catalog, method)(*[0 for _ in args]) is None
+
+
+def test_category_artworks_are_the_nested_artworks(client, catalog, rows):
+    assert catalog.category_artworks(rows["category_id"]) \
+        == client.get(f"/categories/{rows['category_id']}").json()["artworks"]
+    assert catalog.category_artworks(0) is None
+
+
+def test_local_writes_apply_the_api_checks(client, catalog, rows):
+    name = f"catalog-write-{rows['tag_id']}"
+    created = catalog.create_tag({"name": name, "description": "d"})
+    assert client.get(f"/tags/{created['id']}").json() == created
+
+    with pytest.raises(HTTPException) as duplicate:
+        catalog.create_tag({"name": name, "description": "d"})
+    assert duplicate.value.status_code == 409
+
+    with pytest.raises(RequestValidationError):
+        catalog.create_tag({"name": name})
+
+    updated = catalog.update_review(rows["review_id"], {"score": 2})
+    assert updated["score"] == 2 and client.get(f"/reviews/{rows['review_id']}").json() == updated
+
+    with pytest.raises(HTTPException) as missing:
+        catalog.update_comment(0, {"text": "t"})
+    assert missing.value.status_code == 404
+
+    artwork = catalog.remove_artwork_tag(rows["artwork_id"], rows["tag_id"])
+    assert artwork["tags"] == [] and client.get(f"/artworks/{rows['artwork_id']}/tags/").json() == []
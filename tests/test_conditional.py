@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/users/{user_id}", "/users/{user_id}/reviews/"])
+def test_matching_etag_answers_304_until_the_rows_change(client, make_user, make_artwork, make_review, path):
+    user_id = make_user()
+    review_id = make_review(user_id, make_artwork(), 4)
+    url = path.format(user_id=user_id)
+
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200 and "Last-Modified" in response.headers
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        not_modified = client.get(url, headers={"If-None-Match": if_none_match})
+        assert (not_modified.status_code, not_modified.content) == (304, b"")
+        assert not_modified.headers["ETag"] == etag and "content-type" not in not_modified.headers
+
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    assert client.put(f"/reviews/{review_id}", json={"score": 2}).status_code == 200
+    assert client.put(f"/users/{user_id}", json={"email": f"changed-{user_id}@example.com"}).status_code == 200
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_cached_response_answers_304_with_the_same_validators(client, make_artwork):
+    url = f"/artworks/{make_artwork()}"
+    response = client.get(url)
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert (not_modified.headers["ETag"], not_modified.headers["Last-Modified"]) == (etag, last_modified)
+
+
+def test_sparse_fieldsets_of_the_same_row_get_their_own_etag(client, make_user):
+    url = f"/users/{make_user()}"
+    full = client.get(url).headers["ETag"]
+    sparse = client.get(url, params={"fields": "login"}).headers["ETag"]
+
+    assert full != sparse
+    assert client.get(url, params={"fields": "login"}, headers={"If-None-Match": full}).status_code == 200
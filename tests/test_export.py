@@ -0,0 +1,73 @@
+import gzip
+import json
+
+import pytest
+from sqlalchemy.orm import Session
+
+from backend import schemas
+from backend.crud.export import export_batches
+from backend.dependencies import db_state
+from backend.models.models import utc_now
+
+
+def export(client, resource: str, **params) -> list[dict]:
+    response = client.get(f"/export/{resource}", params=params)
+    assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+
+    return [json.loads(line) for line in response.content.splitlines()]
+
+
+def test_since_exports_changed_rows_and_artworks_with_changed_children(client, make_artwork, make_user, make_review):
+    reviewed, updated, unchanged = make_artwork(), make_artwork(), make_artwork()
+    user_id = make_user()
+    since = utc_now().isoformat()
+
+    make_review(user_id, reviewed, 4)
+    assert client.put(f"/artworks/{updated}", json={"title": f"updated-{updated}"}).status_code == 200
+
+    assert [row["id"] for row in export(client, "artworks", since=since)] == [updated]
+
+    rows = export(client, "artworks", since=since, include=["reviews", "tags"])
+    assert [row["id"] for row in rows] == [reviewed, updated]
+    assert [(review["author_id"], review["score"]) for review in rows[0]["reviews"]] == [(user_id, 4)]
+    assert (rows[1]["title"], rows[1]["reviews"], rows[1]["tags"]) == (f"updated-{updated}", [], [])
+    assert unchanged in {row["id"] for row in export(client, "artworks")}
+
+
+def test_exports_leave_out_passwords_and_refuse_includes_of_other_tables(client, make_user):
+    user_id = make_user()
+    users = {row["id"]: row for row in export(client, "users")}
+
+    assert "password" not in users[user_id] and "login" in users[user_id]
+    assert client.get("/export/users", params={"include": "tags"}).status_code == 400
+
+
+def test_gzip_export_is_the_plain_export_compressed(client, make_category):
+    make_category()
+    plain = client.get("/export/categories").content
+    compressed = client.get("/export/categories", params={"gzip": True})
+
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(compressed.content) == plain
+
+
+def test_batches_carry_the_children_of_their_own_artworks(make_category, make_artwork, make_user, make_review):
+    category_id = make_category()
+    artwork_ids = [make_artwork(category_id) for _ in range(3)]
+    user_id = make_user()
+
+    for artwork_id in artwork_ids:
+        make_review(user_id, artwork_id, 3)
+
+    with Session(db_state.engine) as db:
+        batches = list(export_batches(db, schemas.CatalogResource.artworks, [schemas.ExportInclude.reviews],
+                                      batch_size=2))
+
+        with pytest.raises(ValueError):
+            next(export_batches(db, schemas.CatalogResource.tags, [schemas.ExportInclude.reviews]))
+
+    assert all(len(batch) <= 2 for batch in batches)
+    rows = [row for batch in batches for row in batch]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert all(review["artwork_id"] == row["id"] for row in rows for review in row["reviews"])
+    assert {row["id"]: len(row["reviews"]) for row in rows if row["id"] in artwork_ids} == dict.fromkeys(artwork_ids, 1)
@@ -0,0 +1,97 @@
+import pytest
+
+from backend.crud.facets import CHUNK_BITS, Bitmap, facet_index
+
+
+def make_tag(client, name: str) -> int:
+    response = client.post("/tags/", json={"name": name, "description": "d"})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def facets(client, category_id: int, tags=(), exclude_tags=()) -> dict:
+    response = client.get("/artworks/facets", params={"category": category_id, "tag": list(tags),
+                                                      "exclude_tag": list(exclude_tags)})
+    assert response.status_code == 200
+    body = response.json()
+
+    return {"total": body["total"], "artwork_ids": body["artwork_ids"],
+            "tags": {int(tag_id): count for tag_id, count in body["tags"].items()}}
+
+
+@pytest.fixture
+def catalog(client, make_category, make_artwork, monkeypatch):
+    # Three artworks in a category of their own, the index loaded before any of the changes below
+    category_id = make_category()
+    artwork_ids = [make_artwork(category_id) for _ in range(3)]
+    red, blue = make_tag(client, f"red-{category_id}"), make_tag(client, f"blue-{category_id}")
+    facets(client, category_id)
+
+    def no_reload(db):
+        raise AssertionError("the facet index was reloaded instead of updated")
+
+    monkeypatch.setattr(facet_index, "load", no_reload)
+
+    return category_id, artwork_ids, red, blue
+
+
+def test_tagging_updates_facets(client, catalog):
+    category_id, (first, second, third), red, blue = catalog
+
+    assert client.post(f"/artworks/{first}/tags/{red}").status_code == 200
+    assert [result["status"] for result in client.post(f"/artworks/{second}/tags/attach", json=[red, blue]).json()] \
+        == ["attached", "attached"]
+
+    assert facets(client, category_id) == {"total": 3, "artwork_ids": [first, second, third],
+                                           "tags": {red: 2, blue: 1}}
+    assert facets(client, category_id, tags=[red]) == {"total": 2, "artwork_ids": [first, second],
+                                                       "tags": {blue: 1}}
+    assert facets(client, category_id, tags=[red, blue]) == {"total": 1, "artwork_ids": [second], "tags": {}}
+    assert facets(client, category_id, exclude_tags=[blue]) == {"total": 2, "artwork_ids": [first, third],
+                                                                "tags": {red: 1}}
+    assert facets(client, category_id, tags=[red], exclude_tags=[blue]) == {"total": 1, "artwork_ids": [first],
+                                                                            "tags": {}}
+
+
+def test_untagging_updates_facets(client, catalog):
+    category_id, (first, second, third), red, blue = catalog
+    client.post("/artworks/tags/attach", json=[{"artwork_id": artwork_id, "tag_id": red}
+                                               for artwork_id in (first, second, third)])
+    client.post(f"/artworks/{third}/tags/{blue}")
+
+    assert client.delete(f"/artworks/{first}/tags/{red}").status_code == 200
+    client.post("/artworks/tags/detach", json=[{"artwork_id": third, "tag_id": red}])
+
+    assert facets(client, category_id, tags=[red]) == {"total": 1, "artwork_ids": [second], "tags": {}}
+    assert facets(client, category_id, exclude_tags=[red]) == {"total": 2, "artwork_ids": [first, third],
+                                                               "tags": {blue: 1}}
+    assert facets(client, category_id)["tags"] == {red: 1, blue: 1}
+
+
+def test_deleting_an_artwork_updates_facets(client, catalog):
+    category_id, (first, second, third), red, blue = catalog
+    client.post(f"/artworks/{first}/tags/attach", json=[red, blue])
+    client.post(f"/artworks/{second}/tags/{red}")
+
+    assert client.delete(f"/artworks/{first}").status_code == 200
+
+    assert facets(client, category_id) == {"total": 2, "artwork_ids": [second, third], "tags": {red: 1}}
+    assert facets(client, category_id, tags=[blue]) == {"total": 0, "artwork_ids": [], "tags": {}}
+    assert facets(client, category_id, exclude_tags=[red]) == {"total": 1, "artwork_ids": [third], "tags": {}}
+
+
+def test_bitmap_operations_across_chunks():
+    chunk = 1 << CHUNK_BITS
+    evens = Bitmap.from_ids(range(0, 3 * chunk, 2))
+    edges = Bitmap.from_ids([0, chunk - 1, chunk, 2 * chunk + 1])
+
+    assert len(evens) == 3 * chunk // 2
+    assert list((evens & edges).ids()) == [0, chunk]
+    assert evens.intersection_count(edges) == 2
+    assert list((edges - evens).ids()) == [chunk - 1, 2 * chunk + 1]
+    assert len(evens | edges) == len(evens) + 2
+    assert list(edges.ids(after=chunk - 1)) == [chunk, 2 * chunk + 1]
+
+    edges.discard(chunk)
+    edges.add(5)
+    assert list(edges.ids()) == [0, 5, chunk - 1, 2 * chunk + 1]
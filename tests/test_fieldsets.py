@@ -0,0 +1,55 @@
+import pytest
+
+from backend import schemas
+
+
+def test_detail_sends_the_chosen_fields_and_relationships(client, make_artwork, make_user, make_review):
+    artwork_id = make_artwork()
+    make_review(make_user(), artwork_id, 4)
+    url = f"/artworks/{artwork_id}"
+
+    scalar_names, nested_names = schemas.fieldset_names("artwork")
+
+    assert set(client.get(url).json()) == {*scalar_names, *nested_names}
+    assert set(client.get(url, params={"fields": "title, star_rating"}).json()) \
+        == {"id", "title", "star_rating", *nested_names}
+    assert set(client.get(url, params={"fields": "title,star_rating", "include": ""}).json()) \
+        == {"id", "title", "star_rating"}
+
+    sparse = client.get(url, params={"fields": "title", "include": "reviews,rating"}).json()
+    assert set(sparse) == {"id", "title", "reviews", "rating"}
+    assert ([review["score"] for review in sparse["reviews"]], sparse["rating"]["review_count"]) == ([4], 1)
+
+    assert set(client.get(url, params={"fields": "", "include": ""}).json()) == {"id"}
+
+
+def test_lists_leave_relationships_out_unless_included(client, make_category, make_artwork):
+    category_id = make_category()
+    make_artwork(category_id)
+    url = f"/categories/{category_id}"
+
+    assert set(client.get("/categories/", params={"limit": 1}).json()[0]) == {"id", "name", "description"}
+    assert set(client.get("/categories/", params={"limit": 1, "include": "artworks"}).json()[0]) \
+        == {"id", "name", "description", "artworks"}
+    assert set(client.get(url, params={"fields": "name", "include": "artworks"}).json()["artworks"][0]) \
+        == set(schemas.ArtworkBase.__fields__)
+
+
+@pytest.mark.parametrize(("params", "detail"), [
+    ({"fields": "title,password"}, "Unknown fields: password"),
+    ({"include": "tags,owner,category"}, "Unknown include: category, owner"),
+    ({"fields": "tags"}, "Unknown fields: tags"),
+])
+def test_unknown_names_are_rejected(client, make_artwork, params, detail):
+    response = client.get(f"/artworks/{make_artwork()}", params=params)
+
+    assert (response.status_code, response.json()["detail"]) == (400, detail)
+
+
+def test_fieldset_models_are_built_once_per_combination():
+    fieldset = schemas.Fieldset("user", frozenset({"login"}), frozenset())
+
+    assert fieldset.model is schemas.Fieldset("user", frozenset({"login"}), frozenset()).model
+    assert list(fieldset.model.__fields__) == ["login", "id"]
+    assert schemas.Fieldset("user", frozenset({"email"}), frozenset()).model.parse_obj(
+        {"id": 1, "email": "someone@example.com"}).email == "someone@example.com"
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.crud.importer import import_file
+from backend.dependencies import db_state
+
+
+def import_records(path: Path, resource: schemas.CatalogResource, records: list[dict]) -> tuple[int, list[int]]:
+    # (rows imported, line numbers of the rejected records)
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    rejected = []
+    report = import_file(db_state.engine, resource, path, max_errors=len(records),
+                         on_error=lambda position, message: rejected.append(position))
+
+    return report.imported, rejected
+
+
+def test_import_rejects_taken_and_repeated_names(client, tmp_path):
+    taken = f"imported-category-{tmp_path.name}"
+    assert client.post("/categories/", json={"name": taken, "description": "d"}).status_code == 201
+
+    names = [taken, f"{taken}-new", f"{taken}-new", f"{taken}-other"]
+    imported, rejected = import_records(tmp_path / "categories.jsonl", schemas.CatalogResource.categories,
+                                        [{"name": name, "description": "d"} for name in names])
+
+    assert (imported, rejected) == (2, [1, 3])
+
+    with Session(db_state.engine) as db:
+        assert db.scalar(select(func.count()).where(models.Category.name.in_(names))) == 3
+
+
+def test_import_rejects_taken_logins_and_emails(client, tmp_path, make_user):
+    taken = client.get(f"/users/{make_user()}").json()
+    login = f"imported-user-{tmp_path.name}"
+    users = [
+        {"login": taken["login"], "password": "p", "email": f"{login}-0@example.com"},
+        {"login": f"{login}-1", "password": "p", "email": taken["email"]},
+        {"login": f"{login}-2", "password": "p", "email": f"{login}-2@example.com"},
+        {"login": f"{login}-2", "password": "p", "email": f"{login}-3@example.com"},
+        {"login": f"{login}-4", "password": "p", "email": f"{login}-2@example.com"},
+    ]
+
+    assert import_records(tmp_path / "users.jsonl", schemas.CatalogResource.users, users) == (1, [1, 2, 4, 5])
+
+
+def test_import_rejects_second_review_of_an_artwork(tmp_path, make_artwork, make_user, make_review):
+    artwork_id, reviewed_by, new_author = make_artwork(), make_user(), make_user()
+    make_review(reviewed_by, artwork_id, 5)
+    reviews = [{"text": "t", "score": 5, "author_id": author_id, "artwork_id": artwork_id}
+               for author_id in (reviewed_by, new_author, new_author)]
+
+    assert import_records(tmp_path / "reviews.jsonl", schemas.CatalogResource.reviews, reviews) == (1, [1, 3])
+
+
+def test_imported_artworks_get_their_own_tags(client, tmp_path, make_category):
+    category_id = make_category()
+    tag_names = [f"imported-tag-{tmp_path.name}-{index}" for index in range(3)]
+    assert client.post("/tags/bulk", json=[{"name": name, "description": "d"} for name in tag_names]).status_code == 201
+    titles = [f"imported-artwork-{tmp_path.name}-{index}" for index in range(3)]
+    artworks = [{"title": title, "description": "d", "poster_url": "http://example.com/poster.png",
+                 "release_date": "2023-06-09", "age_rating": "PG", "star_rating": 5.0, "category_id": category_id,
+                 "tags": [tag_name]} for title, tag_name in zip(titles, tag_names)]
+
+    assert import_records(tmp_path / "artworks.jsonl", schemas.CatalogResource.artworks, artworks) == (3, [])
+
+    association = models.artwork_tag_association
+
+    with Session(db_state.engine) as db:
+        pairs = set(db.execute(select(models.Artwork.title, models.Tag.name)
+                               .join(association, association.c.artwork_id == models.Artwork.id)
+                               .join(models.Tag, models.Tag.id == association.c.tag_id)
+                               .where(models.Artwork.category_id == category_id)).tuples())
+
+    assert pairs == set(zip(titles, tag_names))
@@ -0,0 +1,26 @@
+def test_new_review_changes_leaderboard_etag(client, make_category, make_artwork, make_user, make_review):
+    category_id = make_category()
+    first, second = make_artwork(category_id), make_artwork(category_id)
+    make_review(make_user(), first, 6)
+    url = f"/categories/{category_id}/top?metric=average"
+
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert [entry["artwork_id"] for entry in response.json()] == [first]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    make_review(make_user(), second, 9)
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [entry["artwork_id"] for entry in response.json()] == [second, first]
+
+
+def test_leaderboard_etags_differ_between_rankings(client, make_category, make_artwork, make_user, make_review):
+    category_id = make_category()
+    make_review(make_user(), make_artwork(category_id), 3)
+
+    etags = {client.get(f"/categories/{category_id}/top", params={"metric": metric}).headers["ETag"]
+             for metric in ("average", "star_rating")}
+    assert len(etags) == 2
@@ -0,0 +1,52 @@
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.crud.pagination import decode_cursor, encode_cursor, next_cursor, paginate
+from backend.dependencies import db_state
+
+
+def test_cursor_walk_matches_offset_pages(client, make_artwork, make_user, make_review):
+    artwork_id = make_artwork()
+    review_ids = [make_review(make_user(), artwork_id, 5) for _ in range(5)]
+    url = f"/artworks/{artwork_id}/reviews/?limit=2"
+    pages = []
+
+    while url is not None:
+        response = client.get(url)
+        pages.append([review["id"] for review in response.json()])
+        # Link: <url>; rel="next"
+        url = response.headers["Link"].split(">;")[0].lstrip("<") if "Link" in response.headers else None
+
+    assert pages == [review_ids[0:2], review_ids[2:4], review_ids[4:]]
+    assert [[review["id"] for review in client.get(f"/artworks/{artwork_id}/reviews/",
+                                                   params={"skip": skip, "limit": 2}).json()]
+            for skip in (0, 2, 4)] == pages
+
+
+def test_malformed_cursors_are_rejected(client, make_artwork):
+    url = f"/artworks/{make_artwork()}/reviews/"
+
+    for cursor in ("not-base64!", encode_cursor(("a", "b")), "W10"):
+        assert client.get(url, params={"cursor": cursor}).status_code == 400
+
+
+def test_sort_key_ties_are_broken_by_id(client, make_category, make_artwork):
+    category_id = make_category()
+    artwork_ids = [make_artwork(category_id, star_rating) for star_rating in (3.0, 1.0, 3.0, 1.0, 2.0)]
+    expected = [artwork_ids[index] for index in (1, 3, 4, 0, 2)]
+    walked, cursor = [], None
+
+    with Session(db_state.engine) as db:
+        query = db.query(models.Artwork).filter(models.Artwork.category_id == category_id)
+
+        while True:
+            page = paginate(query, models.Artwork.id, 0, 2, cursor, sort_column=models.Artwork.star_rating).all()
+            walked.extend(artwork.id for artwork in page)
+            cursor = next_cursor(page, 2, "star_rating")
+
+            if cursor is None:
+                break
+
+            cursor = decode_cursor(encode_cursor(cursor))
+
+    assert walked == expected
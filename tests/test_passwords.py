@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.dependencies import PasswordHasher, PasswordHasherBusy, db_state, needs_rehash, password_hasher
+
+
+def wait_for(condition) -> None:
+    deadline = time.monotonic() + 10
+
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_pool_hashes_and_rejects_calls_over_max_pending():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+
+    try:
+        stored = hasher.hash("secret")
+        assert hasher.verify("secret", stored) and not hasher.verify("wrong", stored)
+
+        # Holds the only admission slot while the worker process sleeps
+        holder = threading.Thread(target=hasher._run, args=(time.sleep, 1.0))
+        holder.start()
+        wait_for(lambda: hasher.pending == 1)
+
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("secret")
+
+        holder.join()
+        assert hasher.stats() | {"average_ms": 0} == {"workers": 1, "max_pending": 1, "pending": 0, "queued": 0,
+                                                      "completed": 4, "rejected": 1, "average_ms": 0}
+    finally:
+        hasher.close()
+
+
+def test_busy_hasher_answers_503(client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post("/users/", json={"login": "busy-user", "password": "p", "email": "busy@example.com"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_stats_report_pending_and_queued_calls(client):
+    release = threading.Event()
+    # With 0 workers the calls run in their own threads, one at a time counts as running and the rest as queued
+    holders = [threading.Thread(target=password_hasher._run, args=(release.wait,)) for _ in range(2)]
+
+    for holder in holders:
+        holder.start()
+
+    try:
+        wait_for(lambda: password_hasher.pending == 2)
+        stats = client.get("/users/password-hashing/stats").json()
+        assert (stats["pending"], stats["queued"]) == (2, 1)
+    finally:
+        release.set()
+
+        for holder in holders:
+            holder.join()
+
+    assert client.get("/users/password-hashing/stats").json()["pending"] == 0
+
+
+def test_login_rehashes_a_legacy_plaintext_password(client):
+    with Session(db_state.engine) as db:
+        user_id = db.scalar(insert(models.User).returning(models.User.id),
+                            {"login": "legacy-user", "password": "legacy-secret", "email": "legacy@example.com",
+                             "created_at": datetime.now()})
+        db.commit()
+
+    response = client.post("/login", json={"login": "legacy-user", "password": "legacy-secret",
+                                           "email": "legacy@example.com"})
+    assert response.status_code == 200
+
+    with Session(db_state.engine) as db:
+        stored = db.scalar(select(models.User.password).where(models.User.id == user_id))
+
+    assert stored.startswith("scrypt$") and not needs_rehash(stored)
+    assert client.post("/login", json={"login": "legacy-user", "password": "legacy-secret",
+                                       "email": "legacy@example.com"}).status_code == 200
@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.dependencies import db_state, response_cache
+from frontend.main import app
+
+SMALL, LARGE = 5, 55
+
+RESOURCES = {"artwork": "/artworks", "category": "/categories", "tag": "/tags", "user": "/users"}
+# One SELECT for the rows (the artwork rating is joined into it) plus one selectinload per nested collection:
+# artwork comments, reviews and tags, category artworks, tag artworks, user comments and reviews
+EXPECTED_QUERIES = {"artwork": 4, "category": 2, "tag": 2, "user": 3}
+
+
+def _bulk(client: TestClient, path: str, rows: list[dict]) -> list[int]:
+    response = client.post(path, json=rows)
+    assert response.status_code in (200, 201), response.text
+    return response.json()["ids"] if isinstance(response.json(), dict) else response.json()
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    # Enough rows for a LARGE page of every list, and one SMALL and one LARGE parent per nested collection
+    with TestClient(app) as client:
+        category_ids = _bulk(client, "/categories/bulk",
+                             [{"name": f"counted-category-{index}", "description": "d"} for index in range(LARGE)])
+        artwork = {"description": "d", "poster_url": "http://example.com/poster.png", "release_date": "2023-06-09",
+                   "age_rating": "PG", "star_rating": 5.0}
+        large_artwork_ids = _bulk(client, "/artworks/bulk", [
+            dict(artwork, title=f"counted-artwork-{index}", category_id=category_ids[0]) for index in range(LARGE)
+        ])
+        small_artwork_ids = _bulk(client, "/artworks/bulk", [
+            dict(artwork, title=f"counted-small-artwork-{index}", category_id=category_ids[1])
+            for index in range(SMALL)
+        ])
+        tag_ids = _bulk(client, "/tags/bulk",
+                        [{"name": f"counted-tag-{index}", "description": "d"} for index in range(LARGE)])
+
+        with Session(db_state.engine) as db:
+            user_ids = list(db.scalars(insert(models.User).returning(models.User.id), [
+                {"login": login, "password": "secret", "email": f"{login}@example.com", "created_at": datetime.now()}
+                for login in (f"counted-user-{index}" for index in range(LARGE))
+            ]))
+            db.commit()
+
+        _bulk(client, "/artworks/tags/attach",
+              [{"artwork_id": artwork_id, "tag_id": tag_ids[0]} for artwork_id in large_artwork_ids]
+              + [{"artwork_id": large_artwork_ids[0], "tag_id": tag_id} for tag_id in tag_ids[1:]]
+              + [{"artwork_id": artwork_id, "tag_id": tag_ids[1]} for artwork_id in small_artwork_ids[1:]])
+        pairs = [(user_ids[0], artwork_id) for artwork_id in large_artwork_ids] \
+            + [(user_id, large_artwork_ids[0]) for user_id in user_ids[1:]] \
+            + [(user_ids[1], artwork_id) for artwork_id in small_artwork_ids]
+        _bulk(client, "/comments/bulk", [{"text": "t", "likes": 0, "dislikes": 0, "author_id": author_id,
+                                          "artwork_id": artwork_id} for author_id, artwork_id in pairs])
+        _bulk(client, "/reviews/bulk", [{"text": "t", "score": 5, "author_id": author_id, "artwork_id": artwork_id}
+                                        for author_id, artwork_id in pairs])
+
+        yield client, {
+            "artwork": (small_artwork_ids[-1], large_artwork_ids[0]),
+            "category": (category_ids[1], category_ids[0]),
+            "tag": (tag_ids[1], tag_ids[0]),
+            "user": (user_ids[1], user_ids[0]),
+        }
+
+
+def count_queries(client: TestClient, url: str) -> tuple[int, dict | list]:
+    engines = [db_state.engine] + ([db_state.async_engine.sync_engine] if db_state.async_engine else [])
+    statements = []
+
+    def count(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # A cached response would be answered without queries
+    response_cache.clear()
+
+    for engine in engines:
+        event.listen(engine, "after_cursor_execute", count)
+
+    try:
+        response = client.get(url)
+    finally:
+        for engine in engines:
+            event.remove(engine, "after_cursor_execute", count)
+
+    assert response.status_code == 200, response.text
+
+    return len(statements), response.json()
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_list_runs_one_query_per_collection_at_any_page_size(catalog, resource):
+    client, _ = catalog
+    include = ",".join(schemas.fieldset_names(resource)[1])
+    counts = {}
+
+    for size in (SMALL, LARGE):
+        counts[size], rows = count_queries(client, f"{RESOURCES[resource]}/?limit={size}&include={include}")
+        assert len(rows) == size
+
+    assert counts == {SMALL: EXPECTED_QUERIES[resource], LARGE: EXPECTED_QUERIES[resource]}
+
+
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_detail_runs_one_query_per_collection_at_any_size(catalog, resource):
+    client, parents = catalog
+    counts = {}
+
+    for size, parent_id in zip((SMALL, LARGE), parents[resource]):
+        counts[size], row = count_queries(client, f"{RESOURCES[resource]}/{parent_id}")
+
+    # The last row read is the LARGE parent
+    nested_lists = [row[name] for name in schemas.fieldset_names(resource)[1] if isinstance(row[name], list)]
+    assert max(map(len, nested_lists)) >= LARGE
+    assert counts == {SMALL: EXPECTED_QUERIES[resource], LARGE: EXPECTED_QUERIES[resource]}
@@ -0,0 +1,110 @@
+import re
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend import crud
+from backend.dependencies import db_state
+
+# Tables that grow with the catalog, a filtered query must never read them from end to end
+LARGE_TABLES = ("artwork", "review", "comment", "artwork_tag")
+BARE_SCAN = re.compile(rf"^SCAN ({'|'.join(LARGE_TABLES)})$")
+
+# crud call -> the indexes its statements (including eager loads) have to use
+FILTERED_QUERIES = {
+    "user_by_login": (lambda db, ids: crud.get_user_by_login(db, "login"), ["ix_user_login"]),
+    "user_by_email": (lambda db, ids: crud.get_user_by_email(db, "a@example.com"), ["ix_user_email"]),
+    "user_profile": (lambda db, ids: crud.get_user_by_id(db, ids["user"], profile="user"),
+                     ["ix_comment_author_id", "ix_review_author_id"]),
+    "comments_from_user": (lambda db, ids: crud.get_comments_from_user(db, ids["user"]), ["ix_comment_author_id"]),
+    "comments_from_artwork": (lambda db, ids: crud.get_comments_from_artwork(db, ids["artwork"]),
+                              ["ix_comment_artwork_id"]),
+    "reviews_from_user": (lambda db, ids: crud.get_reviews_from_user(db, ids["user"]), ["ix_review_author_id"]),
+    "reviews_from_artwork": (lambda db, ids: crud.get_reviews_from_artwork(db, ids["artwork"]),
+                             ["ix_review_artwork_id"]),
+    "review_pairs": (lambda db, ids: crud.get_existing_review_pairs(db, [(ids["user"], ids["artwork"]),
+                                                                         (ids["user"] + 1, ids["artwork"] + 1)]),
+                     ["ix_review_author_id"]),
+    "artworks_from_category": (lambda db, ids: crud.get_artworks_from_category(db, ids["category"]),
+                               ["ix_artwork_category_id"]),
+    "artworks_after_cursor": (lambda db, ids: crud.get_all_artworks(db, cursor=(0, 0)), ["INTEGER PRIMARY KEY"]),
+    "artwork_profile": (lambda db, ids: crud.get_artwork_by_id(db, ids["artwork"], profile="artwork"),
+                        ["ix_comment_artwork_id", "ix_review_artwork_id", "sqlite_autoindex_artwork_tag_1"]),
+    "tags_from_artwork": (lambda db, ids: crud.get_tags_from_artwork(db, ids["artwork"]),
+                          ["sqlite_autoindex_artwork_tag_1"]),
+    "tag_by_name": (lambda db, ids: crud.get_tag_by_name(db, "name"), ["ix_tag_name"]),
+    "tag_profile": (lambda db, ids: crud.get_tag_by_id(db, ids["tag"], profile="tag"), ["ix_artwork_tag_tag_id"]),
+    "category_by_name": (lambda db, ids: crud.get_category_by_name(db, "name"), ["ix_category_name"]),
+    "category_profile": (lambda db, ids: crud.get_category_by_id(db, ids["category"], profile="category"),
+                         ["ix_artwork_category_id"]),
+    "similar_artworks": (lambda db, ids: crud.get_similar_artworks(db, ids["artwork"]),
+                         ["ix_artwork_similarity_artwork_id_score"]),
+}
+
+# Lists without a filter walk the primary key from the start and stop at the limit, they must not sort
+ORDERED_QUERIES = {
+    "artworks": lambda db: crud.get_all_artworks(db),
+    "comments": lambda db: crud.get_all_comments(db),
+    "reviews": lambda db: crud.get_all_reviews(db),
+    "tags": lambda db: crud.get_tags(db),
+    "categories": lambda db: crud.get_categories(db),
+    "users": lambda db: crud.get_users(db),
+}
+
+
+@pytest.fixture
+def catalog_ids(client, make_category, make_artwork, make_user, make_review):
+    category_id = make_category()
+    artwork_id = make_artwork(category_id)
+    user_id = make_user()
+    tag_id = client.post("/tags/", json={"name": f"tag-{artwork_id}", "description": "d"}).json()["id"]
+    client.post(f"/artworks/{artwork_id}/tags/{tag_id}")
+    client.post(f"/users/{user_id}/comments/", params={"artwork_id": artwork_id},
+                json={"text": "t", "likes": 0, "dislikes": 0})
+    make_review(user_id, artwork_id, 5)
+
+    return {"category": category_id, "artwork": artwork_id, "user": user_id, "tag": tag_id}
+
+
+def query_plans(call) -> list[list[str]]:
+    # EXPLAIN QUERY PLAN of every SELECT the call runs, with the parameters it ran with
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    with Session(db_state.engine) as db:
+        event.listen(db_state.engine, "before_cursor_execute", capture)
+
+        try:
+            call(db)
+        finally:
+            event.remove(db_state.engine, "before_cursor_execute", capture)
+
+        return [[row[3] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                for statement, parameters in statements]
+
+
+@pytest.mark.parametrize("name", FILTERED_QUERIES)
+def test_filtered_query_uses_index(catalog_ids, name):
+    call, indexes = FILTERED_QUERIES[name]
+    plans = query_plans(lambda db: call(db, catalog_ids))
+    steps = [step for plan in plans for step in plan]
+
+    assert plans, "the query ran no SELECT"
+
+    for index in indexes:
+        assert any(index in step for step in steps), f"{index} not used: {steps}"
+
+    assert not [step for step in steps if BARE_SCAN.match(step)], steps
+    assert "USE TEMP B-TREE FOR ORDER BY" not in steps, steps
+
+
+@pytest.mark.parametrize("name", ORDERED_QUERIES)
+def test_ordered_list_is_not_sorted(catalog_ids, name):
+    steps = [step for plan in query_plans(ORDERED_QUERIES[name]) for step in plan]
+
+    assert steps
+    assert not [step for step in steps if "TEMP B-TREE" in step], steps
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend import models
+from backend.dependencies import Settings, metadata, table_versions
+from backend.dependencies.dependencies import PRIMARY_STICKY_COOKIE, create_db_state, refresh_sqlite_replicas
+
+
+def make_request(method: str, cookie: str | None = None) -> Request:
+    headers = [] if cookie is None else [(b"cookie", f"{PRIMARY_STICKY_COOKIE}={cookie}".encode())]
+    return Request({"type": "http", "method": method, "path": "/", "headers": headers})
+
+
+def database_of(sessions) -> str:
+    db = next(sessions)
+    database = db.get_bind().url.database
+    sessions.close()
+
+    return database
+
+
+@pytest.fixture
+def state(tmp_path):
+    primary, replica = str(tmp_path / "primary.db"), str(tmp_path / "replica.db")
+    state = create_db_state(Settings(db_url=f"sqlite:///{primary}", db_read_urls=(f"sqlite:///{replica}",),
+                                     db_sticky_seconds=5))
+    metadata.create_all(state.engine)
+    refresh_sqlite_replicas(state)
+
+    yield state, primary, replica
+
+    for engine in (state.engine, *state.read_engines):
+        engine.dispose()
+
+
+def test_writes_set_the_sticky_cookie_and_reads_follow_it(state):
+    state, primary, replica = state
+
+    write_response = Response()
+    assert database_of(state.get_db(make_request("POST"), write_response)) == primary
+    sticky_until = float(write_response.headers["set-cookie"].split(";")[0].split("=", 1)[1])
+    assert time.time() < sticky_until <= time.time() + 5
+
+    read_response = Response()
+    database_of(state.get_db(make_request("GET"), read_response))
+    assert "set-cookie" not in read_response.headers
+
+    assert database_of(state.get_read_db(make_request("GET"))) == replica
+    assert database_of(state.get_read_db(make_request("GET", str(sticky_until)))) == primary
+    assert database_of(state.get_read_db(make_request("GET", str(time.time() - 1)))) == replica
+    assert database_of(state.get_read_db(make_request("GET", "not-a-time"))) == replica
+
+
+def test_refresh_copies_the_primary_and_invalidates_cached_responses(state):
+    state, _, _ = state
+
+    with Session(state.engine) as db:
+        db.execute(insert(models.Category), {"name": "replicated", "description": "d"})
+        db.commit()
+
+    count = select(func.count()).select_from(models.Category)
+
+    with Session(state.read_engines[0]) as db:
+        assert db.scalar(count) == 0
+
+    epoch = table_versions.snapshot(())[0]
+    refresh_sqlite_replicas(state)
+
+    with Session(state.read_engines[0]) as db:
+        assert db.scalar(count) == 1
+
+    assert table_versions.snapshot(()) == (epoch + 1,)
@@ -0,0 +1,60 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.dependencies import db_state, response_cache, table_versions
+
+
+def stats(client) -> tuple[int, int]:
+    body = client.get("/cache/stats").json()
+    return body["hits"], body["invalidations"]
+
+
+def test_writes_invalidate_cached_responses(client, make_category, make_artwork):
+    category_id = make_category()
+    url = f"/categories/{category_id}"
+    client.get(url)
+    hits, invalidations = stats(client)
+
+    assert client.get(url).json()["name"] == client.get(url).json()["name"]
+    assert stats(client) == (hits + 2, invalidations)
+
+    assert client.put(url, json={"name": f"renamed-{category_id}"}).status_code == 200
+    assert client.get(url).json()["name"] == f"renamed-{category_id}"
+    assert stats(client) == (hits + 2, invalidations + 1)
+
+    # The category response lists its artworks, a write to the artwork table invalidates it too
+    make_artwork(category_id)
+    assert len(client.get(url).json()["artworks"]) == 1
+    assert stats(client) == (hits + 2, invalidations + 2)
+
+
+def test_only_committed_writes_move_table_versions(client, make_category):
+    category_id = make_category()
+    before = table_versions.snapshot(("category", "artwork"))
+
+    with Session(db_state.engine) as db:
+        db.execute(update(models.Category).where(models.Category.id == category_id).values(description="rolled back"))
+        db.rollback()
+
+    assert table_versions.snapshot(("category", "artwork")) == before
+
+    with Session(db_state.engine) as db:
+        db.execute(update(models.Category).where(models.Category.id == category_id).values(description="committed"))
+        db.commit()
+
+    epoch, category, artwork = table_versions.snapshot(("category", "artwork"))
+    # Artwork references category with ON DELETE CASCADE, so it moves with it
+    assert (epoch, category, artwork) == (before[0], before[1] + 1, before[2] + 1)
+
+
+def test_cache_is_bounded_least_recently_used_first(monkeypatch):
+    monkeypatch.setattr(response_cache, "max_entries", 2)
+    response_cache.clear()
+
+    for key in ("a", "b", "a", "c"):
+        if response_cache.get(key, (0,)) is None:
+            response_cache.set(key, key.upper(), (0,))
+
+    assert [response_cache.get(key, (0,)) for key in ("a", "b", "c")] == ["A", None, "C"]
+    assert response_cache.get("a", (1,)) is None and response_cache.get("a", (0,)) is None
@@ -0,0 +1,13 @@
+def test_highlights_escape_the_stored_text(client, make_category):
+    response = client.post(f"/categories/{make_category()}/artworks", json={
+        "title": "Zephyrine <script>alert(1)</script> & co", "description": "a <b>zephyrine</b> story",
+        "poster_url": "http://example.com/poster.png", "release_date": "2023-06-09", "age_rating": "PG",
+        "star_rating": 5.0,
+    })
+    assert response.status_code == 201
+
+    hits = client.get("/search/", params={"q": "zephyrine"}).json()
+    highlights = next(hit["highlights"] for hit in hits if hit["id"] == response.json()["id"])
+
+    assert highlights["title"] == "<mark>Zephyrine</mark> &lt;script&gt;alert(1)&lt;/script&gt; &amp; co"
+    assert highlights["description"] == "a &lt;b&gt;<mark>zephyrine</mark>&lt;/b&gt; story"
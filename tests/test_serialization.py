@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.dependencies import db_state
+from backend.routers.serialization import dumps, encode_rows
+
+
+@pytest.fixture
+def rows(client, make_category, make_artwork, make_user, make_review):
+    category_id = make_category()
+    artwork_ids = [make_artwork(category_id, star_rating) for star_rating in (4, 2.5)]
+    user_id = make_user()
+    make_review(user_id, artwork_ids[0], 3)
+    assert client.post(f"/users/{user_id}/comments/", params={"artwork_id": artwork_ids[0]},
+                       json={"text": "é \"quoted\" ✓", "likes": 0, "dislikes": 0}).status_code == 201
+    tag_id = client.post("/tags/", json={"name": f"serialized-{category_id}", "description": "d"}).json()["id"]
+
+    with Session(db_state.engine) as db:
+        yield {
+            schemas.ArtworkSummary: db.scalars(select(models.Artwork).where(models.Artwork.id.in_(artwork_ids))).all(),
+            schemas.CategorySummary: [db.get(models.Category, category_id)],
+            schemas.UserSummary: [db.get(models.User, user_id)],
+            schemas.Comment: db.scalars(select(models.Comment).where(models.Comment.author_id == user_id)).all(),
+            schemas.Review: db.scalars(select(models.Review).where(models.Review.author_id == user_id)).all(),
+            schemas.TagSummary: [db.get(models.Tag, tag_id)],
+        }
+
+
+@pytest.mark.parametrize("model", [schemas.ArtworkSummary, schemas.CategorySummary, schemas.UserSummary,
+                                   schemas.Comment, schemas.Review, schemas.TagSummary])
+def test_fast_path_encodes_rows_like_the_response_model(rows, model):
+    content = rows[model]
+    assert content
+
+    assert encode_rows(list[model], content) == dumps(parse_obj_as(list[model], content))
+    assert encode_rows(model, content[0]) == dumps(parse_obj_as(model, content[0]))
+
+
+def test_orjson_bodies_parse_like_the_stdlib_encoder(rows):
+    for model, content in rows.items():
+        parsed = parse_obj_as(list[model], content)
+
+        assert json.loads(dumps(parsed)) == json.loads(json.dumps(jsonable_encoder(parsed)))
+
+
+def test_fast_path_is_skipped_for_nested_and_validated_models(rows):
+    artworks = rows[schemas.ArtworkSummary]
+
+    assert encode_rows(list[schemas.Artwork], artworks) is None
+    assert encode_rows(schemas.Fieldset("artwork", frozenset({"title"}), frozenset({"tags"})).model, artworks[0]) \
+        is None
+    assert encode_rows(list[schemas.ArtworkSummary], [parse_obj_as(schemas.ArtworkSummary, artworks[0])]) is None
+    assert encode_rows(schemas.Fieldset("artwork", frozenset({"title"}), frozenset()).model, artworks[0]) \
+        == dumps({"title": artworks[0].title, "id": artworks[0].id})
+
+
+def test_list_endpoint_body_matches_the_response_model(client, rows):
+    response = client.get("/users/", params={"limit": 1000})
+    by_id = {user["id"]: user for user in response.json()}
+    user = rows[schemas.UserSummary][0]
+
+    assert response.headers["content-type"] == "application/json"
+    assert by_id[user.id] == json.loads(dumps(parse_obj_as(schemas.UserSummary, user)))
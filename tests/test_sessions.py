@@ -0,0 +1,142 @@
+import pytest
+
+from backend.dependencies import SessionTokens, Settings, session_tokens, sessions
+from backend.dependencies.dependencies import session_secret
+from backend.routers.sessions import _sessions_revoked_at
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # session_time() in microseconds, moved by the tests
+    now = [1_000_000_000_000]
+    monkeypatch.setattr(sessions, "session_time", lambda: now[0])
+
+    return now
+
+
+@pytest.fixture
+def tokens(clock):
+    return SessionTokens(b"secret", ttl_seconds=60, max_entries=2)
+
+
+def test_issued_token_verifies_until_it_expires(tokens, clock):
+    token, claims = tokens.issue(7)
+
+    assert tokens.verify(token) == claims
+    assert (claims.user_id, claims.expires_at - claims.issued_at) == (7, 60_000_000)
+
+    clock[0] = claims.expires_at
+    assert tokens.verify(token) is None
+
+
+def test_tampered_or_foreign_tokens_do_not_verify(tokens):
+    token, _ = tokens.issue(7)
+    _, rest = token.split(".", 1)
+
+    assert tokens.verify(f"8.{rest}") is None
+    assert tokens.verify(token[:-2]) is None
+    assert tokens.verify("not-a-token") is None
+    assert SessionTokens(b"other", 60, 2).verify(token) is None
+
+
+def test_revoke_only_revokes_that_token(tokens):
+    token, claims = tokens.issue(7)
+    other, _ = tokens.issue(7)
+
+    tokens.revoke(claims)
+
+    assert tokens.verify(token) is None
+    assert tokens.verify(other) is not None
+
+
+def test_revoke_user_revokes_the_tokens_issued_so_far(tokens, clock):
+    tokens_of_user = [tokens.issue(7)[0] for _ in range(2)]
+    other_user, _ = tokens.issue(8)
+
+    clock[0] += 1
+    tokens.revoke_user(7)
+    clock[0] += 1
+
+    assert [tokens.verify(token) for token in tokens_of_user] == [None, None]
+    assert tokens.verify(other_user) is not None
+    assert tokens.verify(tokens.issue(7)[0]) is not None
+
+
+def test_verified_tokens_are_evicted_least_recently_used_first(tokens, monkeypatch):
+    issued = [tokens.issue(user_id)[0] for user_id in range(3)]
+    decoded = []
+    decode = tokens._decode
+    monkeypatch.setattr(tokens, "_decode", lambda token: decoded.append(token) or decode(token))
+
+    for token in (issued[0], issued[1], issued[0], issued[2], issued[0], issued[1]):
+        assert tokens.verify(token) is not None
+
+    # issued[1] was the least recently used when issued[2] came in, only it had to be decoded again
+    assert decoded == [issued[0], issued[1], issued[2], issued[1]]
+    assert list(tokens._verified) == [issued[0], issued[1]]
+
+
+def test_stored_revocation_is_read_again_after_recheck_seconds(clock, monkeypatch):
+    tokens = SessionTokens(b"secret", ttl_seconds=60, max_entries=10, recheck_seconds=30)
+    monotonic = [0.0]
+    monkeypatch.setattr(sessions.time, "monotonic", lambda: monotonic[0])
+    token, claims = tokens.issue(7)
+    stored = {7: -1}
+    lookups = []
+
+    def revoked_before(user_id: int) -> int | None:
+        lookups.append(user_id)
+        return stored.get(user_id)
+
+    assert tokens.verify(token, revoked_before) == claims
+    # Revoked by another process, this one sees it at the next recheck
+    stored[7] = claims.issued_at
+    monotonic[0] = 29.0
+    assert tokens.verify(token, revoked_before) == claims
+    monotonic[0] = 30.0
+    assert tokens.verify(token, revoked_before) is None
+    assert lookups == [7, 7]
+
+    # A deleted user has no stored time, its tokens are refused
+    del stored[7]
+    assert tokens.verify(tokens.issue(7)[0], revoked_before) is None
+
+
+def login(client, user_id: int) -> str:
+    user = client.get(f"/users/{user_id}").json()
+    response = client.post("/login", json={"login": user["login"], "password": "secret", "email": user["email"]})
+    assert response.status_code == 200
+
+    return response.headers["X-Session-Token"]
+
+
+def test_logout_revokes_the_session(client, make_user):
+    user_id = make_user()
+    token, other = login(client, user_id), login(client, user_id)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/users/me", headers=headers).json()["id"] == user_id
+    assert client.post("/logout", headers=headers).status_code == 204
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {other}"}).status_code == 200
+
+
+def test_password_change_revokes_sessions_in_every_process(client, make_user):
+    user_id = make_user()
+    token = login(client, user_id)
+    # The token cache of another worker process that has already seen the token
+    other_process = SessionTokens(session_tokens.secret, 60, 10, recheck_seconds=0)
+    assert other_process.verify(token, _sessions_revoked_at) is not None
+
+    assert client.put(f"/users/{user_id}", json={"password": "changed"}).status_code == 200
+
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert other_process.verify(token, _sessions_revoked_at) is None
+
+
+def test_random_secret_is_refused_with_several_workers():
+    assert session_secret(Settings(session_secret="configured", web_concurrency=4)) == b"configured"
+    assert len(session_secret(Settings())) == 32
+
+    with pytest.raises(ValueError):
+        session_secret(Settings(web_concurrency=4))
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import crud, models
+from backend.dependencies import db_state
+
+
+def stored_similarities(db: Session) -> dict[tuple[int, int], float]:
+    similarities = models.ArtworkSimilarity
+    rows = db.execute(select(similarities.artwork_id, similarities.similar_artwork_id, similarities.score))
+
+    return {(artwork_id, similar_artwork_id): score for artwork_id, similar_artwork_id, score in rows}
+
+
+def test_incremental_refresh_matches_full_rebuild(make_artwork, make_user, make_review):
+    first_reviewer, second_reviewer = make_user(), make_user()
+    rated, first_only, second_only, disliked, new = (make_artwork() for _ in range(5))
+
+    for artwork_id, score in ((rated, 8), (first_only, 4)):
+        make_review(first_reviewer, artwork_id, score)
+
+    for artwork_id, score in ((rated, 9), (second_only, 8), (disliked, 1)):
+        make_review(second_reviewer, artwork_id, score)
+
+    with Session(db_state.engine) as db:
+        crud.refresh_artwork_similarities(db, full=True)
+        before = stored_similarities(db)
+
+    # Moves the first reviewer's mean: the score of `rated` with `second_only` changes although neither shares a
+    # reviewer with `new`
+    make_review(first_reviewer, new, 2)
+
+    with Session(db_state.engine) as db:
+        crud.refresh_artwork_similarities(db)
+        incremental = stored_similarities(db)
+        crud.refresh_artwork_similarities(db, full=True)
+        rebuilt = stored_similarities(db)
+
+    assert before[second_only, rated] != pytest.approx(rebuilt[second_only, rated])
+    assert incremental.keys() == rebuilt.keys()
+    assert incremental == pytest.approx(rebuilt)
@@ -0,0 +1,36 @@
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import models, schemas
+from backend.crud.importer import import_file
+from backend.dependencies import db_state, needs_rehash
+
+
+def test_user_responses_leave_out_the_password(client, make_user):
+    user_id = make_user()
+
+    listed = client.get("/users/", params={"limit": 1000}).json()
+    assert listed and all("password" not in user for user in listed)
+    assert "password" not in client.get(f"/users/{user_id}").json()
+    assert "password" not in client.put(f"/users/{user_id}", json={"password": "changed"}).json()
+
+
+def test_imported_passwords_are_hashed(client, tmp_path):
+    logins = [f"imported-user-{index}-{tmp_path.name}" for index in range(3)]
+    path = tmp_path / "users.jsonl"
+    path.write_text("\n".join(json.dumps({"login": login, "password": f"secret-{login}",
+                                          "email": f"{login}@example.com"}) for login in logins))
+
+    report = import_file(db_state.engine, schemas.CatalogResource.users, path)
+    assert (report.imported, report.rejected) == (3, 0)
+
+    with Session(db_state.engine) as db:
+        stored = dict(db.execute(select(models.User.login, models.User.password)
+                                 .where(models.User.login.in_(logins))).all())
+
+    assert not any(needs_rehash(stored[login]) for login in logins)
+    response = client.post("/login", json={"login": logins[0], "password": f"secret-{logins[0]}",
+                                           "email": f"{logins[0]}@example.com"})
+    assert response.status_code == 200